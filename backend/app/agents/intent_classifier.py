@@ -0,0 +1,133 @@
+"""Keyword-based intent classification for tourism queries
+
+All category keywords are compiled into one prefix-factored regex, so a
+query is scanned once no matter how many categories are registered.
+"""
+
+import re
+from typing import Dict, Iterable, List, Tuple
+
+INTENT_KEYWORDS = {
+    'weather': [
+        'temperature', 'temp', 'weather', 'rain', 'rainfall', 'precipitation',
+        'how hot', 'how cold', 'forecast', 'climate', 'sunny', 'cloudy',
+        'snow', 'wind', 'humidity', 'degrees', 'celsius', 'fahrenheit',
+        'chance of rain', 'will it rain', 'is it raining'
+    ],
+    'places': [
+        'places', 'place', 'visit', 'visiting', 'visits', 'attractions',
+        'attraction', 'see', 'tourist', 'tourism', 'sightseeing',
+        'monuments', 'monument', 'museums', 'museum', 'landmarks',
+        'things to do', 'what to see', 'where to go', 'where to visit',
+        'sights', 'parks', 'temples', 'palaces', 'beaches', 'locations',
+        'recommendations', 'suggestions', 'must see', 'top places'
+    ],
+    # Trip planning without a specific ask; answered with places
+    'trip': ['plan', 'planning', 'trip', 'going', 'visit', 'travel', 'traveling', 'vacation'],
+    # Open questions; answered with places
+    'question': ['what can', 'what should', 'what are', 'where can', 'show me'],
+}
+
+# Category -> list of (position in the lowercased query, keyword)
+IntentMatches = Dict[str, List[Tuple[int, str]]]
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """
+    Build a regex alternation factored by common prefixes
+    
+    e.g. ["temp", "temperature", "temples"] -> "temp(?:erature|les)?", so
+    the regex engine rejects a position after checking a single character
+    instead of trying every keyword there.
+    """
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # A keyword ends here: the longer continuations are optional (and greedy)
+        if '' in node:
+            body = '(?:' + body + ')?'
+        return body
+    
+    return build(trie)
+
+
+class IntentClassifier:
+    """
+    Multi-category keyword matcher
+    
+    Matches have plain substring semantics: a category matches when any of
+    its keywords occurs anywhere in the lowercased query, including inside
+    other words and overlapping other keywords.
+    """
+    
+    def __init__(self, categories: Dict[str, Iterable[str]] = None):
+        self.categories: Dict[str, List[str]] = {}
+        for name, keywords in (categories or {}).items():
+            self.categories[name] = [keyword.lower() for keyword in keywords]
+        self._compile()
+    
+    def add_category(self, name: str, keywords: Iterable[str]):
+        """Register (or extend) a category and rebuild the matcher"""
+        existing = self.categories.setdefault(name, [])
+        existing.extend(keyword.lower() for keyword in keywords if keyword.lower() not in existing)
+        self._compile()
+    
+    def _compile(self):
+        keyword_categories: Dict[str, set] = {}
+        for name, keywords in self.categories.items():
+            for keyword in keywords:
+                keyword_categories.setdefault(keyword, set()).add(name)
+        
+        # The regex reports one keyword per position: the longest, as the
+        # trie's optional tails are greedy. Every shorter keyword matching
+        # at that position is a prefix of it, so each keyword also carries
+        # the categories of its prefixes, each with the longest such prefix.
+        self._hits: Dict[str, List[Tuple[str, str]]] = {}
+        for keyword in keyword_categories:
+            by_category: Dict[str, str] = {}
+            for other, names in keyword_categories.items():
+                if keyword.startswith(other):
+                    for name in names:
+                        if len(other) > len(by_category.get(name, '')):
+                            by_category[name] = other
+            self._hits[keyword] = list(by_category.items())
+        
+        if keyword_categories:
+            # Zero-width lookahead so matches may overlap
+            self._pattern = re.compile('(?=(' + _trie_pattern(keyword_categories) + '))')
+        else:
+            self._pattern = None
+    
+    def classify(self, query: str) -> IntentMatches:
+        """
+        Find every matched category in a single pass over the query
+        
+        Args:
+            query: User query
+        
+        Returns:
+            Matched categories, each with its hits as (position, keyword)
+            pairs; positions index into the lowercased query
+        """
+        matches: IntentMatches = {}
+        if self._pattern is None:
+            return matches
+        
+        hits = self._hits
+        for match in self._pattern.finditer(query.lower()):
+            position = match.start()
+            for name, keyword in hits[match.group(1)]:
+                matches.setdefault(name, []).append((position, keyword))
+        return matches
+
+
+intent_classifier = IntentClassifier(INTENT_KEYWORDS)
@@ -1,8 +1,11 @@
-import re
-from typing import Optional, Tuple
-from app.models.schemas import TourismResponse, WeatherResponse, PlaceInfo
+import asyncio
+from typing import Any, AsyncIterator, Dict, Optional, Tuple, List
+from app.models.schemas import TourismResponse, WeatherResponse, PlaceInfo, LocationResponse
 from app.agents.weather_agent import WeatherAgent
 from app.agents.places_agent import PlacesAgent
+from app.agents.place_extractor import PlaceNameExtractor, place_extractor
+from app.agents.intent_classifier import IntentClassifier, intent_classifier
+from app.clients.geocoding_client import GeocodingClient
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -13,234 +16,415 @@ class TourismAIAgent:
     def __init__(
         self,
         weather_agent: WeatherAgent,
-        places_agent: PlacesAgent
+        places_agent: PlacesAgent,
+        geocoding_client: GeocodingClient,
+        parallel: bool = True,
+        weather_timeout: Optional[float] = None,
+        places_timeout: Optional[float] = None,
+        extractor: Optional[PlaceNameExtractor] = None,
+        classifier: Optional[IntentClassifier] = None
     ):
         self.weather_agent = weather_agent
         self.places_agent = places_agent
+        self.geocoding_client = geocoding_client
+        self.parallel = parallel
+        self.weather_timeout = weather_timeout
+        self.places_timeout = places_timeout
+        self._background_tasks = set()
+        self.place_extractor = extractor or place_extractor
+        self.intent_classifier = classifier or intent_classifier
     
     def _extract_place_name(self, query: str) -> Optional[str]:
-        query_clean = query.strip()
-        
-        skip_words = {'the', 'and', 'or', 'can', 'what', 'where', 'how', 'when', 'why', 'is', 'are', 'will', 'want', 'to', 'in', 'at', 'for', 'my', 'i', 'me', 'we', 'our', 'a', 'an', 'go', 'going', 'give', 'me', 'tour', 'plan', 'show', 'tell', 'get', 'find', 'search', 'look'}
-        skip_words_upper = {w.capitalize() for w in skip_words} | {'The', 'And', 'Or', 'Can', 'What', 'Where', 'How', 'When', 'Why', 'I', 'My', 'Me', 'We', 'Our', 'Go', 'Going', 'Give', 'Tour', 'Plan', 'Show', 'Tell', 'Get', 'Find', 'Search', 'Look'}
-        
-        if re.search(r'going\s+to\s+go\s+to\s+([A-Z][a-zA-Z]{2,})', query_clean, re.IGNORECASE):
-            match = re.search(r'going\s+to\s+go\s+to\s+([A-Z][a-zA-Z]{2,}(?:\s+[A-Z][a-zA-Z]{2,})*?)(?:,|\s+let|\s+what|\s+temperature|\s+places|\s+and|\s+can|\s+are|\s*\?|$)', query_clean, re.IGNORECASE)
-            if match:
-                place = match.group(1).strip().rstrip('.,!?;:')
-                if place and len(place) > 2 and place.lower() not in skip_words:
-                    return place
-        
-        patterns = [
-            # Pattern: "for [Place]" - high priority for queries like "Give me tour plan for Hyderabad"
-            r'(?:for|about|around|near)\s+([A-Z][a-zA-Z]{2,}(?:\s+[A-Z][a-zA-Z]{2,})*?)(?:\s*,|\s+let|\s+what|\s+temperature|\s+places|\s+the|\s+is|\s+are|\s+can|\s+plan|\s+tour|\s*\?|$)',
-            # Pattern: "going to [Place]" or "traveling to [Place]"
-            r'(?:going\s+to|traveling\s+to|travelling\s+to|travel\s+to|visit|visiting|visits|want\s+to\s+visit|plan\s+to\s+visit)\s+([A-Z][a-zA-Z]{2,}(?:\s+[A-Z][a-zA-Z]{2,})*?)(?:,|\s+let|\s+what|\s+temperature|\s+places|\s+and|\s+can|\s+are|\s*\?|$)',
-            # Pattern: "in [Place]" or "at [Place]"
-            r'(?:in|at)\s+([A-Z][a-zA-Z]{2,}(?:\s+[A-Z][a-zA-Z]{2,})*?)(?:\s*,|\s+let|\s+what|\s+temperature|\s+places|\s+the|\s+is|\s+are|\s+can|\s*\?|$)',
-            # Pattern: "to [Place]" (but not "go to" or "going to")
-            r'(?<!go\s)(?<!going\s)to\s+([A-Z][a-zA-Z]{2,}(?:\s+[A-Z][a-zA-Z]{2,})*?)(?:\s*,|\s+let|\s+what|\s+temperature|\s+places|\s+can|\s+are|\s*\?|$)',
-            # Pattern: "place/city/location is/called/named/in"
-            r'(?:place|city|location)\s+(?:is|called|named|in)\s+([A-Z][a-zA-Z]{2,}(?:\s+[A-Z][a-zA-Z]{2,})*?)(?:\s*,|\s+|$)',
-        ]
-        
-        for pattern in patterns:
-            matches = re.finditer(pattern, query_clean, re.IGNORECASE)
-            for match in matches:
-                place = match.group(1).strip().rstrip('.,!?;:')
-                place = re.sub(r'^(the|a|an)\s+', '', place, flags=re.IGNORECASE)
-                if place and len(place) > 2 and place.lower() not in skip_words:
-                    words = place.split()
-                    filtered = []
-                    for w in words:
-                        if w.lower() not in skip_words and w.rstrip('.,!?') not in skip_words_upper:
-                            filtered.append(w.rstrip('.,!?'))
-                    if filtered:
-                        result = ' '.join(filtered)
-                        result_lower = result.lower()
-                        if result_lower not in skip_words and len(result) > 2:
-                            if len(filtered) == 1 and result_lower in ['give', 'go', 'show', 'tell', 'get', 'find', 'tour', 'plan']:
-                                continue
-                            return result
-        
-        sentences = re.split(r'[.!?]\s+', query_clean)
-        for sentence in sentences:
-            words = sentence.split()
-            capitalized_places = []
-            for i, word in enumerate(words):
-                cleaned = word.rstrip('.,!?;:')
-                if i == 0 and cleaned.lower() in ['give', 'show', 'tell', 'get', 'find', 'search', 'look']:
-                    continue
-                if cleaned and cleaned[0].isupper() and len(cleaned) > 2:
-                    if cleaned not in skip_words_upper:
-                        capitalized_places.append(cleaned)
-                        j = i + 1
-                        while j < len(words) and j < i + 3:  
-                            next_word = words[j].rstrip('.,!?;:')
-                            if next_word and next_word[0].isupper() and next_word not in skip_words_upper:
-                                capitalized_places.append(next_word)
-                                j += 1
-                            else:
-                                break
-                        if capitalized_places:
-                            result = ' '.join(capitalized_places)
-                            result_lower = result.lower()
-                            if result_lower not in skip_words and len(result) > 2:
-                                if len(capitalized_places) == 1 and result_lower in ['give', 'go', 'show', 'tell', 'get', 'find', 'tour', 'plan']:
-                                    continue
-                                return result
-                        capitalized_places = []
-        
-        words = query_clean.split()
-        candidates = []
-        for word in words:
-            cleaned = word.rstrip('.,!?;:')
-            cleaned_lower = cleaned.lower()
-            if cleaned and cleaned[0].isupper() and len(cleaned) > 2:
-                if cleaned not in skip_words_upper and cleaned_lower not in skip_words:
-                    if cleaned_lower not in ['give', 'go', 'show', 'tell', 'get', 'find', 'tour', 'plan']:
-                        candidates.append(cleaned)
-        
-        if candidates:
-            if len(candidates) > 1 or (len(candidates) == 1 and not query_clean[0].isupper()):
-                result = ' '.join(candidates[:3])
-                if result.lower() not in skip_words:
-                    return result
-        
-        return None
+        return self.place_extractor.extract(query)
     
     def _parse_intent(self, query: str) -> Tuple[bool, bool]:
-        query_lower = query.lower()
-        
-        weather_keywords = [
-            'temperature', 'temp', 'weather', 'rain', 'rainfall', 'precipitation',
-            'how hot', 'how cold', 'forecast', 'climate', 'sunny', 'cloudy',
-            'snow', 'wind', 'humidity', 'degrees', 'celsius', 'fahrenheit',
-            'chance of rain', 'will it rain', 'is it raining'
-        ]
-        wants_weather = any(keyword in query_lower for keyword in weather_keywords)
-        
-        places_keywords = [
-            'places', 'place', 'visit', 'visiting', 'visits', 'attractions', 
-            'attraction', 'see', 'tourist', 'tourism', 'sightseeing', 
-            'monuments', 'monument', 'museums', 'museum', 'landmarks',
-            'things to do', 'what to see', 'where to go', 'where to visit',
-            'sights', 'parks', 'temples', 'palaces', 'beaches', 'locations',
-            'recommendations', 'suggestions', 'must see', 'top places'
-        ]
-        wants_places = any(keyword in query_lower for keyword in places_keywords)
+        intents = self.intent_classifier.classify(query)
+        wants_weather = 'weather' in intents
+        wants_places = 'places' in intents
         
         if not wants_weather and not wants_places:
-            trip_keywords = ['plan', 'planning', 'trip', 'going', 'visit', 'travel', 'traveling', 'vacation']
-            if any(keyword in query_lower for keyword in trip_keywords):
+            if 'trip' in intents or 'question' in intents:
                 wants_places = True
-            elif any(phrase in query_lower for phrase in ['what can', 'what should', 'what are', 'where can', 'show me']):
-                wants_places = True
-        
-        if 'and' in query_lower or 'both' in query_lower or 'also' in query_lower:
-            if wants_weather or wants_places:
-                if 'temperature' in query_lower or 'weather' in query_lower:
-                    wants_weather = True
-                if 'places' in query_lower or 'visit' in query_lower or 'attractions' in query_lower:
-                    wants_places = True
         
         return wants_weather, wants_places
     
-    async def process_query(self, query: str, place_name: Optional[str] = None) -> TourismResponse:
+    async def _resolve_location(self, place_name: str) -> Optional[LocationResponse]:
+        # Single geocoding call per request; the result doubles as the existence check
+        location = await self.geocoding_client.get_coordinates(place_name)
+        if location:
+            logger.info(f"TourismAIAgent: Resolved {place_name} -> ({location.latitude}, {location.longitude})")
+        return location
+    
+    async def _run_branch(self, name: str, coro, timeout: Optional[float]):
+        # Returns (result, timed_out). A branch that misses its deadline keeps
+        # running in the background so its result still lands in the cache.
+        task = asyncio.create_task(coro)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout), False
+        except asyncio.TimeoutError:
+            logger.warning(f"TourismAIAgent: {name} branch missed its {timeout}s deadline")
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+            return None, True
+    
+    async def _run_child_agents(
+        self,
+        location: LocationResponse,
+        place_name: str,
+        wants_weather: bool,
+        wants_places: bool,
+        offset: int = 0
+    ) -> Tuple[Optional[WeatherResponse], List[PlaceInfo], List[str]]:
+        branches = {}
+        if wants_weather:
+            branches["weather"] = (
+                lambda: self.weather_agent.get_weather_for_location(location, place_name),
+                self.weather_timeout
+            )
+        if wants_places:
+            branches["places"] = (
+                lambda: self.places_agent.get_places_for_location(location, place_name, limit=5, offset=offset),
+                self.places_timeout
+            )
+        
+        if self.parallel:
+            outcomes = await asyncio.gather(
+                *(self._run_branch(name, factory(), timeout) for name, (factory, timeout) in branches.items())
+            )
+            results = dict(zip(branches, outcomes))
+        else:
+            results = {}
+            for name, (factory, timeout) in branches.items():
+                results[name] = await self._run_branch(name, factory(), timeout)
+        
+        weather_result, weather_timed_out = results.get("weather", (None, False))
+        places_result, places_timed_out = results.get("places", ([], False))
+        
+        unavailable = []
+        if weather_timed_out:
+            unavailable.append("weather")
+        if places_timed_out:
+            unavailable.append("places")
+        
+        return weather_result, places_result or [], unavailable
+    
+    def _plan_query(self, query: str, place_name: Optional[str]) -> Tuple[Optional[str], bool, bool]:
+        # Returns (place_name, wants_weather, wants_places); place_name is None when none was found
+        if not place_name:
+            place_name = self._extract_place_name(query)
+        if not place_name:
+            return None, False, False
+        
+        wants_weather, wants_places = self._parse_intent(query)
+        
+        if not wants_weather and not wants_places:
+            wants_places = True
+        
+        return place_name, wants_weather, wants_places
+    
+    def _unidentified_place_response(self) -> TourismResponse:
+        return TourismResponse(
+            success=False,
+            place_name="",
+            message="I couldn't identify the place name from your query. Please specify a place.",
+            error="PLACE_NOT_FOUND"
+        )
+    
+    def _unknown_place_response(self, place_name: str) -> TourismResponse:
+        return TourismResponse(
+            success=False,
+            place_name=place_name,
+            message=f"I don't know if this place exists: {place_name}. Could you check the spelling?",
+            error="PLACE_NOT_FOUND"
+        )
+    
+    def _error_response(self, place_name: Optional[str], error: Exception) -> TourismResponse:
+        return TourismResponse(
+            success=False,
+            place_name=place_name or "",
+            message="An error occurred while processing your request. Please try again.",
+            error=str(error)
+        )
+    
+    def _build_response(
+        self,
+        place_name: str,
+        wants_weather: bool,
+        wants_places: bool,
+        weather_result: Optional[WeatherResponse],
+        places_result: List[PlaceInfo],
+        unavailable: List[str]
+    ) -> TourismResponse:
+        # The place was already resolved, so missing weather means the weather
+        # lookup failed or timed out, not that the place does not exist
+        if wants_weather and not weather_result and "weather" not in unavailable:
+            unavailable = unavailable + ["weather"]
+        
+        if wants_weather and not weather_result and not places_result:
+            return TourismResponse(
+                success=False,
+                place_name=place_name,
+                places=[] if wants_places else None,
+                message=f"I couldn't get the weather for {place_name} right now. Please try again in a moment.",
+                error="WEATHER_UNAVAILABLE",
+                unavailable=unavailable
+            )
+        
+        if wants_places and not places_result:
+            if "places" in unavailable:
+                places_note = "Tourist attractions are still being looked up or unavailable right now - please try again in a moment."
+            else:
+                places_note = "I couldn't find tourist attractions nearby - the places API might be slow or there might not be many tagged attractions in OpenStreetMap for this location."
+            if weather_result:
+                return TourismResponse(
+                    success=True,
+                    place_name=place_name,
+                    weather=weather_result,
+                    places=[],
+                    message=f"In {place_name} it's currently {weather_result.temperature:.0f}°C with a chance of {weather_result.rain_probability:.0f}% to rain. {places_note}",
+                    unavailable=unavailable or None
+                )
+            if "places" in unavailable:
+                message = f"In {place_name} {places_note[0].lower()}{places_note[1:]}"
+            else:
+                message = f"In {place_name} I couldn't find any tourist attractions nearby. The places API might be slow or there might not be many tagged attractions in OpenStreetMap for this location."
+            return TourismResponse(
+                success=True,
+                place_name=place_name,
+                weather=weather_result,
+                places=[],
+                message=message,
+                unavailable=unavailable or None
+            )
+        
+        message_parts = []
+        
+        if weather_result:
+            message_parts.append(
+                f"In {place_name} it's currently {weather_result.temperature:.0f}°C "
+                f"with a chance of {weather_result.rain_probability:.0f}% to rain."
+            )
+        elif "weather" in unavailable:
+            message_parts.append(f"The weather for {place_name} is unavailable right now.")
+        
+        if places_result:
+            if message_parts:
+                message_parts.append("And these are the places you can go:")
+            else:
+                message_parts.append(f"In {place_name} these are the places you can go,")
+            
+            place_names = [place.name for place in places_result]
+            message_parts.append("\n\n" + "\n".join(place_names))
+        
+        message = " ".join(message_parts) if message_parts else f"Information about {place_name}."
+        
+        return TourismResponse(
+            success=True,
+            place_name=place_name,
+            weather=weather_result,
+            places=places_result,
+            message=message,
+            unavailable=unavailable or None
+        )
+    
+    async def process_query(self, query: str, place_name: Optional[str] = None, offset: int = 0) -> TourismResponse:
         try:
             logger.info(f"TourismAIAgent: Processing query: {query}")
             
+            place_name, wants_weather, wants_places = self._plan_query(query, place_name)
             if not place_name:
-                place_name = self._extract_place_name(query)
+                return self._unidentified_place_response()
             
-            if not place_name:
-                return TourismResponse(
-                    success=False,
-                    place_name="",
-                    message="I couldn't identify the place name from your query. Please specify a place.",
-                    error="PLACE_NOT_FOUND"
-                )
+            logger.info(f"TourismAIAgent: Place={place_name}, Weather={wants_weather}, Places={wants_places}")
             
-            wants_weather, wants_places = self._parse_intent(query)
+            # Resolve the place once and share it with both child agents
+            location = await self._resolve_location(place_name)
+            if not location:
+                return self._unknown_place_response(place_name)
             
-            if not wants_weather and not wants_places:
-                wants_places = True
+            weather_result, places_result, unavailable = await self._run_child_agents(
+                location, place_name, wants_weather, wants_places, offset
+            )
+            
+            return self._build_response(
+                place_name, wants_weather, wants_places, weather_result, places_result, unavailable
+            )
+        
+        except Exception as e:
+            logger.error(f"TourismAIAgent: Unexpected error - {e}")
+            return self._error_response(place_name, e)
+    
+    async def stream_query(
+        self,
+        query: str,
+        place_name: Optional[str] = None,
+        offset: int = 0
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Answer a query as a sequence of events, each yielded as soon as it is ready
+        
+        Events, in order: "place" (the resolved location), "weather" and
+        "places" (only when asked for), then "summary" with the same
+        TourismResponse process_query would return. When the query cannot
+        be answered, the stream is just the summary.
+        """
+        started = []
+        try:
+            logger.info(f"TourismAIAgent: Streaming query: {query}")
+            
+            place_name, wants_weather, wants_places = self._plan_query(query, place_name)
+            if not place_name:
+                yield {"event": "summary", "response": self._unidentified_place_response()}
+                return
             
             logger.info(f"TourismAIAgent: Place={place_name}, Weather={wants_weather}, Places={wants_places}")
             
-            weather_result = None
-            places_result = []
+            location = await self._resolve_location(place_name)
+            if not location:
+                yield {"event": "summary", "response": self._unknown_place_response(place_name)}
+                return
             
-            if wants_weather:
-                weather_result = await self.weather_agent.get_weather_info(place_name)
-                if not weather_result:
-                    return TourismResponse(
-                        success=False,
-                        place_name=place_name,
-                        message=f"I don't know if this place exists: {place_name}. Could you check the spelling?",
-                        error="PLACE_NOT_FOUND"
-                    )
+            yield {
+                "event": "place",
+                "place_name": place_name,
+                "location": location,
+                "wants_weather": wants_weather,
+                "wants_places": wants_places
+            }
             
-            if wants_places:
-                places_result = await self.places_agent.get_tourist_places(place_name, limit=5)
-                if not places_result:
-                    location_check = await self.weather_agent.get_weather_info(place_name)
-                    if not location_check:
-                        return TourismResponse(
-                            success=False,
-                            place_name=place_name,
-                            message=f"I don't know if this place exists: {place_name}. Could you check the spelling?",
-                            error="PLACE_NOT_FOUND"
-                        )
-                    if weather_result:
-                        return TourismResponse(
-                            success=True,
-                            place_name=place_name,
-                            weather=weather_result,
-                            places=[],
-                            message=f"In {place_name} it's currently {weather_result.temperature:.0f}°C with a chance of {weather_result.rain_probability:.0f}% to rain. I couldn't find tourist attractions nearby - the places API might be slow or there might not be many tagged attractions in OpenStreetMap for this location."
-                        )
-                    return TourismResponse(
-                        success=True,
-                        place_name=place_name,
-                        weather=weather_result,
-                        places=[],
-                        message=f"In {place_name} I couldn't find any tourist attractions nearby. The places API might be slow or there might not be many tagged attractions in OpenStreetMap for this location."
-                    )
-            
-            message_parts = []
+            def start_places():
+                task = asyncio.create_task(self._run_branch(
+                    "places",
+                    self.places_agent.get_places_for_location(location, place_name, limit=5, offset=offset),
+                    self.places_timeout
+                ))
+                started.append(task)
+                return task
             
-            if weather_result:
-                message_parts.append(
-                    f"In {place_name} it's currently {weather_result.temperature:.0f}°C "
-                    f"with a chance of {weather_result.rain_probability:.0f}% to rain."
-                )
+            places_task = start_places() if wants_places and self.parallel else None
             
-            if places_result:
-                if message_parts:
-                    message_parts.append("And these are the places you can go:")
-                else:
-                    message_parts.append(f"In {place_name} these are the places you can go,")
-                
-                place_names = [place.name for place in places_result]
-                message_parts.append("\n\n" + "\n".join(place_names))
+            weather_result, weather_timed_out = None, False
+            if wants_weather:
+                weather_task = asyncio.create_task(self._run_branch(
+                    "weather",
+                    self.weather_agent.get_weather_for_location(location, place_name),
+                    self.weather_timeout
+                ))
+                started.append(weather_task)
+                weather_result, weather_timed_out = await asyncio.shield(weather_task)
+                yield {"event": "weather", "weather": weather_result, "unavailable": not weather_result}
             
-            message = " ".join(message_parts) if message_parts else f"Information about {place_name}."
+            places_result, places_timed_out = [], False
+            if wants_places:
+                if places_task is None:
+                    places_task = start_places()
+                places_result, places_timed_out = await asyncio.shield(places_task)
+                places_result = places_result or []
+                yield {"event": "places", "places": places_result, "unavailable": places_timed_out}
             
-            return TourismResponse(
-                success=True,
-                place_name=place_name,
-                weather=weather_result,
-                places=places_result,
-                message=message
-            )
+            unavailable = []
+            if weather_timed_out:
+                unavailable.append("weather")
+            if places_timed_out:
+                unavailable.append("places")
             
+            yield {
+                "event": "summary",
+                "response": self._build_response(
+                    place_name, wants_weather, wants_places, weather_result, places_result, unavailable
+                )
+            }
+        
         except Exception as e:
             logger.error(f"TourismAIAgent: Unexpected error - {e}")
-            return TourismResponse(
-                success=False,
-                place_name=place_name or "",
-                message="An error occurred while processing your request. Please try again.",
-                error=str(e)
+            yield {"event": "summary", "response": self._error_response(place_name, e)}
+        finally:
+            # A client that disconnects early leaves branches running; let
+            # them finish so their results still land in the cache
+            for task in started:
+                if not task.done():
+                    self._background_tasks.add(task)
+                    task.add_done_callback(self._background_tasks.discard)
+    
+    async def process_batch(
+        self,
+        queries: List[Tuple[str, Optional[str], int]],
+        max_concurrency: int = 4
+    ) -> List[TourismResponse]:
+        """
+        Answer a batch of (query, place_name, offset) triples
+        
+        Queries naming the same place and asking for the same page of places
+        share one geocoding, weather and places lookup, fetched for the union
+        of their intents. At most
+        max_concurrency distinct places are fetched at a time.
+        
+        Returns:
+            One response per query, in request order
+        """
+        logger.info(f"TourismAIAgent: Processing batch of {len(queries)} queries")
+        
+        plans = []
+        groups: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        for query, place_name, offset in queries:
+            place_name, wants_weather, wants_places = self._plan_query(query, place_name)
+            if not place_name:
+                plans.append(None)
+                continue
+            
+            key = (" ".join(place_name.lower().split()), offset)
+            group = groups.setdefault(
+                key, {"place_name": place_name, "offset": offset, "wants_weather": False, "wants_places": False}
             )
-
+            group["wants_weather"] |= wants_weather
+            group["wants_places"] |= wants_places
+            plans.append((key, place_name, wants_weather, wants_places))
+        
+        logger.info(f"TourismAIAgent: Batch has {len(groups)} distinct places")
+        
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        
+        async def fetch(group: Dict[str, Any]):
+            async with semaphore:
+                location = await self._resolve_location(group["place_name"])
+                if not location:
+                    return None
+                return await self._run_child_agents(
+                    location, group["place_name"], group["wants_weather"], group["wants_places"], group["offset"]
+                )
+        
+        outcomes = await asyncio.gather(*(fetch(group) for group in groups.values()), return_exceptions=True)
+        results = dict(zip(groups, outcomes))
+        
+        responses = []
+        for plan in plans:
+            if plan is None:
+                responses.append(self._unidentified_place_response())
+                continue
+            
+            key, place_name, wants_weather, wants_places = plan
+            outcome = results[key]
+            if isinstance(outcome, Exception):
+                logger.error(f"TourismAIAgent: Unexpected error for {place_name} in batch - {outcome}")
+                responses.append(self._error_response(place_name, outcome))
+                continue
+            if outcome is None:
+                responses.append(self._unknown_place_response(place_name))
+                continue
+            
+            # The shared lookup may cover more than this query asked for
+            weather_result, places_result, unavailable = outcome
+            if weather_result and wants_weather:
+                weather_result = weather_result.model_copy(update={"place_name": place_name})
+            else:
+                weather_result = None
+            responses.append(self._build_response(
+                place_name,
+                wants_weather,
+                wants_places,
+                weather_result,
+                places_result if wants_places else [],
+                [name for name in unavailable if (name == "weather" and wants_weather) or (name == "places" and wants_places)]
+            ))
+        
+        return responses
@@ -0,0 +1,164 @@
+"""Place name extraction for natural language tourism queries
+
+Everything that does not depend on the query (regexes, stopword tables)
+is compiled once at import time, and the token-based fallbacks share a
+single tokenization of the query.
+"""
+
+import re
+from typing import Iterable, List, Optional
+
+SKIP_WORDS = frozenset({
+    'the', 'and', 'or', 'can', 'what', 'where', 'how', 'when', 'why', 'is', 'are', 'will', 'want', 'to', 'in', 'at',
+    'for', 'my', 'i', 'me', 'we', 'our', 'a', 'an', 'go', 'going', 'give', 'tour', 'plan', 'show', 'tell', 'get',
+    'find', 'search', 'look'
+})
+SKIP_WORDS_UPPER = frozenset({w.capitalize() for w in SKIP_WORDS} | {
+    'The', 'And', 'Or', 'Can', 'What', 'Where', 'How', 'When', 'Why', 'I', 'My', 'Me', 'We', 'Our', 'Go', 'Going',
+    'Give', 'Tour', 'Plan', 'Show', 'Tell', 'Get', 'Find', 'Search', 'Look'
+})
+# Verbs that are never a place on their own
+COMMAND_WORDS = frozenset({'give', 'go', 'show', 'tell', 'get', 'find', 'tour', 'plan'})
+# Verbs skipped when they open a sentence
+LEADING_COMMAND_WORDS = frozenset({'give', 'show', 'tell', 'get', 'find', 'search', 'look'})
+
+_TRAILING_PUNCTUATION = '.,!?;:'
+
+_GOING_TO_GO_TO = re.compile(
+    r'going\s+to\s+go\s+to\s+([A-Z][a-zA-Z]{2,}(?:\s+[A-Z][a-zA-Z]{2,})*?)(?:,|\s+let|\s+what|\s+temperature|\s+places|\s+and|\s+can|\s+are|\s*\?|$)',
+    re.IGNORECASE
+)
+
+# In priority order; the first pattern yielding a usable place wins
+_PLACE_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    # Pattern: "for [Place]" - high priority for queries like "Give me tour plan for Hyderabad"
+    r'(?:for|about|around|near)\s+([A-Z][a-zA-Z]{2,}(?:\s+[A-Z][a-zA-Z]{2,})*?)(?:\s*,|\s+let|\s+what|\s+temperature|\s+places|\s+the|\s+is|\s+are|\s+can|\s+plan|\s+tour|\s*\?|$)',
+    # Pattern: "going to [Place]" or "traveling to [Place]"
+    r'(?:going\s+to|traveling\s+to|travelling\s+to|travel\s+to|visit|visiting|visits|want\s+to\s+visit|plan\s+to\s+visit)\s+([A-Z][a-zA-Z]{2,}(?:\s+[A-Z][a-zA-Z]{2,})*?)(?:,|\s+let|\s+what|\s+temperature|\s+places|\s+and|\s+can|\s+are|\s*\?|$)',
+    # Pattern: "in [Place]" or "at [Place]"
+    r'(?:in|at)\s+([A-Z][a-zA-Z]{2,}(?:\s+[A-Z][a-zA-Z]{2,})*?)(?:\s*,|\s+let|\s+what|\s+temperature|\s+places|\s+the|\s+is|\s+are|\s+can|\s*\?|$)',
+    # Pattern: "to [Place]" (but not "go to" or "going to")
+    r'(?<!go\s)(?<!going\s)to\s+([A-Z][a-zA-Z]{2,}(?:\s+[A-Z][a-zA-Z]{2,})*?)(?:\s*,|\s+let|\s+what|\s+temperature|\s+places|\s+can|\s+are|\s*\?|$)',
+    # Pattern: "place/city/location is/called/named/in"
+    r'(?:place|city|location)\s+(?:is|called|named|in)\s+([A-Z][a-zA-Z]{2,}(?:\s+[A-Z][a-zA-Z]{2,})*?)(?:\s*,|\s+|$)',
+)]
+
+_LEADING_ARTICLE = re.compile(r'^(the|a|an)\s+', re.IGNORECASE)
+_SENTENCE_BREAK = re.compile(r'[.!?]\s+')
+
+
+class PlaceNameExtractor:
+    """Extracts the place a query is about, e.g. "Bangalore" from "I'm going to Bangalore" """
+    
+    def extract(self, query: str) -> Optional[str]:
+        """Return the place name mentioned in the query, or None"""
+        query_clean = query.strip()
+        
+        place = self._match_going_to_go_to(query_clean)
+        if place:
+            return place
+        
+        place = self._match_patterns(query_clean)
+        if place:
+            return place
+        
+        # Token-based fallbacks share one tokenization: cleaned words per sentence
+        sentences = [
+            [word.rstrip(_TRAILING_PUNCTUATION) for word in sentence.split()]
+            for sentence in _SENTENCE_BREAK.split(query_clean)
+        ]
+        
+        place = self._match_capitalized_run(sentences)
+        if place:
+            return place
+        
+        return self._match_capitalized_words(sentences, query_clean)
+    
+    def extract_many(self, queries: Iterable[str]) -> List[Optional[str]]:
+        """Extract place names for a batch of queries"""
+        extract = self.extract
+        return [extract(query) for query in queries]
+    
+    @staticmethod
+    def _match_going_to_go_to(query_clean: str) -> Optional[str]:
+        match = _GOING_TO_GO_TO.search(query_clean)
+        if match:
+            place = match.group(1).strip().rstrip(_TRAILING_PUNCTUATION)
+            if place and len(place) > 2 and place.lower() not in SKIP_WORDS:
+                return place
+        return None
+    
+    @staticmethod
+    def _match_patterns(query_clean: str) -> Optional[str]:
+        for pattern in _PLACE_PATTERNS:
+            for match in pattern.finditer(query_clean):
+                place = match.group(1).strip().rstrip(_TRAILING_PUNCTUATION)
+                place = _LEADING_ARTICLE.sub('', place)
+                if not place or len(place) <= 2 or place.lower() in SKIP_WORDS:
+                    continue
+                
+                filtered = []
+                for w in place.split():
+                    if w.lower() not in SKIP_WORDS and w.rstrip('.,!?') not in SKIP_WORDS_UPPER:
+                        filtered.append(w.rstrip('.,!?'))
+                if not filtered:
+                    continue
+                
+                result = ' '.join(filtered)
+                result_lower = result.lower()
+                if result_lower not in SKIP_WORDS and len(result) > 2:
+                    if len(filtered) == 1 and result_lower in COMMAND_WORDS:
+                        continue
+                    return result
+        return None
+    
+    @staticmethod
+    def _match_capitalized_run(sentences: List[List[str]]) -> Optional[str]:
+        # First run of up to three capitalized words in any sentence
+        for words in sentences:
+            for i, cleaned in enumerate(words):
+                if i == 0 and cleaned.lower() in LEADING_COMMAND_WORDS:
+                    continue
+                if not (cleaned and cleaned[0].isupper() and len(cleaned) > 2) or cleaned in SKIP_WORDS_UPPER:
+                    continue
+                
+                capitalized_places = [cleaned]
+                j = i + 1
+                while j < len(words) and j < i + 3:
+                    next_word = words[j]
+                    if next_word and next_word[0].isupper() and next_word not in SKIP_WORDS_UPPER:
+                        capitalized_places.append(next_word)
+                        j += 1
+                    else:
+                        break
+                
+                result = ' '.join(capitalized_places)
+                result_lower = result.lower()
+                if result_lower not in SKIP_WORDS and len(result) > 2:
+                    if len(capitalized_places) == 1 and result_lower in COMMAND_WORDS:
+                        continue
+                    return result
+        return None
+    
+    @staticmethod
+    def _match_capitalized_words(sentences: List[List[str]], query_clean: str) -> Optional[str]:
+        # Up to three capitalized words from anywhere in the query
+        candidates = []
+        for words in sentences:
+            for cleaned in words:
+                if cleaned and cleaned[0].isupper() and len(cleaned) > 2:
+                    cleaned_lower = cleaned.lower()
+                    if cleaned not in SKIP_WORDS_UPPER and cleaned_lower not in SKIP_WORDS:
+                        if cleaned_lower not in COMMAND_WORDS:
+                            candidates.append(cleaned)
+        
+        if candidates:
+            if len(candidates) > 1 or (len(candidates) == 1 and not query_clean[0].isupper()):
+                result = ' '.join(candidates[:3])
+                if result.lower() not in SKIP_WORDS:
+                    return result
+        
+        return None
+
+
+place_extractor = PlaceNameExtractor()
@@ -1,5 +1,5 @@
 from typing import Optional
-from app.models.schemas import WeatherResponse
+from app.models.schemas import WeatherResponse, LocationResponse
 from app.clients.geocoding_client import GeocodingClient
 from app.clients.weather_client import WeatherClient
 from app.utils.logger import setup_logger
@@ -18,6 +18,9 @@ class WeatherAgent:
         if not location:
             return None
         
+        return await self.get_weather_for_location(location, place_name)
+    
+    async def get_weather_for_location(self, location: LocationResponse, place_name: str) -> Optional[WeatherResponse]:
+        # Used when the caller has already resolved the place
         weather = await self.weather_client.get_weather(location.latitude, location.longitude, place_name)
         return weather
-
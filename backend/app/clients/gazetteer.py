@@ -0,0 +1,193 @@
+"""
+Local gazetteer for city lookups.
+
+Loads a GeoNames-style cities file (e.g. cities15000.txt) into an in-memory
+index of normalized names and aliases, so most city lookups are answered
+without calling Nominatim. A small dataset is bundled in app/data/cities.tsv.
+"""
+
+import os
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+DEFAULT_CITIES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "cities.tsv")
+
+# English country names as used in Nominatim display names
+COUNTRY_NAMES = {
+    "AE": "United Arab Emirates", "AT": "Austria", "AU": "Australia", "BR": "Brazil",
+    "CA": "Canada", "CH": "Switzerland", "CN": "China", "CR": "Costa Rica",
+    "CZ": "Czechia", "DE": "Germany", "EG": "Egypt", "ES": "Spain", "FR": "France",
+    "GB": "United Kingdom", "GR": "Greece", "HK": "Hong Kong", "ID": "Indonesia",
+    "IE": "Ireland", "IN": "India", "IT": "Italy", "JP": "Japan", "KR": "South Korea",
+    "LK": "Sri Lanka", "MX": "Mexico", "MY": "Malaysia", "NL": "Netherlands",
+    "NP": "Nepal", "NZ": "New Zealand", "PK": "Pakistan", "PT": "Portugal",
+    "RU": "Russia", "SG": "Singapore", "TH": "Thailand", "TR": "Türkiye",
+    "US": "United States", "VN": "Vietnam", "ZA": "South Africa",
+}
+
+# Extra ways people name countries in queries
+COUNTRY_ALIASES = {
+    "usa": "US", "united states of america": "US", "america": "US",
+    "uk": "GB", "england": "GB", "great britain": "GB", "britain": "GB",
+    "uae": "AE", "turkey": "TR", "czech republic": "CZ", "korea": "KR",
+}
+
+# Aliases shorter than this are not indexed: codes such as "DEL" or "JAI"
+# would turn ordinary words in a query into cities
+MIN_ALIAS_LENGTH = 4
+
+# Ranking weights by GeoNames feature code: capitals and admin seats win
+# over plain populated places of similar size
+_FEATURE_WEIGHTS = {"PPLC": 2.0, "PPLA": 1.5, "PPLA2": 1.2}
+
+
+def normalize_name(text: str) -> str:
+    """Lowercase, strip accents and collapse punctuation/whitespace"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return re.sub(r"[^a-z0-9]+", " ", stripped.lower()).strip()
+
+
+@dataclass(frozen=True)
+class GazetteerEntry:
+    """A city from the gazetteer"""
+    geoname_id: int
+    name: str
+    latitude: float
+    longitude: float
+    country_code: str
+    population: int
+    feature_code: str
+    
+    @property
+    def country_name(self) -> str:
+        return COUNTRY_NAMES.get(self.country_code, self.country_code)
+    
+    @property
+    def display_name(self) -> str:
+        return f"{self.name}, {self.country_name}"
+    
+    @property
+    def place_type(self) -> str:
+        """Places search profile (see overpass_planner)"""
+        if self.feature_code in ("PPLC", "PPLA") or self.population >= 100000:
+            return "city"
+        return "town" if self.population >= 10000 else "village"
+    
+    @property
+    def rank(self) -> float:
+        return self.population * _FEATURE_WEIGHTS.get(self.feature_code, 1.0)
+
+
+class Gazetteer:
+    """In-memory city index with exact and country-qualified lookups"""
+    
+    def __init__(self, entries: List[GazetteerEntry], aliases: Dict[int, List[str]]):
+        self.entries = entries
+        self.by_key: Dict[str, List[GazetteerEntry]] = {}
+        
+        for entry in entries:
+            name_key = normalize_name(entry.name)
+            for name in [entry.name] + aliases.get(entry.geoname_id, []):
+                key = normalize_name(name)
+                if len(key) < 2 or (key != name_key and len(key) < MIN_ALIAS_LENGTH):
+                    continue
+                bucket = self.by_key.setdefault(key, [])
+                if entry not in bucket:
+                    bucket.append(entry)
+        
+        for bucket in self.by_key.values():
+            bucket.sort(key=lambda entry: entry.rank, reverse=True)
+        
+        self.country_keys: Dict[str, str] = dict(COUNTRY_ALIASES)
+        for code in {entry.country_code for entry in entries} | set(COUNTRY_NAMES):
+            self.country_keys[code.lower()] = code
+            self.country_keys[normalize_name(COUNTRY_NAMES.get(code, code))] = code
+        
+        logger.info(f"Gazetteer loaded: {len(entries)} cities, {len(self.by_key)} names")
+    
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_CITIES_PATH, min_population: int = 0) -> "Gazetteer":
+        """
+        Load a GeoNames-style tab separated cities file
+        
+        Columns follow the GeoNames dump format: geonameid, name, asciiname,
+        alternatenames, latitude, longitude, feature class, feature code,
+        country code, ..., population (column 15).
+        """
+        entries = []
+        aliases: Dict[int, List[str]] = {}
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                cols = line.rstrip("\n").split("\t")
+                if len(cols) < 15 or not cols[0].isdigit():
+                    continue
+                population = int(cols[14] or 0)
+                if population < min_population:
+                    continue
+                entry = GazetteerEntry(
+                    geoname_id=int(cols[0]),
+                    name=cols[1],
+                    latitude=float(cols[4]),
+                    longitude=float(cols[5]),
+                    country_code=cols[8],
+                    population=population,
+                    feature_code=cols[7]
+                )
+                entries.append(entry)
+                names = [cols[2]] + [alias for alias in cols[3].split(",") if alias]
+                aliases[entry.geoname_id] = names
+        return cls(entries, aliases)
+    
+    def _split_country(self, key: str) -> Tuple[str, Optional[str]]:
+        # "paris france" / "paris fr" -> ("paris", "FR")
+        words = key.split()
+        for size in (3, 2, 1):
+            if len(words) > size:
+                country = self.country_keys.get(" ".join(words[-size:]))
+                if country:
+                    return " ".join(words[:-size]), country
+        return key, None
+    
+    def lookup(self, place_name: str) -> Optional[GazetteerEntry]:
+        """
+        Resolve a place name to the best matching city
+        
+        Accepts bare names and aliases ("Bangalore") as well as
+        country-qualified names ("Paris, France", "London UK"). Ambiguous
+        names resolve to the most populous match.
+        """
+        key = normalize_name(place_name)
+        if not key:
+            return None
+        
+        candidates = self.by_key.get(key)
+        if candidates:
+            return candidates[0]
+        
+        name_key, country = self._split_country(key)
+        if country:
+            for entry in self.by_key.get(name_key, []):
+                if entry.country_code == country:
+                    return entry
+        return None
+    
+    def country_hint(self, text: str) -> Optional[str]:
+        """Country of the most populous known city named anywhere in the text"""
+        words = normalize_name(text).split()
+        best = None
+        for size in (3, 2, 1):
+            for start in range(len(words) - size + 1):
+                key = " ".join(words[start:start + size])
+                # Skip short aliases such as "la" that collide with ordinary words
+                if len(key) < 3:
+                    continue
+                candidates = self.by_key.get(key)
+                if candidates and (best is None or candidates[0].rank > best.rank):
+                    best = candidates[0]
+        return best.country_name if best else None
@@ -1,57 +1,98 @@
+import re
 import httpx
 from typing import Optional
 from app.models.schemas import LocationResponse
 from app.utils.logger import setup_logger
+from app.utils.cache import GeocodingCache
+from app.clients.gazetteer import Gazetteer
+from app.clients.overpass_planner import classify_place_type
 
 logger = setup_logger(__name__)
 
+# Country hints for common cities, used when no gazetteer is loaded or it
+# knows no city in the query
+CITY_HINTS = {
+    "bangalore": "India",
+    "mumbai": "India",
+    "delhi": "India",
+    "kolkata": "India",
+    "chennai": "India",
+    "hyderabad": "India",
+    "pune": "India",
+    "ahmedabad": "India",
+    "jaipur": "India",
+    "surat": "India",
+    "lucknow": "India",
+    "kanpur": "India",
+    "nagpur": "India",
+    "indore": "India",
+    "thane": "India",
+    "bhopal": "India",
+    "visakhapatnam": "India",
+    "patna": "India",
+    "vadodara": "India",
+    "paris": "France",
+    "london": "United Kingdom",
+    "new york": "United States",
+    "tokyo": "Japan",
+    "sydney": "Australia",
+    "dubai": "United Arab Emirates",
+}
+
 
 class GeocodingClient:
-    def __init__(self, base_url: str = "https://nominatim.openstreetmap.org/search", user_agent: str = "TourismAI/1.0"):
+    def __init__(
+        self,
+        base_url: str = "https://nominatim.openstreetmap.org/search",
+        user_agent: str = "TourismAI/1.0",
+        cache: Optional[GeocodingCache] = None,
+        gazetteer: Optional[Gazetteer] = None,
+        http_client: Optional[httpx.AsyncClient] = None
+    ):
         self.base_url = base_url
         self.user_agent = user_agent
-        self.client = httpx.AsyncClient(timeout=10.0, headers={"User-Agent": self.user_agent})
+        self.cache = cache
+        self.gazetteer = gazetteer
+        # A shared client (see UpstreamTransport) is closed by its owner
+        self._owns_client = http_client is None
+        self.client = http_client or httpx.AsyncClient(timeout=10.0, headers={"User-Agent": self.user_agent})
+    
+    @staticmethod
+    def _cache_key(place_name: str, country_hint: Optional[str]) -> str:
+        normalized = re.sub(r"\s+", " ", place_name.strip().lower()).strip(" .,!?;:")
+        return f"geocode:{normalized}|{(country_hint or '').lower()}"
     
     async def get_coordinates(self, place_name: str) -> Optional[LocationResponse]:
         # We get the latitude/longitude for a place name
         try:
             clean_place = place_name.strip()
             
-            # Common city-country mappings to improve accuracy
-            city_hints = {
-                "bangalore": "India",
-                "mumbai": "India",
-                "delhi": "India",
-                "kolkata": "India",
-                "chennai": "India",
-                "hyderabad": "India",
-                "pune": "India",
-                "ahmedabad": "India",
-                "jaipur": "India",
-                "surat": "India",
-                "lucknow": "India",
-                "kanpur": "India",
-                "nagpur": "India",
-                "indore": "India",
-                "thane": "India",
-                "bhopal": "India",
-                "visakhapatnam": "India",
-                "patna": "India",
-                "vadodara": "India",
-                "paris": "France",
-                "london": "United Kingdom",
-                "new york": "United States",
-                "tokyo": "Japan",
-                "sydney": "Australia",
-                "dubai": "United Arab Emirates",
-            }
+            # Cities in the local gazetteer are answered without a network hop
+            if self.gazetteer is not None:
+                entry = self.gazetteer.lookup(clean_place)
+                if entry:
+                    logger.info(f"Geocoding '{place_name}' -> {entry.display_name} ({entry.latitude}, {entry.longitude}) [gazetteer]")
+                    return LocationResponse(
+                        latitude=entry.latitude,
+                        longitude=entry.longitude,
+                        display_name=entry.display_name,
+                        place_id=entry.geoname_id,
+                        place_type=entry.place_type,
+                        source="gazetteer"
+                    )
             
+            # A known city named in the query hints the country to Nominatim
             place_lower = clean_place.lower()
-            country_hint = None
-            for city, country in city_hints.items():
-                if city in place_lower:
-                    country_hint = country
-                    break
+            country_hint = self.gazetteer.country_hint(clean_place) if self.gazetteer is not None else None
+            if country_hint is None:
+                country_hint = next((country for city, country in CITY_HINTS.items() if city in place_lower), None)
+            
+            cache_key = self._cache_key(clean_place, country_hint)
+            if self.cache is not None:
+                cached_location = await self.cache.get(cache_key)
+                if cached_location is not None:
+                    logger.debug(f"Using cached coordinates for {place_name}")
+                    return cached_location
             
             query = clean_place
             if country_hint and country_hint.lower() not in place_lower:
@@ -154,16 +195,32 @@ class GeocodingClient:
             
             logger.info(f"Geocoding '{place_name}' -> {location.get('display_name', 'Unknown')} ({location.get('lat')}, {location.get('lon')})")
             
-            return LocationResponse(
+            # Nominatim's boundingbox is [south, north, west, east] as strings
+            bounding_box = None
+            raw_box = location.get("boundingbox")
+            if raw_box and len(raw_box) == 4:
+                south, north, west, east = (float(value) for value in raw_box)
+                bounding_box = [south, west, north, east]
+            
+            result = LocationResponse(
                 latitude=float(location["lat"]),
                 longitude=float(location["lon"]),
                 display_name=location.get("display_name", place_name),
-                place_id=int(location.get("place_id", 0))
+                place_id=int(location.get("place_id", 0)),
+                place_type=classify_place_type(location.get("addresstype"), location.get("class"), location.get("type")),
+                bounding_box=bounding_box,
+                source="nominatim"
             )
+            
+            if self.cache is not None:
+                await self.cache.set(cache_key, result)
+            
+            return result
         except Exception as e:
             logger.error(f"Error getting coordinates for '{place_name}': {e}")
             return None
     
     async def close(self):
-        await self.client.aclose()
+        if self._owns_client:
+            await self.client.aclose()
 
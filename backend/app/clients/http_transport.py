@@ -0,0 +1,226 @@
+"""
+Shared HTTP transport for the upstream APIs (Nominatim, Open-Meteo, Overpass).
+
+One pooled httpx client per upstream host, created in the app lifespan and
+injected into the API clients, so connections (and their DNS lookups and
+TLS handshakes) are reused across requests instead of being opened per
+client with httpx's short default keep-alive. Connections are opened at
+startup (prewarm) and optionally re-opened when a host's pool has gone
+idle, and each host's pool usage is counted for GET /upstream/stats.
+"""
+
+import asyncio
+import importlib.util
+from typing import Any, Dict, NamedTuple, Optional
+from urllib.parse import urlsplit
+import httpx
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class _CountingTransport(httpx.AsyncHTTPTransport):
+    """AsyncHTTPTransport that counts requests and new connections for one host"""
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.requests = 0
+        self.errors = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        # httpcore reports connection setup through the "trace" extension
+        outer_trace = request.extensions.get("trace")
+        
+        async def trace(event_name: str, info: Dict[str, Any]):
+            if event_name == "connection.connect_tcp.complete":
+                self.connections_opened += 1
+            elif event_name == "connection.start_tls.complete":
+                self.tls_handshakes += 1
+            if outer_trace is not None:
+                await outer_trace(event_name, info)
+        
+        request.extensions = {**request.extensions, "trace": trace}
+        self.requests += 1
+        try:
+            return await super().handle_async_request(request)
+        except Exception:
+            self.errors += 1
+            raise
+    
+    def pool_stats(self) -> Dict[str, Optional[int]]:
+        # The connection pool is httpcore internals; report unknown (None)
+        # counts rather than fail if a release changes them
+        connections = getattr(getattr(self, "_pool", None), "connections", None)
+        try:
+            idle = sum(1 for connection in connections if connection.is_idle())
+            return {"open": len(connections), "idle": idle, "active": len(connections) - idle}
+        except (AttributeError, TypeError):
+            return {"open": None, "idle": None, "active": None}
+
+
+class _Host(NamedTuple):
+    client: httpx.AsyncClient
+    transport: _CountingTransport
+    # URL requested to prewarm the host
+    url: str
+    # Whether the keep-warm task re-opens the host's connections
+    keep_warm: bool
+
+
+class UpstreamTransport:
+    """
+    Per-host pooled httpx clients shared by the upstream API clients
+    
+    Every host gets its own connection pool with max_connections_per_host
+    connections, of which up to max_keepalive_per_host are kept open for
+    keepalive_expiry seconds after use. Keep the two equal unless memory is
+    tight: connections above the keep-alive limit are closed as soon as they
+    go idle, even while other requests are queued, so bursts churn sockets.
+    HTTP/2 is used when requested and the h2 package is installed.
+    
+    Usage:
+        upstream = UpstreamTransport(user_agent="TourismAI/1.0")
+        client = upstream.client_for("https://api.open-meteo.com/v1/forecast", timeout=10.0)
+        upstream.start_prewarm()
+        ...
+        await upstream.close()
+    """
+    
+    def __init__(
+        self,
+        max_connections_per_host: int = 20,
+        max_keepalive_per_host: int = 20,
+        keepalive_expiry: float = 60.0,
+        http2: bool = False,
+        user_agent: Optional[str] = None
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max(1, max_connections_per_host),
+            max_keepalive_connections=max(0, min(max_keepalive_per_host, max_connections_per_host)),
+            keepalive_expiry=keepalive_expiry
+        )
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP/2 requested for upstream APIs but the h2 package is not installed, using HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self.headers = {"User-Agent": user_agent} if user_agent else {}
+        self._hosts: Dict[str, _Host] = {}
+        self._prewarm_task: Optional[asyncio.Task] = None
+    
+    @staticmethod
+    def _host_key(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+    
+    def client_for(self, base_url: str, timeout: float = 10.0, keep_warm: bool = True) -> httpx.AsyncClient:
+        """
+        Shared client for the host of base_url
+        
+        Args:
+            base_url: Any URL on the upstream host
+            timeout: Request timeout of the client; the first caller for a host sets it
+            keep_warm: Let prewarm and keep-warm send requests to the host (off
+                for APIs whose usage policy asks for no unsolicited requests);
+                the first caller for a host sets it
+        
+        Returns:
+            httpx.AsyncClient owned by this transport (do not close it)
+        """
+        key = self._host_key(base_url)
+        if key not in self._hosts:
+            transport = _CountingTransport(limits=self.limits, http2=self.http2)
+            client = httpx.AsyncClient(transport=transport, timeout=timeout, headers=self.headers)
+            self._hosts[key] = _Host(client, transport, base_url, keep_warm)
+        return self._hosts[key].client
+    
+    async def prewarm(self, timeout: float = 5.0, idle_only: bool = False) -> Dict[str, bool]:
+        """
+        Open a connection to every keep_warm host (DNS, TCP and TLS) with a HEAD request
+        
+        The response status does not matter; the connection is returned to
+        the pool and reused by the next request to that host.
+        
+        Args:
+            timeout: Per-host timeout
+            idle_only: Only warm hosts that have no open connection left
+                (hosts whose pool cannot be inspected are skipped)
+        
+        Returns:
+            Host -> whether a connection was established
+        """
+        hosts = {
+            key: host for key, host in self._hosts.items()
+            if host.keep_warm and (not idle_only or host.transport.pool_stats()["open"] == 0)
+        }
+        
+        async def warm(client: httpx.AsyncClient, url: str) -> bool:
+            try:
+                await client.head(url, timeout=timeout)
+                return True
+            except Exception as e:
+                logger.warning(f"Could not prewarm connection to {url}: {e}")
+                return False
+        
+        results = await asyncio.gather(*(warm(host.client, host.url) for host in hosts.values()))
+        warmed = dict(zip(hosts, results))
+        if warmed:
+            logger.info(f"Prewarmed upstream connections: {', '.join(host for host, ok in warmed.items() if ok) or 'none'}")
+        return warmed
+    
+    def start_prewarm(self, interval_seconds: float = 0, timeout: float = 5.0):
+        """
+        Prewarm every keep_warm host in the background, then every
+        interval_seconds re-open connections to those whose pool has gone
+        empty (0 = once)
+        """
+        if self._prewarm_task is None or self._prewarm_task.done():
+            self._prewarm_task = asyncio.create_task(self._keep_warm(interval_seconds, timeout))
+    
+    async def _keep_warm(self, interval_seconds: float, timeout: float):
+        await self.prewarm(timeout=timeout)
+        while interval_seconds > 0:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.prewarm(timeout=timeout, idle_only=True)
+            except Exception as e:
+                logger.error(f"Upstream keep-warm failed: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-host pool usage: open/idle/active connections and connection reuse"""
+        hosts = {}
+        for key, host in self._hosts.items():
+            transport = host.transport
+            completed = transport.requests - transport.errors
+            reused = max(completed - transport.connections_opened, 0)
+            hosts[key] = {
+                **transport.pool_stats(),
+                "requests": transport.requests,
+                "errors": transport.errors,
+                "connections_opened": transport.connections_opened,
+                "tls_handshakes": transport.tls_handshakes,
+                "keep_warm": host.keep_warm,
+                # Share of answered requests served on an already open connection
+                "connection_reuse": round(reused / completed, 3) if completed else None
+            }
+        return {
+            "http2": self.http2,
+            "max_connections_per_host": self.limits.max_connections,
+            "max_keepalive_per_host": self.limits.max_keepalive_connections,
+            "keepalive_expiry_seconds": self.limits.keepalive_expiry,
+            "hosts": hosts
+        }
+    
+    async def close(self):
+        """Stop the keep-warm task and close every host's connections"""
+        if self._prewarm_task is not None:
+            self._prewarm_task.cancel()
+            try:
+                await self._prewarm_task
+            except asyncio.CancelledError:
+                pass
+            self._prewarm_task = None
+        for host in self._hosts.values():
+            await host.client.aclose()
+        self._hosts.clear()
@@ -0,0 +1,194 @@
+"""
+Offline places backend.
+
+Answers tourist place lookups from a local POI index built from an OSM
+extract with build_poi_index.py, falling back to Overpass when the index
+has nothing for a location. Searches follow the same plan (areas tried in
+order until enough places are found) and ranking as the Overpass client.
+"""
+
+import json
+import math
+import asyncio
+import aiosqlite
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence
+from app.models.schemas import PlaceInfo
+from app.clients.overpass_planner import SearchPlan, SearchStep, plan_search
+from app.clients.places_client import PlacesClient, place_type_from_tags
+from app.clients.places_ranking import Candidate, rank_candidates, select_candidates
+from app.utils.geo import haversine_km_array
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Size of the grid cells (in degrees) the index is bucketed by
+CELL_DEGREES = 0.1
+
+POI_INDEX_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS pois (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        osm_type TEXT,
+        osm_id INTEGER,
+        name TEXT NOT NULL,
+        type TEXT,
+        description TEXT,
+        latitude REAL NOT NULL,
+        longitude REAL NOT NULL,
+        cell_lat INTEGER NOT NULL,
+        cell_lon INTEGER NOT NULL,
+        -- JSON object of the CANDIDATE_TAGS used for ranking
+        tags TEXT
+    )""",
+    """CREATE INDEX IF NOT EXISTS idx_pois_cell
+       ON pois(cell_lat, cell_lon, latitude, longitude)""",
+]
+
+
+def grid_cell(latitude: float, longitude: float) -> tuple:
+    """Grid cell (cell_lat, cell_lon) containing the coordinates"""
+    return math.floor(latitude / CELL_DEGREES), math.floor(longitude / CELL_DEGREES)
+
+
+def _in_step(step: SearchStep, elements: List[Dict[str, Any]], distances: np.ndarray) -> np.ndarray:
+    # Mask of the elements inside a search step's circle or box
+    if step.bounding_box is not None:
+        south, west, north, east = step.bounding_box
+        latitudes = np.array([element["lat"] for element in elements])
+        longitudes = np.array([element["lon"] for element in elements])
+        return (latitudes >= south) & (latitudes <= north) & (longitudes >= west) & (longitudes <= east)
+    return distances <= step.radius_m / 1000
+
+
+class OfflinePlacesClient:
+    def __init__(
+        self,
+        index_path: str,
+        fallback: Optional[PlacesClient] = None,
+        max_candidates: int = 30
+    ):
+        self.index_path = index_path
+        self.fallback = fallback
+        # Places kept per location, as in PlacesClient
+        self.max_candidates = max_candidates
+        self.db: Optional[aiosqlite.Connection] = None
+        self._connect_lock = asyncio.Lock()
+    
+    async def _connection(self) -> aiosqlite.Connection:
+        async with self._connect_lock:
+            if self.db is None:
+                self.db = await aiosqlite.connect(f"file:{self.index_path}?mode=ro", uri=True)
+        return self.db
+    
+    async def _load_elements(self, latitude: float, longitude: float, radius_km: float) -> List[Dict[str, Any]]:
+        # Indexed POIs in the square around the location, as Overpass-style elements
+        lat_delta = radius_km / 111.32
+        lon_delta = radius_km / (111.32 * max(math.cos(math.radians(latitude)), 0.01))
+        min_cell_lat, min_cell_lon = grid_cell(latitude - lat_delta, longitude - lon_delta)
+        max_cell_lat, max_cell_lon = grid_cell(latitude + lat_delta, longitude + lon_delta)
+        
+        db = await self._connection()
+        cursor = await db.execute(
+            """SELECT name, description, latitude, longitude, tags
+               FROM pois
+               WHERE cell_lat BETWEEN ? AND ?
+                 AND cell_lon BETWEEN ? AND ?
+                 AND latitude BETWEEN ? AND ?
+                 AND longitude BETWEEN ? AND ?
+               ORDER BY id""",
+            (
+                min_cell_lat, max_cell_lat,
+                min_cell_lon, max_cell_lon,
+                latitude - lat_delta, latitude + lat_delta,
+                longitude - lon_delta, longitude + lon_delta
+            )
+        )
+        rows = await cursor.fetchall()
+        
+        elements = []
+        for name, description, poi_lat, poi_lon, tags_json in rows:
+            tags = json.loads(tags_json) if tags_json else {}
+            tags["name"] = name
+            if description and "description" not in tags:
+                tags["description"] = description
+            elements.append({"lat": poi_lat, "lon": poi_lon, "tags": tags})
+        return elements
+    
+    async def _query_index(self, latitude: float, longitude: float, plan: SearchPlan) -> List[PlaceInfo]:
+        # Runs the plan's steps over the index: each step adds the places in
+        # its area, until plan.min_results are found; then ranks them like
+        # PlacesClient does
+        elements = await self._load_elements(latitude, longitude, plan.max_distance_km)
+        if not elements:
+            return []
+        
+        distances = haversine_km_array(
+            latitude, longitude,
+            np.array([element["lat"] for element in elements]),
+            np.array([element["lon"] for element in elements])
+        )
+        taken = np.zeros(len(elements), dtype=bool)
+        candidates: List[Candidate] = []
+        seen_names = set()
+        for step in plan.steps:
+            selected = _in_step(step, elements, distances) & ~taken
+            taken |= selected
+            step_elements = [elements[index] for index in np.flatnonzero(selected).tolist()]
+            candidates.extend(select_candidates(step_elements, latitude, longitude, plan.max_distance_km, seen_names))
+            if len(candidates) >= plan.min_results:
+                break
+        
+        return [
+            PlaceInfo(name=candidate.name, type=place_type_from_tags(candidate.tags), description=candidate.tags.get("description"))
+            for candidate in rank_candidates(candidates, plan.max_distance_km, top_k=self.max_candidates)
+        ]
+    
+    async def get_tourist_places(
+        self,
+        latitude: float,
+        longitude: float,
+        place_name: str,
+        limit: int = 5,
+        offset: int = 0,
+        place_type: Optional[str] = None,
+        bounding_box: Optional[Sequence[float]] = None
+    ) -> List[PlaceInfo]:
+        if offset < 0:
+            raise ValueError(f"offset must be non-negative, got {offset}")
+        
+        try:
+            plan = plan_search(latitude, longitude, place_type, bounding_box)
+            places = await self._query_index(latitude, longitude, plan)
+        except Exception as e:
+            logger.error(f"POI index error for '{place_name}': {type(e).__name__}: {str(e)}")
+            places = []
+        
+        if places:
+            logger.info(f"Found {len(places)} places for '{place_name}' in the offline index")
+            return places[offset:offset + limit]
+        
+        if self.fallback is None:
+            logger.warning(f"No places in the offline index near ({latitude}, {longitude}) for '{place_name}'")
+            return []
+        
+        logger.info(f"No offline places for '{place_name}', falling back to Overpass")
+        return await self.fallback.get_tourist_places(
+            latitude,
+            longitude,
+            place_name,
+            limit=limit,
+            offset=offset,
+            place_type=place_type,
+            bounding_box=bounding_box
+        )
+    
+    async def close(self):
+        if self.db is not None:
+            await self.db.close()
+            self.db = None
+        if self.fallback is not None:
+            await self.fallback.close()
@@ -0,0 +1,187 @@
+"""
+Overpass mirror selection and hedging.
+
+Public Overpass instances have long tail latencies and shed load with
+429/504 responses. PlacesClient can spread a query over several mirrors:
+each mirror's health is tracked from the outcome of its queries, the
+healthiest is tried first, and if it has not answered within its usual
+(percentile) response time, the same query is sent to the next mirror and
+the first complete answer is used.
+"""
+
+import math
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+import httpx
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Samples needed before a mirror's own percentile replaces the initial hedge delay
+MIN_LATENCY_SAMPLES = 5
+# Weight of the newest sample in the latency and failure averages
+EWMA_ALPHA = 0.2
+# Failures are forgotten with this half-life, so a penalised mirror is tried again
+FAILURE_HALF_LIFE_SECONDS = 300
+# Cooldown after a failure, doubled per consecutive failure up to the maximum
+COOLDOWN_SECONDS = 10
+MAX_COOLDOWN_SECONDS = 300
+
+
+class OverpassError(Exception):
+    """A failed Overpass query; retryable errors move on to the next mirror"""
+    
+    def __init__(self, message: str, retry_after: Optional[float] = None, retryable: bool = True):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.retryable = retryable
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header given in seconds (HTTP dates are ignored)"""
+    try:
+        return max(float(value), 0.0) if value else None
+    except ValueError:
+        return None
+
+
+class OverpassMirror:
+    """One Overpass endpoint, the client used to reach it and its health"""
+    
+    def __init__(self, url: str, client: httpx.AsyncClient, window: int = 50):
+        self.url = url
+        self.host = urlsplit(url).netloc or url
+        self.client = client
+        # Durations of recent successful queries, in seconds
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.latency_ewma: Optional[float] = None
+        self._failure_rate = 0.0
+        self._failure_time = 0.0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.cancelled = 0
+        self.hedges = 0
+    
+    def failure_rate(self, now: Optional[float] = None) -> float:
+        """Decayed average of recent failures, from 0 to 1"""
+        elapsed = (now or time.monotonic()) - self._failure_time
+        return self._failure_rate * 0.5 ** (elapsed / FAILURE_HALF_LIFE_SECONDS)
+    
+    def _update_failure_rate(self, failed: bool, now: float):
+        self._failure_rate = (1 - EWMA_ALPHA) * self.failure_rate(now) + EWMA_ALPHA * failed
+        self._failure_time = now
+    
+    def _update_latency(self, seconds: float):
+        if self.latency_ewma is None:
+            self.latency_ewma = seconds
+        else:
+            self.latency_ewma = (1 - EWMA_ALPHA) * self.latency_ewma + EWMA_ALPHA * seconds
+
+
+class OverpassMirrors:
+    """
+    Health-ranked Overpass endpoints and the hedge delay for each
+    
+    A mirror's score is its average response time, inflated by its recent
+    failure rate; mirrors cooling down after a failure (longer after a 429
+    with Retry-After) go last. The hedge delay for a mirror is the given
+    percentile of its recent response times, clamped to
+    [min_delay, max_delay]; initial_delay is used until enough samples exist.
+    
+    Usage:
+        mirrors = OverpassMirrors([(url, client) for url in urls])
+        for mirror in mirrors.ranked(): ...
+        mirrors.record_success(mirror, seconds)
+    """
+    
+    def __init__(
+        self,
+        mirrors: Sequence[Tuple[str, httpx.AsyncClient]],
+        hedging: bool = True,
+        hedge_percentile: float = 90,
+        initial_delay: float = 4.0,
+        min_delay: float = 1.0,
+        max_delay: float = 15.0,
+        window: int = 50
+    ):
+        if not mirrors:
+            raise ValueError("At least one Overpass endpoint is required")
+        
+        self.mirrors = [OverpassMirror(url, client, window) for url, client in mirrors]
+        self.hedging = hedging and len(self.mirrors) > 1
+        self.hedge_percentile = min(max(hedge_percentile, 1.0), 100.0)
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max(max_delay, min_delay)
+    
+    def ranked(self) -> List[OverpassMirror]:
+        """Mirrors to try, healthiest first; ties keep the configured order"""
+        now = time.monotonic()
+        
+        def score(mirror: OverpassMirror) -> Tuple[bool, float]:
+            latency = mirror.latency_ewma if mirror.latency_ewma is not None else self.initial_delay
+            return mirror.cooldown_until > now, latency * (1 + 4 * mirror.failure_rate(now))
+        
+        return sorted(self.mirrors, key=score)
+    
+    def hedge_delay(self, mirror: OverpassMirror) -> Optional[float]:
+        """Seconds to wait for a mirror before hedging to the next one (None = never)"""
+        if not self.hedging:
+            return None
+        if len(mirror.latencies) < MIN_LATENCY_SAMPLES:
+            delay = self.initial_delay
+        else:
+            samples = sorted(mirror.latencies)
+            delay = samples[max(math.ceil(self.hedge_percentile / 100 * len(samples)) - 1, 0)]
+        return min(max(delay, self.min_delay), self.max_delay)
+    
+    def record_success(self, mirror: OverpassMirror, seconds: float):
+        mirror.successes += 1
+        mirror.latencies.append(seconds)
+        mirror._update_latency(seconds)
+        mirror._update_failure_rate(False, time.monotonic())
+        mirror.consecutive_failures = 0
+        mirror.cooldown_until = 0.0
+    
+    def record_failure(self, mirror: OverpassMirror, retry_after: Optional[float] = None):
+        now = time.monotonic()
+        mirror.failures += 1
+        mirror._update_failure_rate(True, now)
+        mirror.consecutive_failures += 1
+        cooldown = min(COOLDOWN_SECONDS * 2 ** (mirror.consecutive_failures - 1), MAX_COOLDOWN_SECONDS)
+        mirror.cooldown_until = now + max(cooldown, min(retry_after or 0.0, MAX_COOLDOWN_SECONDS))
+    
+    def record_cancelled(self, mirror: OverpassMirror, seconds: float):
+        # A cancelled query took at least `seconds`; only evidence of being
+        # slower than the average is kept, a short lower bound says nothing
+        mirror.cancelled += 1
+        if mirror.latency_ewma is None or seconds > mirror.latency_ewma:
+            mirror._update_latency(seconds)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "hedging": self.hedging,
+            "hedge_percentile": self.hedge_percentile,
+            "mirrors": [
+                {
+                    "url": mirror.url,
+                    "requests": mirror.requests,
+                    "successes": mirror.successes,
+                    "failures": mirror.failures,
+                    "cancelled": mirror.cancelled,
+                    "hedges": mirror.hedges,
+                    "avg_latency_seconds": round(mirror.latency_ewma, 3) if mirror.latency_ewma is not None else None,
+                    "failure_rate": round(mirror.failure_rate(now), 3),
+                    "cooldown_seconds": round(max(mirror.cooldown_until - now, 0.0), 1),
+                    "hedge_delay_seconds": self.hedge_delay(mirror)
+                }
+                for mirror in self.ranked()
+            ]
+        }
@@ -0,0 +1,140 @@
+"""
+Search planning for Overpass place lookups.
+
+Picks the search areas for a location from its place type: a landmark is
+searched in a small circle, a city in a wider one. Each plan is a short
+series of growing areas; the client stops at the first one that yields
+enough named places, so dense centres are answered by a cheap query and
+the widest search only runs where places are sparse.
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+from app.utils.geo import haversine_km
+
+# Nominatim addresstype/type -> search profile
+PLACE_TYPE_ALIASES = {
+    "city": "city", "municipality": "city", "borough": "city",
+    "town": "town", "suburb": "town", "city_district": "town", "district": "town", "quarter": "town",
+    "village": "village", "hamlet": "village", "neighbourhood": "village", "isolated_dwelling": "village",
+    "state": "region", "province": "region", "region": "region", "state_district": "region",
+    "county": "region", "country": "region", "island": "region", "archipelago": "region",
+}
+# Nominatim classes of single features (a monument, a park, a museum...)
+LANDMARK_CLASSES = frozenset({
+    "tourism", "historic", "leisure", "amenity", "building", "man_made", "natural", "waterway", "aeroway"
+})
+
+
+@dataclass(frozen=True)
+class SearchProfile:
+    """Search radii (metres, in the order tried) and the named places wanted before stopping"""
+    radii: Tuple[int, ...]
+    min_results: int
+    # Minimum geohash precision of the cache key, so one cached search only
+    # serves locations its first radius would also cover (None = client default)
+    cache_precision: Optional[int] = None
+
+
+SEARCH_PROFILES = {
+    # Geohash 6 cells are ~1.2 x 0.6 km, 5 cells ~4.9 x 4.9 km
+    "landmark": SearchProfile((1000, 3000, 8000), 5, cache_precision=6),
+    "village": SearchProfile((2000, 6000, 15000), 5, cache_precision=5),
+    "town": SearchProfile((3000, 8000, 20000), 8, cache_precision=5),
+    "city": SearchProfile((5000, 12000, 25000), 10),
+    "region": SearchProfile((10000, 25000, 50000), 10),
+}
+# Unknown place types (e.g. coordinates cached before types were recorded)
+DEFAULT_PROFILE = "city"
+
+
+@dataclass(frozen=True)
+class SearchStep:
+    """One Overpass search area: an (around:...) circle or a (south,west,north,east) box"""
+    label: str
+    area: str
+    # The same area as numbers, for searches that do not go through Overpass
+    radius_m: Optional[int] = None
+    bounding_box: Optional[Tuple[float, float, float, float]] = None
+
+
+@dataclass(frozen=True)
+class SearchPlan:
+    """Search areas for one location, tried in order until min_results named places are found"""
+    profile: str
+    steps: Tuple[SearchStep, ...]
+    min_results: int
+    # Elements further than this from the location are discarded
+    max_distance_km: float
+    # See SearchProfile.cache_precision
+    cache_precision: Optional[int] = None
+
+
+def classify_place_type(
+    address_type: Optional[str] = None,
+    osm_class: Optional[str] = None,
+    osm_type: Optional[str] = None
+) -> Optional[str]:
+    """
+    Map a Nominatim result to a search profile name
+    
+    Args:
+        address_type: Nominatim "addresstype" (e.g. "city", "suburb")
+        osm_class: Nominatim "class" (e.g. "place", "tourism", "boundary")
+        osm_type: Nominatim "type" (e.g. "town", "museum", "administrative")
+    
+    Returns:
+        One of SEARCH_PROFILES, or None if the result says nothing useful
+    """
+    for value in (address_type, osm_type):
+        if value and value in PLACE_TYPE_ALIASES:
+            return PLACE_TYPE_ALIASES[value]
+    if osm_class in LANDMARK_CLASSES:
+        return "landmark"
+    return None
+
+
+def plan_search(
+    latitude: float,
+    longitude: float,
+    place_type: Optional[str] = None,
+    bounding_box: Optional[Sequence[float]] = None
+) -> SearchPlan:
+    """
+    Build the search plan for a location
+    
+    When the geocoder's bounding box (south, west, north, east) is larger
+    than the first search circle but smaller than the last, the box is
+    searched first, in place of the circles it covers.
+    
+    Args:
+        latitude: Latitude of the location
+        longitude: Longitude of the location
+        place_type: Search profile name (see classify_place_type)
+        bounding_box: Extent of the place as (south, west, north, east)
+    
+    Returns:
+        SearchPlan with the areas to try, smallest first
+    """
+    profile_name = place_type if place_type in SEARCH_PROFILES else DEFAULT_PROFILE
+    profile = SEARCH_PROFILES[profile_name]
+    radii = list(profile.radii)
+    steps: List[SearchStep] = []
+    
+    if bounding_box and len(bounding_box) == 4:
+        south, west, north, east = bounding_box
+        half_diagonal_m = haversine_km(south, west, north, east) * 500
+        if radii[0] <= half_diagonal_m < radii[-1]:
+            steps.append(SearchStep("bbox", f"({south},{west},{north},{east})", bounding_box=(south, west, north, east)))
+            radii = [radius for radius in radii if radius > half_diagonal_m]
+    
+    for radius in radii:
+        steps.append(SearchStep(f"{radius / 1000:g} km", f"(around:{radius},{latitude},{longitude})", radius_m=radius))
+    
+    return SearchPlan(
+        profile=profile_name,
+        steps=tuple(steps),
+        min_results=profile.min_results,
+        max_distance_km=profile.radii[-1] / 1000 * 1.2,
+        cache_precision=profile.cache_precision
+    )
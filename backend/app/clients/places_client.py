@@ -1,131 +1,329 @@
+import re
+import time
+import asyncio
 import httpx
-from typing import List
+from typing import Any, List, Optional, Dict, Sequence, Set, Tuple
 from app.models.schemas import PlaceInfo
+from app.clients.overpass_mirrors import OverpassError, OverpassMirror, OverpassMirrors, parse_retry_after
+from app.clients.overpass_planner import SearchPlan, plan_search
+from app.clients.places_ranking import Candidate, rank_candidates, select_candidates
 from app.utils.logger import setup_logger
 from app.utils.cache import places_cache
+from app.utils.geo import spatial_key
+from app.utils.json_stream import JSONArrayStream
 
 logger = setup_logger(__name__)
 
+# Elements requested per Overpass query, per place kept: Overpass returns
+# elements in id order, so ranking only has a choice if it sees more
+# candidates than it keeps
+FETCH_FACTOR = 3
+
+# Tag filters for tourist places, shared by the Overpass query and the offline
+# POI index. Values are Overpass regexes (unanchored); None matches any value.
+TOURIST_TAG_FILTERS = [
+    ("tourism", "attraction|museum|gallery|zoo|theme_park|viewpoint|information|artwork"),  # Tourism attractions - highest priority
+    ("historic", None),  # Historic sites
+    ("leisure", "park|garden|nature_reserve|stadium|sports_centre"),  # Leisure/Parks
+    ("amenity", "place_of_worship"),  # Religious places
+]
+
+
+def matches_tourist_filters(tags: Dict[str, str]) -> bool:
+    """Check OSM tags against TOURIST_TAG_FILTERS the way Overpass would"""
+    for key, pattern in TOURIST_TAG_FILTERS:
+        value = tags.get(key)
+        if value is None:
+            continue
+        if pattern is None or re.search(pattern, value):
+            return True
+    return False
+
+
+def place_type_from_tags(tags: Dict[str, str]) -> str:
+    """Human readable place type, e.g. "Theme Park", from OSM tags"""
+    place_type = (
+        tags.get("tourism") or 
+        tags.get("historic") or 
+        tags.get("leisure") or 
+        tags.get("amenity") or 
+        tags.get("place") or
+        "attraction"
+    )
+    if place_type and isinstance(place_type, str):
+        place_type = place_type.replace("_", " ").title()
+    return place_type
+
 
 class PlacesClient:
-    def __init__(self, base_url: str = "https://overpass-api.de/api/interpreter"):
+    def __init__(
+        self,
+        base_url: str = "https://overpass-api.de/api/interpreter",
+        cache_precision: int = 4,
+        max_candidates: int = 30,
+        http_client: Optional[httpx.AsyncClient] = None,
+        mirrors: Optional[OverpassMirrors] = None
+    ):
         self.base_url = base_url
-        self.client = httpx.AsyncClient(timeout=45.0)
+        # Geohash precision for cache keys (4 ~ 39 x 20 km cells, matching the
+        # widest city search radius; 0 = exact coordinates). Profiles with
+        # smaller radii raise it (SearchProfile.cache_precision)
+        self.cache_precision = cache_precision
+        # Places kept per location, the best ranked of up to fetch_limit
+        # candidates (also the "out" limit of each Overpass query)
+        self.max_candidates = max_candidates
+        self.fetch_limit = max_candidates * FETCH_FACTOR
+        # A shared client (see UpstreamTransport) is closed by its owner
+        self._owns_client = http_client is None
+        self.client = http_client or httpx.AsyncClient(timeout=45.0)
+        # Endpoints queries are sent to (base_url alone unless mirrors are given)
+        self.mirrors = mirrors or OverpassMirrors([(base_url, self.client)])
     
-    def _build_overpass_query(self, latitude: float, longitude: float, radius: int = 25000, limit: int = 30) -> str:
-        query = f"""[out:json][timeout:30];
-(
-  // Tourism attractions - highest priority
-  node["tourism"~"attraction|museum|gallery|zoo|theme_park|viewpoint|information|artwork"](around:{radius},{latitude},{longitude});
-  way["tourism"~"attraction|museum|gallery|zoo|theme_park|viewpoint|information|artwork"](around:{radius},{latitude},{longitude});
-  relation["tourism"~"attraction|museum|gallery|zoo|theme_park|viewpoint|information|artwork"](around:{radius},{latitude},{longitude});
-  
-  // Historic sites
-  node["historic"](around:{radius},{latitude},{longitude});
-  way["historic"](around:{radius},{latitude},{longitude});
-  relation["historic"](around:{radius},{latitude},{longitude});
-  
-  // Leisure/Parks
-  node["leisure"~"park|garden|nature_reserve|stadium|sports_centre"](around:{radius},{latitude},{longitude});
-  way["leisure"~"park|garden|nature_reserve|stadium|sports_centre"](around:{radius},{latitude},{longitude});
-  relation["leisure"~"park|garden|nature_reserve|stadium|sports_centre"](around:{radius},{latitude},{longitude});
-  
-  // Religious places
-  node["amenity"~"place_of_worship"](around:{radius},{latitude},{longitude});
-  way["amenity"~"place_of_worship"](around:{radius},{latitude},{longitude});
-  relation["amenity"~"place_of_worship"](around:{radius},{latitude},{longitude});
-);
-out center {limit};"""
+    def _build_overpass_query(self, area: str, limit: int = 30) -> str:
+        # One nwr clause per tag filter; unnamed elements are dropped by the
+        # server, and "out tags center" leaves out node lists and members
+        clauses = []
+        for key, pattern in TOURIST_TAG_FILTERS:
+            tag_filter = f'["{key}"~"{pattern}"]' if pattern else f'["{key}"]'
+            clauses.append(f'  nwr{tag_filter}["name"]{area};')
+        
+        query = "[out:json][timeout:30];\n(\n" + "\n".join(clauses) + f"\n);\nout tags center {limit};"
         return query
     
-    async def get_tourist_places(self, latitude: float, longitude: float, place_name: str, limit: int = 5) -> List[PlaceInfo]:
-        # Check cache first (1 hour TTL)
-        cache_key = f"places:{latitude}:{longitude}:{limit}"
-        cached_result = places_cache.get(cache_key)
-        if cached_result is not None:
-            logger.debug(f"Using cached places data for {place_name}")
-            return cached_result
+    async def get_tourist_places(
+        self,
+        latitude: float,
+        longitude: float,
+        place_name: str,
+        limit: int = 5,
+        offset: int = 0,
+        place_type: Optional[str] = None,
+        bounding_box: Optional[Sequence[float]] = None
+    ) -> List[PlaceInfo]:
+        if offset < 0:
+            raise ValueError(f"offset must be non-negative, got {offset}")
         
-        try:
-            logger.info(f"Fetching places near coordinates ({latitude}, {longitude}) for '{place_name}'")
-            query = self._build_overpass_query(latitude, longitude, limit=30)
-            response = await self.client.post(self.base_url, content=query, headers={"Content-Type": "text/plain"})
-            
-            if response.status_code != 200:
-                logger.error(f"Places API error: HTTP {response.status_code} - {response.text[:200]}")
-                return []
-            
-            data = response.json()
-            
-            if "remark" in data and "error" in data.get("remark", "").lower():
-                logger.error(f"Places API error: {data.get('remark')}")
-                return []
-            
-            elements = data.get("elements", [])
-            
-            if not elements:
-                logger.warning(f"No places found near ({latitude}, {longitude}) for '{place_name}'")
-                return []
-            
-            places = []
-            seen_names = set()
+        # The full candidate list is cached once per location and search
+        # profile (1 hour TTL) and sliced per request; concurrent misses
+        # share one Overpass search
+        plan = plan_search(latitude, longitude, place_type, bounding_box)
+        cache_key = self._cache_key(latitude, longitude, plan)
+        candidates = await places_cache.get_or_load(
+            cache_key,
+            lambda: self._fetch_places(latitude, longitude, place_name, plan),
+            ttl_seconds=3600
+        )
+        if not candidates:
+            return []
+        
+        places = candidates[offset:offset + limit]
+        logger.info(f"Returning {len(places)} of {len(candidates)} places for '{place_name}' (limit {limit}, offset {offset})")
+        return places
+    
+    def _cache_key(self, latitude: float, longitude: float, plan: SearchPlan) -> str:
+        # Small search areas get finer cells than the configured precision:
+        # candidates are distance-filtered and ranked from the coordinates of
+        # the location that filled the entry, which must stay close to every
+        # location it is served to. A searched bounding box is part of the key
+        precision = self.cache_precision
+        if precision and plan.cache_precision:
+            precision = max(precision, plan.cache_precision)
+        cache_key = f"places:{plan.profile}:{spatial_key(latitude, longitude, precision)}"
+        if plan.steps and plan.steps[0].label == "bbox":
+            cache_key += f":bbox{plan.steps[0].area}"
+        return cache_key
+    
+    async def _fetch_places(
+        self,
+        latitude: float,
+        longitude: float,
+        place_name: str,
+        plan: SearchPlan
+    ) -> Optional[List[PlaceInfo]]:
+        # Returns the named, deduplicated places found by the plan's steps,
+        # best ranked first. The search stops at the first step that brings
+        # the total to plan.min_results. Returns None on upstream errors or
+        # empty results so they are not cached
+        logger.info(
+            f"Fetching places near coordinates ({latitude}, {longitude}) for '{place_name}' "
+            f"({plan.profile}: {', '.join(step.label for step in plan.steps)})"
+        )
+        candidates: List[Candidate] = []
+        seen_names = set()
+        
+        for step in plan.steps:
+            found = len(candidates)
+            elements_read = await self._search_area(
+                self._build_overpass_query(step.area, limit=self.fetch_limit),
+                place_name, latitude, longitude, plan.max_distance_km, candidates, seen_names
+            )
+            if elements_read is None:
+                break
             
-            for element in elements:
-                if len(places) >= limit:
-                    break
-                    
-                tags = element.get("tags", {})
-                name = tags.get("name")
-                
-                if not name:
-                    continue
-                
-                name_lower = name.lower().strip()
-                if name_lower in seen_names:
+            logger.info(
+                f"Overpass {step.label} search for '{place_name}': {elements_read} elements read, "
+                f"{len(candidates) - found} new places"
+            )
+            if len(candidates) >= plan.min_results:
+                break
+        
+        if not candidates:
+            logger.warning(f"No places found near ({latitude}, {longitude}) for '{place_name}'")
+            return None
+        
+        places = [
+            PlaceInfo(name=candidate.name, type=place_type_from_tags(candidate.tags), description=candidate.tags.get("description"))
+            for candidate in rank_candidates(candidates, plan.max_distance_km, top_k=self.max_candidates)
+        ]
+        logger.info(f"Found {len(places)} places for '{place_name}'")
+        return places
+    
+    async def _search_area(
+        self,
+        query: str,
+        place_name: str,
+        latitude: float,
+        longitude: float,
+        max_distance_km: float,
+        candidates: List[Candidate],
+        seen_names: set
+    ) -> Optional[int]:
+        # Runs one Overpass query on the healthiest mirror. If it has not
+        # answered within its hedge delay, the query is also sent to the
+        # next mirror; a failed query moves on to the next mirror at once.
+        # The first complete answer is used and the other query cancelled.
+        # Returns the number of elements read, or None when every mirror
+        # failed (nothing is added then)
+        waiting = self.mirrors.ranked()
+        attempts: Dict[asyncio.Task, OverpassMirror] = {}
+        
+        def launch(hedge: bool = False):
+            mirror = waiting.pop(0)
+            mirror.requests += 1
+            if hedge:
+                mirror.hedges += 1
+            task = asyncio.create_task(
+                self._query_mirror(mirror, query, latitude, longitude, max_distance_km, candidates, seen_names)
+            )
+            attempts[task] = mirror
+        
+        launch()
+        try:
+            while attempts:
+                # At most one hedge in flight next to the first query
+                delay = None
+                if waiting and len(attempts) == 1:
+                    delay = self.mirrors.hedge_delay(next(iter(attempts.values())))
+                done, _ = await asyncio.wait(attempts, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    slow = next(iter(attempts.values()))
+                    logger.info(f"Overpass {slow.host} has not answered within {delay:.1f}s, hedging to {waiting[0].host}")
+                    launch(hedge=True)
                     continue
                 
-                element_lat = element.get("lat") or (element.get("center", {}).get("lat") if "center" in element else None)
-                element_lon = element.get("lon") or (element.get("center", {}).get("lon") if "center" in element else None)
-                
-                if element_lat and element_lon:
-                    import math
-                    distance = math.sqrt((element_lat - latitude)**2 + (element_lon - longitude)**2) * 111  
-                    if distance > 30:  
-                        logger.debug(f"Place '{name}' is {distance:.1f}km away from requested location, skipping")
+                for task in done:
+                    mirror = attempts.pop(task)
+                    try:
+                        elements_read, added, added_names = task.result()
+                    except Exception as e:
+                        message = str(e) if isinstance(e, OverpassError) else f"{type(e).__name__}: {e}"
+                        logger.error(f"Places API error ({mirror.host}): {message}")
+                        if isinstance(e, OverpassError) and not e.retryable:
+                            return None
+                        if waiting and not attempts:
+                            launch()
                         continue
+                    
+                    candidates.extend(added)
+                    seen_names.update(added_names)
+                    return elements_read
+            
+            logger.error(f"Places API: no Overpass endpoint answered for {place_name}")
+            return None
+        finally:
+            for task in attempts:
+                task.cancel()
+            if attempts:
+                await asyncio.gather(*attempts, return_exceptions=True)
+    
+    async def _query_mirror(
+        self,
+        mirror: OverpassMirror,
+        query: str,
+        latitude: float,
+        longitude: float,
+        max_distance_km: float,
+        candidates: List[Candidate],
+        seen_names: Set[str]
+    ) -> Tuple[int, List[Candidate], Set[str]]:
+        # Sends the query to one mirror and collects new candidates as
+        # elements are decoded from the response stream, without touching
+        # candidates/seen_names, so only one element is held decoded at a
+        # time. The query's "out" limit already caps the response at
+        # fetch_limit elements; reading also stops once fetch_limit
+        # candidates are held in total, which only cuts a response short on
+        # a later search step or from a server ignoring the limit. Records
+        # the outcome in the mirror's health; raises on errors
+        added: List[Candidate] = []
+        added_names = set(seen_names)
+        elements_read = 0
+        started = time.monotonic()
+        
+        def needed() -> int:
+            return max(self.fetch_limit - len(candidates) - len(added), 0)
+        
+        try:
+            async with mirror.client.stream(
+                "POST", mirror.url, content=query, headers={"Content-Type": "text/plain"}
+            ) as response:
+                if response.status_code != 200:
+                    body = (await response.aread()).decode("utf-8", errors="replace")
+                    raise OverpassError(
+                        f"HTTP {response.status_code} - {body[:200]}",
+                        retry_after=parse_retry_after(response.headers.get("Retry-After")),
+                        # A rejected query is rejected by every mirror
+                        retryable=response.status_code != 400
+                    )
                 
-                seen_names.add(name_lower)
-                place_type = (
-                    tags.get("tourism") or 
-                    tags.get("historic") or 
-                    tags.get("leisure") or 
-                    tags.get("amenity") or 
-                    tags.get("place") or
-                    "attraction"
-                )
-                if place_type and isinstance(place_type, str):
-                    place_type = place_type.replace("_", " ").title()
+                stream = JSONArrayStream("elements")
+                full = False
+                async for chunk in response.aiter_text():
+                    elements = stream.feed(chunk)
+                    # Filter what each chunk completed in one vectorized pass,
+                    # in slices no larger than the remaining capacity so
+                    # reading stops right at the cap
+                    while elements and not full:
+                        batch, elements = elements[:needed()], elements[needed():]
+                        elements_read += len(batch)
+                        added.extend(select_candidates(batch, latitude, longitude, max_distance_km, added_names))
+                        full = needed() <= 0
+                    if full:
+                        logger.debug(f"Collected {self.fetch_limit} candidates, closing the Overpass response before its end")
+                        break
                 
-                places.append(PlaceInfo(name=name, type=place_type, description=tags.get("description")))
-                logger.debug(f"Added place {len(places)}/{limit}: {name} ({place_type})")
-            
-            logger.info(f"Found {len(places)} places for '{place_name}' (requested {limit})")
-            
-            # Cache the result for 1 hour (3600 seconds)
-            places_cache.set(cache_key, places, ttl_seconds=3600)
-            logger.debug(f"Cached places data for {place_name}")
-            
-            return places
+                if not full:
+                    stream.close()
+                    remark = stream.fields.get("remark")
+                    if remark and "error" in str(remark).lower():
+                        raise OverpassError(str(remark))
+        except asyncio.CancelledError:
+            self.mirrors.record_cancelled(mirror, time.monotonic() - started)
+            raise
+        except OverpassError as e:
+            if e.retryable:
+                self.mirrors.record_failure(mirror, e.retry_after)
+            raise
         except httpx.TimeoutException:
-            logger.error(f"Places API timeout for {place_name}")
-            return []
-        except httpx.HTTPStatusError as e:
-            logger.error(f"Places API HTTP error: {e.response.status_code} - {e.response.text[:200]}")
-            return []
-        except Exception as e:
-            logger.error(f"Places API error: {type(e).__name__}: {str(e)}")
-            return []
+            self.mirrors.record_failure(mirror)
+            raise OverpassError(f"timeout after {time.monotonic() - started:.1f}s")
+        except Exception:
+            self.mirrors.record_failure(mirror)
+            raise
+        
+        self.mirrors.record_success(mirror, time.monotonic() - started)
+        return elements_read, added, added_names
     
     async def close(self):
-        await self.client.aclose()
+        if self._owns_client:
+            await self.client.aclose()
 
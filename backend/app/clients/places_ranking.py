@@ -0,0 +1,172 @@
+"""
+Filtering and ranking of tourist place candidates.
+
+Overpass returns elements in id order, which says nothing about how worth
+visiting a place is. Elements are filtered by great-circle distance in one
+vectorized pass per batch, and the surviving candidates are ranked by a
+score combining distance, prominence (wiki links, heritage status, kind of
+attraction) and name quality.
+"""
+
+from itertools import chain
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+import numpy as np
+from app.utils.geo import haversine_km_array
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+NAN = float("nan")
+
+# Weight of each tag value; other values of these keys get KEY_WEIGHTS
+TYPE_WEIGHTS = {
+    ("tourism", "attraction"): 1.0, ("tourism", "museum"): 0.9, ("tourism", "zoo"): 0.8,
+    ("tourism", "theme_park"): 0.8, ("tourism", "gallery"): 0.7, ("tourism", "viewpoint"): 0.6,
+    ("tourism", "artwork"): 0.3, ("tourism", "information"): 0.1,
+    ("historic", "castle"): 0.9, ("historic", "fort"): 0.9, ("historic", "monument"): 0.8,
+    ("historic", "archaeological_site"): 0.8, ("historic", "ruins"): 0.6, ("historic", "memorial"): 0.4,
+    ("historic", "wayside_shrine"): 0.1, ("historic", "boundary_stone"): 0.05,
+    ("leisure", "nature_reserve"): 0.6, ("leisure", "park"): 0.5, ("leisure", "garden"): 0.5,
+    ("leisure", "stadium"): 0.4, ("leisure", "sports_centre"): 0.2,
+    ("amenity", "place_of_worship"): 0.4,
+}
+KEY_WEIGHTS = {"tourism": 0.5, "historic": 0.4, "leisure": 0.2, "amenity": 0.2}
+
+# Names that only say what a place is, not which one it is
+GENERIC_NAMES = frozenset({
+    "park", "garden", "temple", "church", "mosque", "museum", "memorial", "statue", "viewpoint",
+    "playground", "information", "monument", "shrine", "ruins", "fountain", "gate"
+})
+
+# Tags kept on candidates: what ranking and PlaceInfo need, not every name:xx
+CANDIDATE_TAGS = (
+    "name", "name:en", "description", "wikidata", "wikipedia", "heritage",
+    "tourism", "historic", "leisure", "amenity", "place"
+)
+
+# Score = weighted sum of per-candidate scores, each in [0, 1]
+SCORE_WEIGHTS = {"distance": 0.4, "prominence": 0.45, "name": 0.15}
+
+
+class Candidate(NamedTuple):
+    """A named place that passed the distance filter"""
+    name: str
+    # Only CANDIDATE_TAGS
+    tags: Dict[str, str]
+    # None when the element came without a position
+    distance_km: Optional[float]
+
+
+def _coordinates(element: Dict[str, Any]) -> Tuple[float, float]:
+    # Nodes carry lat/lon, ways and relations a "center" (out center)
+    if "lat" in element:
+        return element["lat"], element["lon"]
+    center = element.get("center")
+    if center:
+        return center["lat"], center["lon"]
+    return NAN, NAN
+
+
+def select_candidates(
+    elements: List[Dict[str, Any]],
+    latitude: float,
+    longitude: float,
+    max_distance_km: float,
+    seen_names: Set[str]
+) -> List[Candidate]:
+    """
+    Named, not yet seen elements within max_distance_km, in element order
+    
+    Args:
+        elements: Overpass elements
+        latitude: Latitude of the searched location
+        longitude: Longitude of the searched location
+        max_distance_km: Great-circle distance limit
+        seen_names: Lowercased names already collected; updated in place
+    
+    Returns:
+        New candidates; elements without a position are kept
+    """
+    named = [(element, element.get("tags") or {}) for element in elements]
+    named = [(element, tags) for element, tags in named if tags.get("name")]
+    if not named:
+        return []
+    
+    coordinates = np.fromiter(
+        chain.from_iterable(_coordinates(element) for element, _ in named), dtype=float, count=2 * len(named)
+    ).reshape(-1, 2)
+    distances = haversine_km_array(latitude, longitude, coordinates[:, 0], coordinates[:, 1])
+    # NaN (no position) compares False, so those elements are kept
+    within = np.flatnonzero(~(distances > max_distance_km))
+    if len(within) < len(named):
+        logger.debug(f"Skipped {len(named) - len(within)} places further than {max_distance_km:g}km from the requested location")
+    
+    candidates = []
+    for index, distance in zip(within.tolist(), distances[within].tolist()):
+        tags = named[index][1]
+        name = tags["name"]
+        name_key = name.lower().strip()
+        if name_key in seen_names:
+            continue
+        seen_names.add(name_key)
+        kept = {key: tags[key] for key in CANDIDATE_TAGS if key in tags}
+        candidates.append(Candidate(name, kept, None if distance != distance else distance))
+    return candidates
+
+
+def prominence(tags: Dict[str, str]) -> float:
+    """How notable a place is, from 0 to 1"""
+    score = 0.0
+    if "wikidata" in tags or "wikipedia" in tags:
+        score += 0.5
+    if "heritage" in tags:
+        score += 0.2
+    type_weight = 0.0
+    for key, default in KEY_WEIGHTS.items():
+        value = tags.get(key)
+        if value is not None:
+            type_weight = max(type_weight, TYPE_WEIGHTS.get((key, value), default))
+    return score + 0.3 * type_weight
+
+
+def name_quality(name: str, tags: Dict[str, str]) -> float:
+    """How useful the name is to a visitor, from 0 to 1"""
+    stripped = name.strip()
+    if len(stripped) < 4 or stripped.isdigit() or stripped.lower() in GENERIC_NAMES:
+        return 0.0
+    quality = 0.7
+    # Multi-word names are usually specific ("Lalbagh Botanical Garden")
+    if len(stripped.split()) > 1:
+        quality += 0.15
+    if "name:en" in tags:
+        quality += 0.15
+    return quality
+
+
+def rank_candidates(candidates: List[Candidate], max_distance_km: float, top_k: Optional[int] = None) -> List[Candidate]:
+    """
+    Order candidates by score, best first
+    
+    Args:
+        candidates: Candidates from select_candidates
+        max_distance_km: Distance at which the distance score reaches 0
+        top_k: Keep only this many
+    
+    Returns:
+        Ranked candidates; ties keep their original order
+    """
+    if not candidates:
+        return []
+    
+    distances = np.array(
+        [max_distance_km if c.distance_km is None else c.distance_km for c in candidates], dtype=float
+    )
+    scores = (
+        SCORE_WEIGHTS["distance"] * np.clip(1.0 - distances / max_distance_km, 0.0, 1.0)
+        + SCORE_WEIGHTS["prominence"] * np.array([prominence(c.tags) for c in candidates])
+        + SCORE_WEIGHTS["name"] * np.array([name_quality(c.name, c.tags) for c in candidates])
+    )
+    order = np.argsort(-scores, kind="stable")
+    if top_k is not None:
+        order = order[:top_k]
+    return [candidates[index] for index in order.tolist()]
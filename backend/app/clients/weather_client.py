@@ -3,23 +3,40 @@ from typing import Optional
 from app.models.schemas import WeatherResponse
 from app.utils.logger import setup_logger
 from app.utils.cache import weather_cache
+from app.utils.geo import spatial_key
 
 logger = setup_logger(__name__)
 
 
 class WeatherClient:
-    def __init__(self, base_url: str = "https://api.open-meteo.com/v1/forecast"):
+    def __init__(
+        self,
+        base_url: str = "https://api.open-meteo.com/v1/forecast",
+        cache_precision: int = 5,
+        http_client: Optional[httpx.AsyncClient] = None
+    ):
         self.base_url = base_url
-        self.client = httpx.AsyncClient(timeout=10.0)
+        # Geohash precision for cache keys (5 ~ 4.9 km cells, 0 = exact coordinates)
+        self.cache_precision = cache_precision
+        # A shared client (see UpstreamTransport) is closed by its owner
+        self._owns_client = http_client is None
+        self.client = http_client or httpx.AsyncClient(timeout=10.0)
     
     async def get_weather(self, latitude: float, longitude: float, place_name: str) -> Optional[WeatherResponse]:
-        # Check cache first (1 hour TTL)
-        cache_key = f"weather:{latitude}:{longitude}"
-        cached_result = weather_cache.get(cache_key)
-        if cached_result is not None:
-            logger.debug(f"Using cached weather data for {place_name}")
-            return cached_result
-        
+        # Check cache first (1 hour TTL); concurrent misses share one upstream call
+        cache_key = f"weather:{spatial_key(latitude, longitude, self.cache_precision)}"
+        result = await weather_cache.get_or_load(
+            cache_key,
+            lambda: self._fetch_weather(latitude, longitude, place_name),
+            ttl_seconds=3600
+        )
+        # The cell is shared by nearby places; the cached entry carries the
+        # name of the place that filled it
+        if result is not None and result.place_name != place_name:
+            result = result.model_copy(update={"place_name": place_name})
+        return result
+    
+    async def _fetch_weather(self, latitude: float, longitude: float, place_name: str) -> Optional[WeatherResponse]:
         try:
             params = {
                 "latitude": latitude,
@@ -41,15 +58,12 @@ class WeatherClient:
                 place_name=place_name
             )
             
-            # Cache the result for 1 hour (3600 seconds)
-            weather_cache.set(cache_key, result, ttl_seconds=3600)
-            logger.debug(f"Cached weather data for {place_name}")
-            
             return result
         except Exception as e:
             logger.error(f"Weather API error: {e}")
             return None
     
     async def close(self):
-        await self.client.aclose()
+        if self._owns_client:
+            await self.client.aclose()
 
@@ -19,9 +19,76 @@ class Settings(BaseSettings):
         "https://overpass-api.de/api/interpreter"
     )
     
+    # Extra Overpass endpoints (comma-separated), used for failover and hedged queries
+    overpass_mirrors: str = os.getenv("OVERPASS_MIRRORS", "")
+    # Send a duplicate query to the next mirror when the first has not answered
+    # within this percentile of its recent response times (clamped to min/max)
+    overpass_hedging: bool = os.getenv("OVERPASS_HEDGING", "True").lower() == "true"
+    overpass_hedge_percentile: float = float(os.getenv("OVERPASS_HEDGE_PERCENTILE", "90"))
+    overpass_hedge_initial_delay_seconds: float = float(os.getenv("OVERPASS_HEDGE_INITIAL_DELAY_SECONDS", "4"))
+    overpass_hedge_min_delay_seconds: float = float(os.getenv("OVERPASS_HEDGE_MIN_DELAY_SECONDS", "1"))
+    overpass_hedge_max_delay_seconds: float = float(os.getenv("OVERPASS_HEDGE_MAX_DELAY_SECONDS", "15"))
+    
+    # Places backend: "overpass" or "offline" (local POI index, Overpass as fallback)
+    places_backend: str = os.getenv("PLACES_BACKEND", "overpass")
+    poi_index_path: str = os.getenv("POI_INDEX_PATH", "./poi_index.db")
+    
     # API Configuration
     user_agent: str = os.getenv("USER_AGENT", "TourismAI/1.0")
     
+    # Shared upstream connections: one pool per API host
+    upstream_max_connections_per_host: int = int(os.getenv("UPSTREAM_MAX_CONNECTIONS_PER_HOST", "20"))
+    upstream_max_keepalive_per_host: int = int(os.getenv("UPSTREAM_MAX_KEEPALIVE_PER_HOST", "20"))
+    upstream_keepalive_expiry_seconds: float = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY_SECONDS", "60"))
+    # HTTP/2 needs the h2 package (pip install h2); without it HTTP/1.1 is used
+    upstream_http2: bool = os.getenv("UPSTREAM_HTTP2", "False").lower() == "true"
+    # Open connections at startup; then re-open them every interval once a pool is empty (0 = startup only)
+    upstream_prewarm: bool = os.getenv("UPSTREAM_PREWARM", "True").lower() == "true"
+    upstream_prewarm_interval_seconds: float = float(os.getenv("UPSTREAM_PREWARM_INTERVAL_SECONDS", "0"))
+    
+    # Agent orchestration
+    parallel_agents: bool = os.getenv("PARALLEL_AGENTS", "True").lower() == "true"
+    # Per-branch deadlines in seconds (0 disables the deadline)
+    weather_timeout_seconds: float = float(os.getenv("WEATHER_TIMEOUT_SECONDS", "8"))
+    places_timeout_seconds: float = float(os.getenv("PLACES_TIMEOUT_SECONDS", "20"))
+    
+    # POST /query/batch: max queries per request and distinct places fetched at once
+    batch_max_queries: int = int(os.getenv("BATCH_MAX_QUERIES", "50"))
+    batch_concurrency: int = int(os.getenv("BATCH_CONCURRENCY", "4"))
+    
+    # Query history is written behind the request in batches
+    history_queue_size: int = int(os.getenv("HISTORY_QUEUE_SIZE", "10000"))
+    history_batch_size: int = int(os.getenv("HISTORY_BATCH_SIZE", "200"))
+    history_flush_interval_seconds: float = float(os.getenv("HISTORY_FLUSH_INTERVAL_SECONDS", "1"))
+    # What to do when the queue is full: drop_newest, drop_oldest or block
+    history_overflow_policy: str = os.getenv("HISTORY_OVERFLOW_POLICY", "drop_newest")
+    # Retention: rows older than this many days are archived and deleted (0 keeps everything)
+    history_retention_days: int = int(os.getenv("HISTORY_RETENTION_DAYS", "0"))
+    history_archive_dir: str = os.getenv("HISTORY_ARCHIVE_DIR", "./history_archive")
+    history_archive_interval_seconds: float = float(os.getenv("HISTORY_ARCHIVE_INTERVAL_SECONDS", "3600"))
+    history_archive_batch_size: int = int(os.getenv("HISTORY_ARCHIVE_BATCH_SIZE", "1000"))
+    history_vacuum_pages: int = int(os.getenv("HISTORY_VACUUM_PAGES", "1000"))
+    
+    # Response caches (weather/places): per-cache limits and sweep interval
+    cache_max_entries: int = int(os.getenv("CACHE_MAX_ENTRIES", "2048"))
+    cache_max_bytes: int = int(os.getenv("CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+    cache_sweep_interval_seconds: float = float(os.getenv("CACHE_SWEEP_INTERVAL_SECONDS", "60"))
+    # How long past the 1 hour TTL a weather/places entry may still be served
+    # while it is refreshed in the background or the upstream is failing
+    cache_stale_ttl_seconds: int = int(os.getenv("CACHE_STALE_TTL_SECONDS", str(24 * 3600)))
+    
+    # Geohash precision used to bucket cache keys (0 keeps exact coordinates)
+    weather_cache_precision: int = int(os.getenv("WEATHER_CACHE_PRECISION", "5"))
+    places_cache_precision: int = int(os.getenv("PLACES_CACHE_PRECISION", "4"))
+    
+    # Local gazetteer (GeoNames-style cities file); empty uses the bundled dataset
+    gazetteer_path: str = os.getenv("GAZETTEER_PATH", "")
+    gazetteer_min_population: int = int(os.getenv("GAZETTEER_MIN_POPULATION", "0"))
+    
+    # Geocoding cache (in-memory LRU in front of the SQLite table)
+    geocoding_cache_ttl_seconds: int = int(os.getenv("GEOCODING_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+    geocoding_cache_max_entries: int = int(os.getenv("GEOCODING_CACHE_MAX_ENTRIES", "1024"))
+    
     # Server Configuration
     api_host: str = os.getenv("API_HOST", "0.0.0.0")
     # Render/Railway use PORT env var, fallback to API_PORT or 8000
@@ -36,6 +103,10 @@ class Settings(BaseSettings):
         "sqlite+aiosqlite:///./tourism_ai.db"
     )
     database_echo: bool = os.getenv("DATABASE_ECHO", "False").lower() == "true"
+    # Shared SQLite connections: reader pool size and per-connection tuning
+    database_readers: int = int(os.getenv("DATABASE_READERS", "4"))
+    database_mmap_size: int = int(os.getenv("DATABASE_MMAP_SIZE", str(64 * 1024 * 1024)))
+    database_cache_size_kib: int = int(os.getenv("DATABASE_CACHE_SIZE_KIB", str(16 * 1024)))
     
     # Application Info
     app_name: str = "Tourism AI Multi-Agent System"
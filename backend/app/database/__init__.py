@@ -1,6 +1,6 @@
 """Database module"""
 
-from app.database.connection import init_db, close_db
+from app.database.connection import DatabaseManager, init_db, close_db, get_database
 
-__all__ = ["init_db", "close_db"]
+__all__ = ["DatabaseManager", "init_db", "close_db", "get_database"]
 
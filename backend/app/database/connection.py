@@ -1,9 +1,130 @@
+import asyncio
 import aiosqlite
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
 from app.config import Settings
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Prepared statements kept per connection (sqlite3 statement cache)
+CACHED_STATEMENTS = 256
+
+
+class DatabaseManager:
+    """
+    Long-lived, tuned SQLite connections shared by the repositories
+    
+    SQLite allows one writer at a time, so writes go through a single
+    connection guarded by a lock. Reads use a small pool of separate
+    connections; in WAL mode they never wait for the writer. Connections
+    stay open for the life of the app, so their schema and prepared
+    statement caches are reused across requests.
+    """
+    
+    def __init__(
+        self,
+        db_path: str,
+        readers: int = 4,
+        mmap_size: int = 64 * 1024 * 1024,
+        cache_size_kib: int = 16 * 1024,
+        busy_timeout_ms: int = 5000
+    ):
+        self.db_path = db_path
+        self.reader_count = max(1, readers)
+        self.mmap_size = mmap_size
+        self.cache_size_kib = cache_size_kib
+        self.busy_timeout_ms = busy_timeout_ms
+        
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._write_lock = asyncio.Lock()
+        self._readers: List[aiosqlite.Connection] = []
+        self._idle_readers: Optional[asyncio.Queue] = None
+    
+    async def _connect(self) -> aiosqlite.Connection:
+        connection = aiosqlite.connect(self.db_path, cached_statements=CACHED_STATEMENTS)
+        # Don't let a connection that was never closed (e.g. failed startup) block interpreter exit
+        connection.daemon = True
+        db = await connection
+        await db.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        await db.execute("PRAGMA synchronous = NORMAL")
+        await db.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        # Negative cache_size is in KiB rather than pages
+        await db.execute(f"PRAGMA cache_size = -{int(self.cache_size_kib)}")
+        await db.execute("PRAGMA temp_store = MEMORY")
+        return db
+    
+    async def open(self):
+        """Open the writer and reader connections"""
+        if self._writer is not None:
+            return
+        
+        self._writer = await self._connect()
+        # Only takes effect on a new database; init_db converts existing ones
+        # when history retention is enabled
+        await self._writer.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        # WAL is a property of the database file, so setting it once is enough
+        cursor = await self._writer.execute("PRAGMA journal_mode = WAL")
+        journal_mode = (await cursor.fetchone())[0]
+        await cursor.close()
+        
+        self._idle_readers = asyncio.Queue()
+        for _ in range(self.reader_count):
+            reader = await self._connect()
+            self._readers.append(reader)
+            self._idle_readers.put_nowait(reader)
+        
+        logger.info(
+            f"Database connections opened: 1 writer, {self.reader_count} readers, journal_mode={journal_mode}"
+        )
+    
+    @asynccontextmanager
+    async def writer(self) -> AsyncIterator[aiosqlite.Connection]:
+        """
+        Exclusive use of the writer connection
+        
+        Commit inside the block; an exception rolls back the open transaction.
+        """
+        if self._writer is None:
+            raise RuntimeError("DatabaseManager is not open")
+        async with self._write_lock:
+            try:
+                yield self._writer
+            except BaseException:
+                if self._writer.in_transaction:
+                    await self._writer.rollback()
+                raise
+    
+    @asynccontextmanager
+    async def reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow a reader connection from the pool"""
+        if self._idle_readers is None:
+            raise RuntimeError("DatabaseManager is not open")
+        db = await self._idle_readers.get()
+        try:
+            yield db
+        finally:
+            self._idle_readers.put_nowait(db)
+    
+    async def close(self):
+        """Close all connections"""
+        for db in self._readers:
+            await db.close()
+        self._readers = []
+        self._idle_readers = None
+        
+        if self._writer is not None:
+            await self._writer.close()
+            self._writer = None
+
+
+_database: Optional[DatabaseManager] = None
+
+
+def get_database() -> Optional[DatabaseManager]:
+    """The DatabaseManager opened by init_db, if any"""
+    return _database
+
 
 def _get_db_path(settings: Settings) -> str:
     """Extract database path from settings"""
@@ -33,12 +154,24 @@ def _get_db_path(settings: Settings) -> str:
     return db_path
 
 
-async def init_db(settings: Settings):
-    """Initialize database and create tables"""
+async def init_db(settings: Settings) -> DatabaseManager:
+    """Open the shared database connections and create tables"""
+    global _database
+    
     db_path = _get_db_path(settings)
     logger.info(f"Initializing database: {db_path}")
     
-    async with aiosqlite.connect(db_path) as db:
+    if _database is None:
+        database = DatabaseManager(
+            db_path,
+            readers=settings.database_readers,
+            mmap_size=settings.database_mmap_size,
+            cache_size_kib=settings.database_cache_size_kib
+        )
+        await database.open()
+        _database = database
+    
+    async with _database.writer() as db:
         await db.execute("""
             CREATE TABLE IF NOT EXISTS query_history (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -57,20 +190,230 @@ async def init_db(settings: Settings):
         """)
         
         await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_place_name 
-            ON query_history(place_name)
-        """)
-        
-        await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_created_at 
-            ON query_history(created_at)
+            CREATE TABLE IF NOT EXISTS geocoding_cache (
+                cache_key TEXT PRIMARY KEY,
+                latitude REAL NOT NULL,
+                longitude REAL NOT NULL,
+                display_name TEXT NOT NULL,
+                place_id INTEGER DEFAULT 0,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )
         """)
         
         await db.commit()
+        
+        await _migrate(db)
+        
+        if settings.history_retention_days > 0:
+            await _enable_incremental_vacuum(db)
     
     logger.info("Database schema initialized successfully")
+    return _database
+
+
+async def _enable_incremental_vacuum(db: aiosqlite.Connection):
+    # Switching an existing database to incremental auto_vacuum needs one full VACUUM
+    mode = (await db.execute_fetchall("PRAGMA auto_vacuum"))[0][0]
+    if mode == 2:
+        return
+    logger.info("Enabling incremental auto_vacuum (one-time VACUUM, may take a while)")
+    await db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    await db.execute("VACUUM")
+
+
+# Rollup buckets follow IST (UTC+5:30), like the rest of the history timestamps
+IST_OFFSET_MS = 19800000
+ROLLUP_BUCKETS = {
+    "hourly": 3600000,
+    "daily": 86400000,
+}
+# Intent label derived from what a query returned
+ROLLUP_INTENT_SQL = """CASE
+    WHEN {row}has_weather = 1 AND {row}has_places = 1 THEN 'weather+places'
+    WHEN {row}has_weather = 1 THEN 'weather'
+    WHEN {row}has_places = 1 THEN 'places'
+    ELSE 'none'
+END"""
+
+
+def _bucket_sql(column: str, size_ms: int) -> str:
+    # Start of the IST hour/day containing the timestamp, in epoch ms
+    return f"((({column}) + {IST_OFFSET_MS}) / {size_ms}) * {size_ms} - {IST_OFFSET_MS}"
+
+
+def _rollup_migration() -> List[str]:
+    statements = []
+    trigger_body = []
+    for name, size_ms in ROLLUP_BUCKETS.items():
+        table = f"history_rollup_{name}"
+        statements += [
+            f"""CREATE TABLE IF NOT EXISTS {table} (
+                bucket_ts INTEGER NOT NULL,
+                place_name TEXT NOT NULL,
+                intent TEXT NOT NULL,
+                query_count INTEGER NOT NULL DEFAULT 0,
+                success_count INTEGER NOT NULL DEFAULT 0,
+                error_count INTEGER NOT NULL DEFAULT 0,
+                temp_sum REAL NOT NULL DEFAULT 0,
+                temp_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (bucket_ts, place_name, intent)
+            ) WITHOUT ROWID""",
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_place ON {table}(place_name, bucket_ts)",
+            f"""INSERT INTO {table}
+                (bucket_ts, place_name, intent, query_count, success_count, error_count, temp_sum, temp_count)
+                SELECT {_bucket_sql('created_ts', size_ms)},
+                       COALESCE(place_name, ''),
+                       {ROLLUP_INTENT_SQL.format(row='')},
+                       COUNT(*),
+                       SUM(success = 1),
+                       SUM(error IS NOT NULL),
+                       COALESCE(SUM(weather_temp), 0),
+                       COUNT(weather_temp)
+                FROM query_history
+                GROUP BY 1, 2, 3""",
+        ]
+        trigger_body.append(
+            f"""INSERT INTO {table}
+                   (bucket_ts, place_name, intent, query_count, success_count, error_count, temp_sum, temp_count)
+                   VALUES (
+                       {_bucket_sql('NEW.created_ts', size_ms)},
+                       COALESCE(NEW.place_name, ''),
+                       {ROLLUP_INTENT_SQL.format(row='NEW.')},
+                       1,
+                       NEW.success = 1,
+                       NEW.error IS NOT NULL,
+                       COALESCE(NEW.weather_temp, 0),
+                       NEW.weather_temp IS NOT NULL
+                   )
+                   ON CONFLICT(bucket_ts, place_name, intent) DO UPDATE
+                   SET query_count = query_count + 1,
+                       success_count = success_count + excluded.success_count,
+                       error_count = error_count + excluded.error_count,
+                       temp_sum = temp_sum + excluded.temp_sum,
+                       temp_count = temp_count + excluded.temp_count;"""
+        )
+    statements.append(
+        "CREATE TRIGGER IF NOT EXISTS trg_query_history_rollups\n"
+        "AFTER INSERT ON query_history\n"
+        "BEGIN\n" + "\n".join(trigger_body) + "\nEND"
+    )
+    return statements
+
+
+# History columns carried by the keyset pagination indexes, so list pages that
+# project only these (the frontend's history view) are answered from the index
+# alone. user_ip, error and the weather figures stay out: few readers ask for
+# them, and each indexed column is written again on every insert
+HISTORY_INDEX_COLUMNS = (
+    "query", "place_name", "has_weather", "has_places", "places_count", "success", "created_at"
+)
+
+
+def _covering_index_migration() -> List[str]:
+    recent_columns = ", ".join(HISTORY_INDEX_COLUMNS)
+    place_columns = ", ".join(column for column in HISTORY_INDEX_COLUMNS if column != "place_name")
+    return [
+        f"CREATE INDEX IF NOT EXISTS idx_history_created_covering ON query_history(created_ts, id, {recent_columns})",
+        f"""CREATE INDEX IF NOT EXISTS idx_history_place_covering
+            ON query_history(place_name, created_ts, id, {place_columns})""",
+        "DROP INDEX IF EXISTS idx_history_created",
+        "DROP INDEX IF EXISTS idx_history_place_created",
+    ]
+
+
+# Schema changes applied on top of the tables created in init_db, in order.
+# PRAGMA user_version records how many have been applied.
+MIGRATIONS = [
+    # 1: integer epoch-millisecond timestamps and keyset pagination indexes
+    [
+        "ALTER TABLE query_history ADD COLUMN created_ts INTEGER",
+        """UPDATE query_history
+           SET created_ts = COALESCE(CAST(ROUND((julianday(created_at) - 2440587.5) * 86400000) AS INTEGER), 0)
+           WHERE created_ts IS NULL""",
+        "CREATE INDEX IF NOT EXISTS idx_history_created ON query_history(created_ts, id)",
+        "CREATE INDEX IF NOT EXISTS idx_history_place_created ON query_history(place_name, created_ts, id)",
+        "DROP INDEX IF EXISTS idx_created_at",
+        "DROP INDEX IF EXISTS idx_place_name",
+    ],
+    # 2: /history/stats counters, kept up to date by an insert trigger
+    [
+        """CREATE TABLE IF NOT EXISTS query_stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total_queries INTEGER NOT NULL DEFAULT 0,
+            successful_queries INTEGER NOT NULL DEFAULT 0,
+            unique_places INTEGER NOT NULL DEFAULT 0
+        )""",
+        """CREATE TABLE IF NOT EXISTS query_places (
+            place_name TEXT PRIMARY KEY,
+            query_count INTEGER NOT NULL DEFAULT 0,
+            last_created_ts INTEGER
+        )""",
+        """INSERT INTO query_places (place_name, query_count, last_created_ts)
+           SELECT place_name, COUNT(*), MAX(created_ts)
+           FROM query_history
+           WHERE place_name IS NOT NULL
+           GROUP BY place_name""",
+        """INSERT INTO query_stats (id, total_queries, successful_queries, unique_places)
+           SELECT 1,
+                  (SELECT COUNT(*) FROM query_history),
+                  (SELECT COUNT(*) FROM query_history WHERE success = 1),
+                  (SELECT COUNT(*) FROM query_places)""",
+        # Only inserts count: rows removed later (e.g. archived) stay in the totals
+        """CREATE TRIGGER IF NOT EXISTS trg_query_history_stats
+           AFTER INSERT ON query_history
+           BEGIN
+               UPDATE query_stats
+               SET total_queries = total_queries + 1,
+                   successful_queries = successful_queries + (NEW.success = 1),
+                   unique_places = unique_places + (
+                       NEW.place_name IS NOT NULL
+                       AND NOT EXISTS (SELECT 1 FROM query_places WHERE place_name = NEW.place_name)
+                   )
+               WHERE id = 1;
+               INSERT INTO query_places (place_name, query_count, last_created_ts)
+               SELECT NEW.place_name, 1, NEW.created_ts
+               WHERE NEW.place_name IS NOT NULL
+               ON CONFLICT(place_name) DO UPDATE
+               SET query_count = query_count + 1,
+                   last_created_ts = excluded.last_created_ts;
+           END""",
+    ],
+    # 3: hourly and daily analytics rollups
+    _rollup_migration(),
+    # 4: place type and extent of cached geocoding results (places search planning)
+    [
+        "ALTER TABLE geocoding_cache ADD COLUMN place_type TEXT",
+        "ALTER TABLE geocoding_cache ADD COLUMN bounding_box TEXT",
+    ],
+    # 5: keyset pagination indexes that also cover the history list columns
+    _covering_index_migration(),
+]
+
+
+async def _migrate(db: aiosqlite.Connection):
+    """Apply pending MIGRATIONS, each in its own transaction"""
+    async with db.execute("PRAGMA user_version") as cursor:
+        version = (await cursor.fetchone())[0]
+    
+    for number, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+        logger.info(f"Applying database migration {number}")
+        await db.execute("BEGIN")
+        try:
+            for statement in statements:
+                await db.execute(statement)
+            await db.execute(f"PRAGMA user_version = {number}")
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
 
 
 async def close_db():
-    """Close database connections (no-op for SQLite, but kept for consistency)"""
+    """Close the shared database connections"""
+    global _database
+    
+    if _database is not None:
+        await _database.close()
+        _database = None
     logger.info("Database connections closed")
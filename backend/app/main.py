@@ -1,20 +1,32 @@
+import os
+import json
+from datetime import datetime
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv
 
 from app.config import Settings
-from app.models.schemas import TourismRequest, TourismResponse
+from app.models.schemas import LocationResponse, TourismRequest, TourismResponse, TourismBatchRequest, TourismBatchResponse
 from app.clients.geocoding_client import GeocodingClient
+from app.clients.gazetteer import Gazetteer, DEFAULT_CITIES_PATH
 from app.clients.weather_client import WeatherClient
 from app.clients.places_client import PlacesClient
+from app.clients.offline_places_client import OfflinePlacesClient
+from app.clients.http_transport import UpstreamTransport
+from app.clients.overpass_mirrors import OverpassMirrors
 from app.agents.weather_agent import WeatherAgent
 from app.agents.places_agent import PlacesAgent
 from app.agents.parent_agent import TourismAIAgent
 from app.utils.logger import setup_logger
 from app.database import init_db, close_db
-from app.database.connection import _get_db_path
-from app.repositories.history_repository import HistoryRepository
+from app.repositories.history_repository import HistoryRepository, IST
+from app.repositories.history_recorder import HistoryRecorder
+from app.repositories.history_archiver import HistoryArchiver
+from app.repositories.geocoding_repository import GeocodingCacheRepository
+from app.utils.cache import GeocodingCache, weather_cache, places_cache
 
 load_dotenv()
 
@@ -22,42 +34,152 @@ settings = Settings()
 logger = setup_logger(__name__, level=settings.log_level)
 
 # Global dependency objects
+upstream: UpstreamTransport = None
+overpass_mirrors: OverpassMirrors = None
 geocoding_client: GeocodingClient = None
 weather_client: WeatherClient = None
-places_client: PlacesClient = None
+places_client: PlacesClient | OfflinePlacesClient = None
 weather_agent: WeatherAgent = None
 places_agent: PlacesAgent = None
 tourism_agent: TourismAIAgent = None
 history_repository: HistoryRepository = None
+history_recorder: HistoryRecorder = None
+history_archiver: HistoryArchiver = None
+gazetteer: Gazetteer = None
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     global geocoding_client, weather_client, places_client
-    global weather_agent, places_agent, tourism_agent, history_repository
+    global weather_agent, places_agent, tourism_agent, history_repository, history_recorder, gazetteer
+    global history_archiver, upstream, overpass_mirrors
 
     logger.info(f"Starting {settings.app_name} v{settings.app_version}...")
 
-    # Initialize SQLite database
-    await init_db(settings)
+    # Open the shared SQLite connections and create tables
+    database = await init_db(settings)
+    logger.info(f"Database path: {database.db_path}")
+    history_repository = HistoryRepository(database)
+
+    # Requests queue their history rows; a background task writes them in batches
+    history_recorder = HistoryRecorder(
+        history_repository,
+        max_queue=settings.history_queue_size,
+        batch_size=settings.history_batch_size,
+        flush_interval_seconds=settings.history_flush_interval_seconds,
+        overflow_policy=settings.history_overflow_policy
+    )
+    history_recorder.start()
+
+    # Retention: archive and delete old history in the background
+    history_archiver = None
+    if settings.history_retention_days > 0:
+        history_archiver = HistoryArchiver(
+            database,
+            archive_dir=os.path.abspath(settings.history_archive_dir),
+            retention_days=settings.history_retention_days,
+            batch_size=settings.history_archive_batch_size,
+            interval_seconds=settings.history_archive_interval_seconds,
+            vacuum_pages=settings.history_vacuum_pages
+        )
+        history_archiver.start()
+
+    # Bound the response caches and expire stale entries in the background
+    for cache in (weather_cache, places_cache):
+        cache.configure(
+            max_entries=settings.cache_max_entries,
+            max_bytes=settings.cache_max_bytes,
+            stale_ttl_seconds=settings.cache_stale_ttl_seconds
+        )
+        cache.start_sweeper(settings.cache_sweep_interval_seconds)
 
-    # Resolve DB path
-    db_path = _get_db_path(settings)
-    logger.info(f"Database path: {db_path}")
-    history_repository = HistoryRepository(db_path)
+    # Geocoding cache: in-memory LRU backed by the SQLite table
+    geocoding_store = GeocodingCacheRepository(database)
+    try:
+        await geocoding_store.purge_expired()
+    except Exception as e:
+        logger.warning(f"Could not purge expired geocoding cache entries: {e}")
+    geocoding_cache = GeocodingCache(
+        store=geocoding_store,
+        ttl_seconds=settings.geocoding_cache_ttl_seconds,
+        max_entries=settings.geocoding_cache_max_entries,
+        serialize=LocationResponse.model_dump,
+        deserialize=LocationResponse.model_validate
+    )
+    geocoding_cache.start_sweeper(settings.cache_sweep_interval_seconds)
 
-    # Initialize API clients
+    # Local gazetteer answers most city lookups; Nominatim handles the rest
+    gazetteer = None
+    try:
+        gazetteer = Gazetteer.from_file(
+            settings.gazetteer_path or DEFAULT_CITIES_PATH,
+            min_population=settings.gazetteer_min_population
+        )
+    except Exception as e:
+        logger.warning(f"Could not load gazetteer, using Nominatim only: {e}")
+
+    # Initialize API clients on shared per-host connection pools
+    upstream = UpstreamTransport(
+        max_connections_per_host=settings.upstream_max_connections_per_host,
+        max_keepalive_per_host=settings.upstream_max_keepalive_per_host,
+        keepalive_expiry=settings.upstream_keepalive_expiry_seconds,
+        http2=settings.upstream_http2,
+        user_agent=settings.user_agent
+    )
     geocoding_client = GeocodingClient(
         base_url=settings.nominatim_base_url,
-        user_agent=settings.user_agent
+        user_agent=settings.user_agent,
+        cache=geocoding_cache,
+        gazetteer=gazetteer,
+        # Nominatim's usage policy asks for no requests beyond what users need
+        http_client=upstream.client_for(settings.nominatim_base_url, timeout=10.0, keep_warm=False)
+    )
+    weather_client = WeatherClient(
+        base_url=settings.open_meteo_base_url,
+        cache_precision=settings.weather_cache_precision,
+        http_client=upstream.client_for(settings.open_meteo_base_url, timeout=10.0)
     )
-    weather_client = WeatherClient(base_url=settings.open_meteo_base_url)
-    places_client = PlacesClient(base_url=settings.overpass_base_url)
+    overpass_urls = [settings.overpass_base_url] + [
+        url.strip() for url in settings.overpass_mirrors.split(",")
+        if url.strip() and url.strip() != settings.overpass_base_url
+    ]
+    overpass_mirrors = OverpassMirrors(
+        [(url, upstream.client_for(url, timeout=45.0)) for url in overpass_urls],
+        hedging=settings.overpass_hedging,
+        hedge_percentile=settings.overpass_hedge_percentile,
+        initial_delay=settings.overpass_hedge_initial_delay_seconds,
+        min_delay=settings.overpass_hedge_min_delay_seconds,
+        max_delay=settings.overpass_hedge_max_delay_seconds
+    )
+    places_client = PlacesClient(
+        base_url=settings.overpass_base_url,
+        cache_precision=settings.places_cache_precision,
+        http_client=upstream.client_for(settings.overpass_base_url, timeout=45.0),
+        mirrors=overpass_mirrors
+    )
+    if settings.places_backend.lower() == "offline":
+        poi_index_path = os.path.abspath(settings.poi_index_path)
+        if os.path.exists(poi_index_path):
+            logger.info(f"Using offline POI index: {poi_index_path}")
+            places_client = OfflinePlacesClient(poi_index_path, fallback=places_client)
+        else:
+            logger.warning(f"POI index not found at {poi_index_path}, using Overpass")
+
+    # Open upstream connections (DNS, TCP, TLS) before the first request needs them
+    if settings.upstream_prewarm:
+        upstream.start_prewarm(interval_seconds=settings.upstream_prewarm_interval_seconds)
 
     # Agents
     weather_agent = WeatherAgent(geocoding_client, weather_client)
     places_agent = PlacesAgent(geocoding_client, places_client)
-    tourism_agent = TourismAIAgent(weather_agent, places_agent)
+    tourism_agent = TourismAIAgent(
+        weather_agent,
+        places_agent,
+        geocoding_client,
+        parallel=settings.parallel_agents,
+        weather_timeout=settings.weather_timeout_seconds or None,
+        places_timeout=settings.places_timeout_seconds or None
+    )
 
     logger.info("Tourism AI Multi-Agent System started successfully!")
 
@@ -65,9 +187,15 @@ async def lifespan(app: FastAPI):
 
     # Shutdown gracefully
     logger.info("Shutting down Tourism AI Multi-Agent System...")
+    if history_archiver:
+        await history_archiver.stop()
+    await history_recorder.stop()
+    for cache in (weather_cache, places_cache, geocoding_cache):
+        await cache.stop_sweeper()
     await geocoding_client.close()
     await weather_client.close()
     await places_client.close()
+    await upstream.close()
     await close_db()
     logger.info("Shutdown complete.")
 
@@ -102,10 +230,14 @@ async def root():
         "version": settings.app_version,
         "endpoints": {
             "/query": "POST - Query tourism information",
+            "/query/batch": "POST - Query tourism information for many queries at once",
+            "/query/stream": "POST - Query tourism information, streamed as NDJSON events",
             "/health": "GET - Health check",
             "/history": "GET - Recent query history",
             "/history/stats": "GET - Query statistics",
+            "/history/analytics": "GET - Hourly/daily query counts per place and intent",
             "/history/place/{place_name}": "GET - History for a specific place",
+            "/upstream/stats": "GET - Connection pool usage per upstream API host and Overpass mirror health",
             "/docs": "Swagger UI",
             "/redoc": "ReDoc UI"
         }
@@ -123,25 +255,45 @@ async def health_check():
         return {"status": "unhealthy", "error": str(e)}
 
 
+def _split_fields(fields: str = None):
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(",") if field.strip()]
+
+
 @app.get("/history")
-async def get_query_history(limit: int = 10, days: int = None):
+async def get_query_history(
+    limit: int = 10, days: int = None, cursor: str = None, fields: str = None, fresh: bool = False
+):
     try:
         if not history_repository:
             raise HTTPException(status_code=503, detail="Repository not initialized")
 
-        history = await history_repository.get_recent(limit=limit, days=days)
-        return {"success": True, "count": len(history), "history": history}
+        # Rows wait up to HISTORY_FLUSH_INTERVAL_SECONDS in the write-behind
+        # queue; fresh=true writes them first so a client sees its own queries
+        if fresh:
+            await history_recorder.flush()
+        history, next_cursor = await history_repository.get_recent(
+            limit=limit, days=days, cursor=cursor, fields=_split_fields(fields)
+        )
+        return {"success": True, "count": len(history), "history": history, "next_cursor": next_cursor}
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching query history: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching history: {str(e)}")
 
 
 @app.get("/history/stats")
-async def get_query_stats():
+async def get_query_stats(fresh: bool = False):
     try:
         if not history_repository:
             raise HTTPException(status_code=503, detail="Repository not initialized")
 
+        if fresh:
+            await history_recorder.flush()
         stats = await history_repository.get_stats()
         return {"success": True, "stats": stats}
     except Exception as e:
@@ -149,24 +301,109 @@ async def get_query_stats():
         raise HTTPException(status_code=500, detail=f"Error fetching stats: {str(e)}")
 
 
+def _parse_time(value: str = None):
+    # ISO date or datetime; times without an offset are IST
+    if not value:
+        return None
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid date/time '{value}', expected ISO 8601")
+    return moment if moment.tzinfo else moment.replace(tzinfo=IST)
+
+
+@app.get("/history/analytics")
+async def get_query_analytics(
+    granularity: str = "day",
+    start: str = None,
+    end: str = None,
+    place: str = None,
+    intent: str = None,
+    group_by: str = "place_name,intent",
+    fresh: bool = False
+):
+    try:
+        if not history_repository:
+            raise HTTPException(status_code=503, detail="Repository not initialized")
+
+        if fresh:
+            await history_recorder.flush()
+        buckets, truncated = await history_repository.get_analytics(
+            granularity=granularity,
+            start=_parse_time(start),
+            end=_parse_time(end),
+            place_name=place,
+            intent=intent,
+            group_by=_split_fields(group_by) or []
+        )
+        return {
+            "success": True,
+            "granularity": granularity,
+            "count": len(buckets),
+            "truncated": truncated,
+            "buckets": buckets
+        }
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error fetching analytics: {e}")
+        raise HTTPException(status_code=500, detail=f"Error fetching analytics: {str(e)}")
+
+
 @app.get("/history/place/{place_name}")
-async def get_place_history(place_name: str, limit: int = 5):
+async def get_place_history(
+    place_name: str, limit: int = 5, cursor: str = None, fields: str = None, fresh: bool = False
+):
     try:
         if not history_repository:
             raise HTTPException(status_code=503, detail="Repository not initialized")
 
-        history = await history_repository.get_by_place(place_name=place_name, limit=limit)
+        if fresh:
+            await history_recorder.flush()
+        history, next_cursor = await history_repository.get_by_place(
+            place_name=place_name, limit=limit, cursor=cursor, fields=_split_fields(fields)
+        )
         return {
             "success": True,
             "place_name": place_name,
             "count": len(history),
-            "history": history
+            "history": history,
+            "next_cursor": next_cursor
         }
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching place history: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching place history: {str(e)}")
 
 
+@app.get("/upstream/stats")
+async def get_upstream_stats():
+    if not upstream:
+        raise HTTPException(status_code=503, detail="Upstream transport not initialized")
+
+    return {"success": True, "upstream": upstream.get_stats(), "overpass": overpass_mirrors.get_stats()}
+
+
+def _history_fields(query: str, response: TourismResponse, user_ip: str = None) -> dict:
+    return {
+        "query": query,
+        "place_name": response.place_name,
+        "user_ip": user_ip,
+        "has_weather": response.weather is not None,
+        "has_places": response.places is not None and len(response.places) > 0,
+        "weather_temp": response.weather.temperature if response.weather else None,
+        "weather_rain_prob": response.weather.rain_probability if response.weather else None,
+        "places_count": len(response.places) if response.places else 0,
+        "error": response.error,
+        "success": response.success
+    }
+
+
 @app.options("/query")
 async def options_query():
     """Handle CORS preflight"""
@@ -185,27 +422,13 @@ async def query_tourism(request: TourismRequest, http_request: Request):
 
         response = await tourism_agent.process_query(
             query=request.query,
-            place_name=request.place
+            place_name=request.place,
+            offset=request.offset
         )
 
-        # Save history
-        if history_repository:
-            try:
-                history_id = await history_repository.save_interaction(
-                    query=request.query,
-                    place_name=response.place_name,
-                    user_ip=user_ip,
-                    has_weather=response.weather is not None,
-                    has_places=response.places is not None and len(response.places) > 0,
-                    weather_temp=response.weather.temperature if response.weather else None,
-                    weather_rain_prob=response.weather.rain_probability if response.weather else None,
-                    places_count=len(response.places) if response.places else 0,
-                    error=response.error,
-                    success=response.success
-                )
-                logger.info(f"Saved query history with ID: {history_id}")
-            except Exception as db_error:
-                logger.error(f"Failed to save query history: {db_error}", exc_info=True)
+        # Save history (written in the background)
+        if history_recorder:
+            await history_recorder.record(**_history_fields(request.query, response, user_ip))
 
         return response
 
@@ -215,6 +438,79 @@ async def query_tourism(request: TourismRequest, http_request: Request):
         logger.error(f"Error processing query: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+
+@app.post("/query/stream")
+async def query_tourism_stream(request: TourismRequest, http_request: Request):
+    """
+    Streaming variant of /query
+    
+    Responds with newline-delimited JSON events: "place", "weather" and
+    "places" as soon as each is ready, then a "summary" holding the full
+    /query response. Weather usually arrives well before places.
+    """
+    logger.info(f"Received streaming query: {request.query}")
+
+    if not tourism_agent:
+        raise HTTPException(status_code=503, detail="Service not initialized")
+
+    user_ip = http_request.client.host if http_request.client else None
+
+    async def events():
+        async for event in tourism_agent.stream_query(
+            query=request.query, place_name=request.place, offset=request.offset
+        ):
+            if event["event"] == "summary" and history_recorder:
+                await history_recorder.record(**_history_fields(request.query, event["response"], user_ip))
+            yield json.dumps(jsonable_encoder(event)) + "\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/query/batch", response_model=TourismBatchResponse)
+async def query_tourism_batch(request: TourismBatchRequest, http_request: Request):
+    try:
+        logger.info(f"Received batch of {len(request.queries)} queries")
+
+        if not tourism_agent:
+            raise HTTPException(status_code=503, detail="Service not initialized")
+
+        if len(request.queries) > settings.batch_max_queries:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Too many queries: {len(request.queries)} (max {settings.batch_max_queries})"
+            )
+
+        user_ip = http_request.client.host if http_request.client else None
+
+        responses = await tourism_agent.process_batch(
+            [(item.query, item.place, item.offset) for item in request.queries],
+            max_concurrency=settings.batch_concurrency
+        )
+
+        # Save history for the whole batch in one transaction (written in the background)
+        if history_recorder:
+            await history_recorder.record_many([
+                _history_fields(item.query, response, user_ip)
+                for item, response in zip(request.queries, responses)
+            ])
+
+        return TourismBatchResponse(
+            results=responses,
+            count=len(responses),
+            failed=sum(1 for response in responses if not response.success)
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error processing batch query: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
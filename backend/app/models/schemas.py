@@ -11,6 +11,9 @@ class LocationResponse(BaseModel):
     longitude: float
     display_name: str
     place_id: int
+    place_type: Optional[str] = Field(None, description="Search profile: landmark, village, town, city or region")
+    bounding_box: Optional[List[float]] = Field(None, description="Extent of the place: south, west, north, east")
+    source: Optional[str] = Field(None, description="Where the location was resolved: gazetteer or nominatim")
 
 
 class WeatherResponse(BaseModel):
@@ -37,6 +40,7 @@ class TourismRequest(BaseModel):
     """Tourism query request"""
     query: str = Field(..., description="User query about a place")
     place: Optional[str] = Field(None, description="Optional explicit place name")
+    offset: int = Field(0, ge=0, description="Number of places to skip, for paging through suggestions")
 
 
 class TourismResponse(BaseResponse):
@@ -45,4 +49,19 @@ class TourismResponse(BaseResponse):
     weather: Optional[WeatherResponse] = None
     places: Optional[List[PlaceInfo]] = None
     error: Optional[str] = None
+    unavailable: Optional[List[str]] = Field(
+        None, description="Sections (weather/places) that missed their deadline and are still pending"
+    )
 
+
+
+class TourismBatchRequest(BaseModel):
+    """Batch of tourism queries"""
+    queries: List[TourismRequest] = Field(..., min_length=1, description="Queries to answer")
+
+
+class TourismBatchResponse(BaseResponse):
+    """Batch response with one result per query, in request order"""
+    results: List[TourismResponse]
+    count: int
+    failed: int = Field(0, description="Number of results with success=false")
@@ -1,6 +1,9 @@
 """Repositories module - Repository Pattern implementation"""
 
 from app.repositories.history_repository import HistoryRepository
+from app.repositories.history_recorder import HistoryRecorder
+from app.repositories.history_archiver import HistoryArchiver
+from app.repositories.geocoding_repository import GeocodingCacheRepository
 
-__all__ = ["HistoryRepository"]
+__all__ = ["HistoryRepository", "HistoryRecorder", "HistoryArchiver", "GeocodingCacheRepository"]
 
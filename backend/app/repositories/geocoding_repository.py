@@ -0,0 +1,81 @@
+"""Repository for the persistent geocoding cache
+
+Stores resolved coordinates in the application SQLite database so
+geocoding results survive restarts.
+"""
+
+import time
+from typing import Optional, Dict, Any, Tuple
+from app.database.connection import DatabaseManager
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class GeocodingCacheRepository:
+    """Repository for cached geocoding results"""
+    
+    def __init__(self, database: DatabaseManager):
+        self.database = database
+    
+    async def get(self, key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Get a cached location and its expiry (epoch seconds) if not expired"""
+        async with self.database.reader() as db:
+            async with db.execute(
+                """SELECT latitude, longitude, display_name, place_id, place_type, bounding_box, expires_at
+                   FROM geocoding_cache
+                   WHERE cache_key = ? AND expires_at > ?""",
+                (key, time.time())
+            ) as cursor:
+                row = await cursor.fetchone()
+        
+        if not row:
+            return None
+        
+        latitude, longitude, display_name, place_id, place_type, bounding_box, expires_at = row
+        return {
+            "latitude": latitude,
+            "longitude": longitude,
+            "display_name": display_name,
+            "place_id": place_id,
+            "place_type": place_type,
+            # Stored as "south,west,north,east"
+            "bounding_box": [float(value) for value in bounding_box.split(",")] if bounding_box else None
+        }, expires_at
+    
+    async def set(self, key: str, location: Dict[str, Any], ttl_seconds: int) -> None:
+        """Insert or refresh a cached location"""
+        now = time.time()
+        async with self.database.writer() as db:
+            await db.execute(
+                """INSERT OR REPLACE INTO geocoding_cache
+                   (cache_key, latitude, longitude, display_name, place_id, place_type, bounding_box,
+                    created_at, expires_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    key,
+                    location["latitude"],
+                    location["longitude"],
+                    location["display_name"],
+                    location["place_id"],
+                    location.get("place_type"),
+                    ",".join(str(value) for value in location["bounding_box"]) if location.get("bounding_box") else None,
+                    now,
+                    now + ttl_seconds
+                )
+            )
+            await db.commit()
+    
+    async def purge_expired(self) -> int:
+        """Delete expired entries, returning how many were removed"""
+        async with self.database.writer() as db:
+            async with db.execute(
+                "DELETE FROM geocoding_cache WHERE expires_at <= ?",
+                (time.time(),)
+            ) as cursor:
+                removed = cursor.rowcount
+            await db.commit()
+        
+        if removed:
+            logger.info(f"Purged {removed} expired geocoding cache entries")
+        return removed
@@ -0,0 +1,178 @@
+"""Retention for query history
+
+Rows older than the retention period are copied to gzip'd NDJSON files and
+then deleted from query_history in small batches, so the hot table and its
+indexes stay bounded. Freed pages are returned to the filesystem with
+incremental vacuum.
+
+The counters in query_stats, query_places and the rollup tables are only
+maintained on insert, so they keep covering archived rows.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+from app.database.connection import DatabaseManager
+from app.repositories.history_repository import HISTORY_FIELDS, get_ist_now, to_epoch_ms
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+SELECT_EXPIRED_SQL = (
+    f"SELECT {', '.join(HISTORY_FIELDS)} FROM query_history "
+    "WHERE created_ts < ? AND (created_ts, id) > (?, ?) "
+    "ORDER BY created_ts, id LIMIT ?"
+)
+DELETE_EXPIRED_SQL = "DELETE FROM query_history WHERE created_ts < ? AND (created_ts, id) <= (?, ?)"
+
+
+class HistoryArchiver:
+    """
+    Background job that archives and deletes expired query history
+    
+    Each pass writes one archive file (query_history-<IST timestamp>.ndjson.gz)
+    holding every row older than retention_days. Rows are read from a
+    reader connection, appended to the archive as one gzip member per batch
+    and synced to disk, and only then deleted in a short write transaction;
+    writers get the lock between batches. If the process dies between the
+    archive write and the delete, the batch is archived again on the next
+    pass, so archives may repeat rows but never miss any.
+    """
+    
+    def __init__(
+        self,
+        database: DatabaseManager,
+        archive_dir: str,
+        retention_days: int,
+        batch_size: int = 1000,
+        interval_seconds: float = 3600,
+        vacuum_pages: int = 1000
+    ):
+        if retention_days <= 0:
+            raise ValueError("retention_days must be positive")
+        
+        self.database = database
+        self.archive_dir = archive_dir
+        self.retention_days = retention_days
+        self.batch_size = max(1, batch_size)
+        self.interval = interval_seconds
+        self.vacuum_pages = max(1, vacuum_pages)
+        self._task: Optional[asyncio.Task] = None
+        
+        self.archived = 0
+        self.pages_freed = 0
+        self.last_archive: Optional[str] = None
+        self.last_run: Optional[str] = None
+    
+    def start(self):
+        """Start the periodic archive job"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop the archive job; a batch in progress is abandoned before its delete"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+    
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"History archive pass failed: {e}", exc_info=True)
+            await asyncio.sleep(self.interval)
+    
+    async def run_once(self) -> int:
+        """
+        Archive and delete every row older than the retention period
+        
+        Returns:
+            Number of rows archived
+        """
+        now = get_ist_now()
+        cutoff_ts = to_epoch_ms(now - timedelta(days=self.retention_days))
+        path = os.path.join(self.archive_dir, f"query_history-{now.strftime('%Y%m%dT%H%M%S')}.ndjson.gz")
+        
+        archived = 0
+        last_key = (-1, -1)
+        while True:
+            async with self.database.reader() as db:
+                rows = await db.execute_fetchall(SELECT_EXPIRED_SQL, (cutoff_ts, *last_key, self.batch_size))
+            if not rows:
+                break
+            
+            records = [dict(zip(HISTORY_FIELDS, row)) for row in rows]
+            await asyncio.to_thread(self._append, path, records)
+            
+            last = records[-1]
+            last_key = (last["created_ts"], last["id"])
+            async with self.database.writer() as db:
+                await db.execute(DELETE_EXPIRED_SQL, (cutoff_ts, *last_key))
+                await db.commit()
+            archived += len(records)
+            self.archived += len(records)
+        
+        if archived:
+            self.last_archive = path
+            logger.info(f"Archived {archived} query history rows older than {self.retention_days} days to {path}")
+            await self.vacuum()
+        self.last_run = now.isoformat()
+        return archived
+    
+    def _append(self, path: str, records: List[Dict[str, Any]]):
+        os.makedirs(self.archive_dir, exist_ok=True)
+        # One complete gzip member per batch: the file stays readable as a
+        # whole even if a later batch is interrupted
+        with open(path, "ab") as f:
+            with gzip.GzipFile(fileobj=f, mode="ab") as archive:
+                for record in records:
+                    archive.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+    
+    async def vacuum(self) -> int:
+        """
+        Return free pages to the filesystem, vacuum_pages at a time
+        
+        Needs auto_vacuum = INCREMENTAL (see init_db); otherwise a no-op.
+        
+        Returns:
+            Number of pages freed
+        """
+        freed = 0
+        while True:
+            async with self.database.writer() as db:
+                before = (await db.execute_fetchall("PRAGMA freelist_count"))[0][0]
+                if not before:
+                    break
+                # Each result row is one step of the vacuum; fetch them all to run it to completion
+                await db.execute_fetchall(f"PRAGMA incremental_vacuum({self.vacuum_pages})")
+                after = (await db.execute_fetchall("PRAGMA freelist_count"))[0][0]
+            if after >= before:
+                break
+            freed += before - after
+        
+        self.pages_freed += freed
+        if freed:
+            logger.info(f"Incremental vacuum freed {freed} pages")
+        return freed
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "retention_days": self.retention_days,
+            "archived": self.archived,
+            "pages_freed": self.pages_freed,
+            "last_archive": self.last_archive,
+            "last_run": self.last_run
+        }
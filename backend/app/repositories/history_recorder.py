@@ -0,0 +1,212 @@
+"""Write-behind sink for query history
+
+Endpoints hand history rows to the recorder and return immediately; a
+background task writes them in batches through HistoryRepository, one
+transaction per batch.
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+from app.repositories.history_repository import HistoryRepository
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+OVERFLOW_POLICIES = ("drop_newest", "drop_oldest", "block")
+
+# Queue marker: write the pending batch and exit
+_STOP = object()
+
+
+class _Flush:
+    """Queue marker: write the pending batch now, then set `written`"""
+    
+    def __init__(self):
+        self.written = asyncio.Event()
+
+
+class HistoryRecorder:
+    """
+    Bounded write-behind queue in front of HistoryRepository
+    
+    Rows are written when batch_size rows are pending or flush_interval
+    seconds after the first pending row, whichever comes first. When the
+    queue is full the overflow policy decides what happens:
+    
+    - drop_newest: reject the new rows
+    - drop_oldest: discard the oldest queued rows to make room
+    - block: wait for room (applies backpressure to the request)
+    """
+    
+    def __init__(
+        self,
+        repository: HistoryRepository,
+        max_queue: int = 10000,
+        batch_size: int = 200,
+        flush_interval_seconds: float = 1.0,
+        overflow_policy: str = "drop_newest"
+    ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Unknown history overflow policy '{overflow_policy}', expected one of {', '.join(OVERFLOW_POLICIES)}"
+            )
+        
+        self.repository = repository
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval_seconds
+        self.overflow_policy = overflow_policy
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, max_queue))
+        self._task: Optional[asyncio.Task] = None
+        
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        # Log when dropping starts and stops rather than once per dropped row
+        self._dropping = False
+    
+    def start(self):
+        """Start the background writer"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    async def record(self, **fields) -> bool:
+        """
+        Queue one interaction (same keyword arguments as save_interaction)
+        
+        Returns:
+            False if the row was dropped because the queue is full
+        """
+        return await self.record_many([fields])
+    
+    async def record_many(self, interactions: List[Dict[str, Any]]) -> bool:
+        """
+        Queue several interactions to be written in the same transaction
+        
+        Returns:
+            False if the rows were dropped because the queue is full
+        """
+        if not interactions:
+            return True
+        
+        if self.overflow_policy == "block":
+            await self._queue.put(interactions)
+            return True
+        
+        try:
+            self._queue.put_nowait(interactions)
+            if self._dropping:
+                self._dropping = False
+                logger.info(f"History queue has room again ({self.dropped} rows dropped so far)")
+            return True
+        except asyncio.QueueFull:
+            pass
+        
+        if self.overflow_policy == "drop_oldest":
+            oldest = self._queue.get_nowait()
+            self._queue.task_done()
+            if isinstance(oldest, list):
+                self._queue.put_nowait(interactions)
+                self._count_dropped(len(oldest))
+                return True
+            # Never drop a flush/stop marker; reject the new rows instead
+            self._queue.put_nowait(oldest)
+        
+        self._count_dropped(len(interactions))
+        return False
+    
+    def _count_dropped(self, rows: int):
+        self.dropped += rows
+        if not self._dropping:
+            self._dropping = True
+            logger.warning(f"History queue full, dropping rows ({self.overflow_policy})")
+    
+    async def flush(self):
+        """
+        Wait until the rows queued before this call have been written
+        
+        Rows queued afterwards are not waited for, so a steady stream of new
+        rows cannot hold the caller up. When the queue is full the flush is
+        skipped and readers may lag the queue by up to one flush interval.
+        """
+        if self._task is None or self._task.done():
+            return
+        marker = _Flush()
+        try:
+            self._queue.put_nowait(marker)
+        except asyncio.QueueFull:
+            return
+        written = asyncio.create_task(marker.written.wait())
+        try:
+            # The writer may stop (or fail) before reaching the marker
+            await asyncio.wait((written, self._task), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            written.cancel()
+    
+    async def stop(self):
+        """Write the remaining rows and stop the background writer"""
+        if self._task is None:
+            return
+        if not self._task.done():
+            await self._queue.put(_STOP)
+            await self._task
+        self._task = None
+        logger.info(f"History recorder stopped: {self.written} written, {self.dropped} dropped, {self.failed} failed")
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            rows: List[Dict[str, Any]] = []
+            marker = None
+            taken = 0
+            
+            item = await self._queue.get()
+            deadline = loop.time() + self.flush_interval
+            while True:
+                taken += 1
+                if isinstance(item, list):
+                    rows.extend(item)
+                else:
+                    marker = item
+                if marker is not None or len(rows) >= self.batch_size:
+                    break
+                
+                try:
+                    item = self._queue.get_nowait()
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            
+            await self._write(rows)
+            for _ in range(taken):
+                self._queue.task_done()
+            
+            if marker is _STOP:
+                return
+            if marker is not None:
+                marker.written.set()
+    
+    async def _write(self, rows: List[Dict[str, Any]]):
+        if not rows:
+            return
+        try:
+            await self.repository.save_interactions(rows)
+            self.written += len(rows)
+        except Exception as e:
+            self.failed += len(rows)
+            logger.error(f"Failed to write {len(rows)} query history rows: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "overflow_policy": self.overflow_policy
+        }
@@ -4,9 +4,10 @@ We can swap to MongoDB/PostgreSQL by
 changing only this file.
 """
 
-import aiosqlite
-from typing import List, Optional, Dict, Any
+import base64
+from typing import Iterable, List, Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta, timezone
+from app.database.connection import DatabaseManager, IST_OFFSET_MS, ROLLUP_BUCKETS
 from app.utils.logger import setup_logger
 
 # Indian Standard Time (IST) is UTC+5:30
@@ -16,14 +17,107 @@ def get_ist_now() -> datetime:
     """Get current time in Indian Standard Time"""
     return datetime.now(IST)
 
+def to_epoch_ms(moment: datetime) -> int:
+    """Epoch milliseconds, as stored in query_history.created_ts"""
+    return round(moment.timestamp() * 1000)
+
 logger = setup_logger(__name__)
 
+INSERT_HISTORY_SQL = """INSERT INTO query_history
+       (query, place_name, user_ip, has_weather, has_places,
+        weather_temp, weather_rain_prob, places_count, error, success, created_at, created_ts)
+       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+# Columns the history endpoints can return
+HISTORY_FIELDS = (
+    "id", "query", "place_name", "user_ip", "has_weather", "has_places", "weather_temp",
+    "weather_rain_prob", "places_count", "error", "success", "created_at", "created_ts"
+)
+BOOLEAN_FIELDS = frozenset({"has_weather", "has_places", "success"})
+
+# Counters maintained by the query_history insert trigger
+STATS_SQL = "SELECT total_queries, successful_queries, unique_places FROM query_stats WHERE id = 1"
+MAX_PAGE_SIZE = 500
+
+# Analytics granularity -> (rollup table, bucket size in ms)
+ROLLUP_GRANULARITIES = {
+    "hour": ("history_rollup_hourly", ROLLUP_BUCKETS["hourly"]),
+    "day": ("history_rollup_daily", ROLLUP_BUCKETS["daily"]),
+}
+ROLLUP_INTENTS = ("weather", "places", "weather+places", "none")
+ROLLUP_DIMENSIONS = ("place_name", "intent")
+# Default window when no start is given
+ROLLUP_DEFAULT_RANGE = {"hour": timedelta(hours=48), "day": timedelta(days=30)}
+MAX_ANALYTICS_ROWS = 5000
+
+
+def bucket_start(epoch_ms: int, size_ms: int) -> int:
+    """Start of the IST hour/day bucket containing epoch_ms (same math as the rollup trigger)"""
+    return ((epoch_ms + IST_OFFSET_MS) // size_ms) * size_ms - IST_OFFSET_MS
+
+
+def encode_cursor(created_ts: int, row_id: int) -> str:
+    """Opaque page cursor pointing just past the given row"""
+    return base64.urlsafe_b64encode(f"{created_ts}:{row_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    """Inverse of encode_cursor; raises ValueError for malformed cursors"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_ts, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split(":")
+        return int(created_ts), int(row_id)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
 
 class HistoryRepository:
     """Repository for query history operations"""
     
-    def __init__(self, db_path: str):
-        self.db_path = db_path
+    def __init__(self, database: DatabaseManager):
+        self.database = database
+        # In-memory copy of query_stats, refreshed by every write through
+        # this repository; loaded from the table on first use
+        self._stats: Optional[Dict[str, int]] = None
+    
+    @staticmethod
+    async def _read_stats(db) -> Dict[str, int]:
+        rows = await db.execute_fetchall(STATS_SQL)
+        total, successful, unique_places = rows[0] if rows else (0, 0, 0)
+        return {
+            "total_queries": total,
+            "successful_queries": successful,
+            "unique_places": unique_places
+        }
+    
+    @staticmethod
+    def _interaction_row(
+        query: str,
+        place_name: Optional[str] = None,
+        user_ip: Optional[str] = None,
+        has_weather: bool = False,
+        has_places: bool = False,
+        weather_temp: Optional[float] = None,
+        weather_rain_prob: Optional[float] = None,
+        places_count: int = 0,
+        error: Optional[str] = None,
+        success: bool = True
+    ) -> tuple:
+        now = get_ist_now()
+        return (
+            query,
+            place_name,
+            user_ip,
+            1 if has_weather else 0,
+            1 if has_places else 0,
+            weather_temp,
+            weather_rain_prob,
+            places_count,
+            error,
+            1 if success else 0,
+            now.isoformat(),
+            to_epoch_ms(now)
+        )
     
     async def save_interaction(
         self,
@@ -40,112 +134,223 @@ class HistoryRepository:
     ) -> int:
         """Save a query interaction to the database"""
         try:
-            logger.info(f"Saving query history: query='{query[:50]}...', place='{place_name}', db_path='{self.db_path}'")
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute(
-                    """INSERT INTO query_history 
-                       (query, place_name, user_ip, has_weather, has_places, 
-                        weather_temp, weather_rain_prob, places_count, error, success, created_at)
-                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                    (
-                        query,
-                        place_name,
-                        user_ip,
-                        1 if has_weather else 0,
-                        1 if has_places else 0,
-                        weather_temp,
-                        weather_rain_prob,
-                        places_count,
-                        error,
-                        1 if success else 0,
-                        get_ist_now().isoformat()
+            logger.info(f"Saving query history: query='{query[:50]}...', place='{place_name}'")
+            async with self.database.writer() as db:
+                async with db.execute(
+                    INSERT_HISTORY_SQL,
+                    self._interaction_row(
+                        query, place_name, user_ip, has_weather, has_places,
+                        weather_temp, weather_rain_prob, places_count, error, success
                     )
-                )
+                ) as cursor:
+                    history_id = cursor.lastrowid
+                stats = await self._read_stats(db)
                 await db.commit()
-                cursor = await db.execute("SELECT last_insert_rowid()")
-                row = await cursor.fetchone()
-                history_id = row[0] if row else None
-                logger.info(f"Successfully saved query history with ID: {history_id}")
-                return history_id
+            self._stats = stats
+            logger.info(f"Successfully saved query history with ID: {history_id}")
+            return history_id
         except Exception as e:
-            logger.error(f"Error saving query history to {self.db_path}: {e}", exc_info=True)
+            logger.error(f"Error saving query history to {self.database.db_path}: {e}", exc_info=True)
             raise
     
+    async def save_interactions(self, interactions: List[Dict[str, Any]]) -> int:
+        """
+        Save many query interactions in a single transaction
+        
+        Each item takes the same keyword arguments as save_interaction.
+        Either all rows are written or none are.
+        
+        Returns:
+            Number of rows written
+        """
+        if not interactions:
+            return 0
+        
+        rows = [self._interaction_row(**interaction) for interaction in interactions]
+        try:
+            async with self.database.writer() as db:
+                await db.executemany(INSERT_HISTORY_SQL, rows)
+                stats = await self._read_stats(db)
+                await db.commit()
+            self._stats = stats
+            logger.info(f"Saved {len(rows)} query history rows")
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Error saving {len(rows)} query history rows to {self.database.db_path}: {e}", exc_info=True)
+            raise
+    
+    async def _fetch_page(
+        self,
+        conditions: List[str],
+        params: List[Any],
+        limit: int,
+        cursor: Optional[str],
+        fields: Optional[Iterable[str]]
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        # Newest first, paged by (created_ts, id) so every page is an index
+        # seek no matter how deep it is
+        if fields:
+            columns = list(dict.fromkeys(fields))
+            unknown = [column for column in columns if column not in HISTORY_FIELDS]
+            if unknown:
+                raise ValueError(f"Unknown history field(s): {', '.join(unknown)}")
+        else:
+            columns = list(HISTORY_FIELDS)
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        
+        conditions = list(conditions)
+        params = list(params)
+        if cursor:
+            conditions.append("(created_ts, id) < (?, ?)")
+            params.extend(decode_cursor(cursor))
+        
+        # id and created_ts lead every row so the next cursor can be built
+        selected = ["id", "created_ts"] + [column for column in columns if column not in ("id", "created_ts")]
+        sql = f"SELECT {', '.join(selected)} FROM query_history"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY created_ts DESC, id DESC LIMIT ?"
+        params.append(limit + 1)
+        
+        async with self.database.reader() as db:
+            rows = list(await db.execute_fetchall(sql, params))
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1][1], rows[-1][0])
+        
+        positions = [(column, selected.index(column), column in BOOLEAN_FIELDS) for column in columns]
+        results = [
+            {column: bool(row[index]) if is_bool else row[index] for column, index, is_bool in positions}
+            for row in rows
+        ]
+        return results, next_cursor
+    
     async def get_recent(
         self,
         limit: int = 10,
-        days: Optional[int] = None
-    ) -> List[Dict[str, Any]]:
-        """Get recent query history"""
-        async with aiosqlite.connect(self.db_path) as db:
-            query = """SELECT * FROM query_history"""
-            params = []
-            
-            if days:
-                cutoff_date = (get_ist_now() - timedelta(days=days)).isoformat()
-                query += " WHERE created_at >= ?"
-                params.append(cutoff_date)
-            
-            query += " ORDER BY created_at DESC LIMIT ?"
-            params.append(limit)
-            
-            cursor = await db.execute(query, params)
-            rows = await cursor.fetchall()
-            
-            columns = [description[0] for description in cursor.description]
-            
-            results = []
-            for row in rows:
-                row_dict = dict(zip(columns, row))
-                row_dict['has_weather'] = bool(row_dict.get('has_weather', 0))
-                row_dict['has_places'] = bool(row_dict.get('has_places', 0))
-                row_dict['success'] = bool(row_dict.get('success', 1))
-                results.append(row_dict)
-            
-            return results
+        days: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[Iterable[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Get recent query history, newest first
+        
+        Args:
+            limit: Page size (at most MAX_PAGE_SIZE)
+            days: Only include queries from the last N days
+            cursor: next_cursor from the previous page
+            fields: Columns to return (default: all of HISTORY_FIELDS)
+        
+        Returns:
+            (rows, next_cursor); next_cursor is None on the last page
+        """
+        conditions, params = [], []
+        if days:
+            conditions.append("created_ts >= ?")
+            params.append(to_epoch_ms(get_ist_now() - timedelta(days=days)))
+        return await self._fetch_page(conditions, params, limit, cursor, fields)
     
     async def get_by_place(
         self,
         place_name: str,
-        limit: int = 5
-    ) -> List[Dict[str, Any]]:
-        """Get query history for a specific place"""
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute(
-                """SELECT * FROM query_history 
-                   WHERE place_name = ? 
-                   ORDER BY created_at DESC 
-                   LIMIT ?""",
-                (place_name, limit)
-            )
-            rows = await cursor.fetchall()
-            
-            columns = [description[0] for description in cursor.description]
-            results = []
-            for row in rows:
-                row_dict = dict(zip(columns, row))
-                row_dict['has_weather'] = bool(row_dict.get('has_weather', 0))
-                row_dict['has_places'] = bool(row_dict.get('has_places', 0))
-                row_dict['success'] = bool(row_dict.get('success', 1))
-                results.append(row_dict)
-            
-            return results
+        limit: int = 5,
+        cursor: Optional[str] = None,
+        fields: Optional[Iterable[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get query history for a specific place, paged like get_recent"""
+        return await self._fetch_page(["place_name = ?"], [place_name], limit, cursor, fields)
     
     async def get_stats(self) -> Dict[str, Any]:
-        """Get query statistics"""
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute("SELECT COUNT(*) FROM query_history")
-            total = (await cursor.fetchone())[0]
-            
-            cursor = await db.execute("SELECT COUNT(*) FROM query_history WHERE success = 1")
-            successful = (await cursor.fetchone())[0]
-            
-            cursor = await db.execute("SELECT COUNT(DISTINCT place_name) FROM query_history WHERE place_name IS NOT NULL")
-            unique_places = (await cursor.fetchone())[0]
-            
-            return {
-                "total_queries": total or 0,
-                "successful_queries": successful or 0,
-                "unique_places": unique_places or 0
+        """Get query statistics (O(1): served from the maintained counters)"""
+        if self._stats is None:
+            async with self.database.reader() as db:
+                stats = await self._read_stats(db)
+            # A write may have refreshed the mirror while we were reading
+            if self._stats is None:
+                self._stats = stats
+        return dict(self._stats)
+    
+    async def get_analytics(
+        self,
+        granularity: str = "day",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        place_name: Optional[str] = None,
+        intent: Optional[str] = None,
+        group_by: Iterable[str] = ROLLUP_DIMENSIONS
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Time-bucketed query counts from the rollup tables
+        
+        Args:
+            granularity: "hour" or "day" (IST hours/days)
+            start: Include buckets containing or after this time (default: 48 hours / 30 days before end)
+            end: Include buckets starting before this time (default: now)
+            place_name: Only this place
+            intent: Only this intent (one of ROLLUP_INTENTS)
+            group_by: Dimensions kept in the result; the rest are summed over
+        
+        Returns:
+            (rows, truncated): one row per bucket (and per kept dimension),
+            oldest first, with query/success/error counts and average
+            temperature; truncated is True when more than
+            MAX_ANALYTICS_ROWS rows matched
+        """
+        if granularity not in ROLLUP_GRANULARITIES:
+            raise ValueError(f"Unknown granularity '{granularity}', expected one of {', '.join(ROLLUP_GRANULARITIES)}")
+        if intent is not None and intent not in ROLLUP_INTENTS:
+            raise ValueError(f"Unknown intent '{intent}', expected one of {', '.join(ROLLUP_INTENTS)}")
+        dimensions = list(dict.fromkeys(group_by))
+        unknown = [dimension for dimension in dimensions if dimension not in ROLLUP_DIMENSIONS]
+        if unknown:
+            raise ValueError(f"Unknown analytics dimension(s): {', '.join(unknown)}")
+        
+        table, size_ms = ROLLUP_GRANULARITIES[granularity]
+        end = end or get_ist_now()
+        start = start or end - ROLLUP_DEFAULT_RANGE[granularity]
+        if start >= end:
+            raise ValueError("start must be before end")
+        
+        conditions = ["bucket_ts >= ?", "bucket_ts < ?"]
+        params: List[Any] = [bucket_start(to_epoch_ms(start), size_ms), to_epoch_ms(end)]
+        if place_name is not None:
+            conditions.append("place_name = ?")
+            params.append(place_name)
+        if intent is not None:
+            conditions.append("intent = ?")
+            params.append(intent)
+        
+        keys = ["bucket_ts"] + dimensions
+        sql = (
+            f"SELECT {', '.join(keys)}, SUM(query_count), SUM(success_count), SUM(error_count), "
+            f"SUM(temp_sum), SUM(temp_count) FROM {table} "
+            f"WHERE {' AND '.join(conditions)} "
+            f"GROUP BY {', '.join(keys)} ORDER BY {', '.join(keys)} LIMIT ?"
+        )
+        params.append(MAX_ANALYTICS_ROWS + 1)
+        
+        async with self.database.reader() as db:
+            rows = list(await db.execute_fetchall(sql, params))
+        truncated = len(rows) > MAX_ANALYTICS_ROWS
+        rows = rows[:MAX_ANALYTICS_ROWS]
+        
+        results = []
+        for row in rows:
+            item: Dict[str, Any] = {
+                "bucket": datetime.fromtimestamp(row[0] / 1000, IST).isoformat(),
+                "bucket_ts": row[0]
             }
-
+            for index, dimension in enumerate(dimensions, start=1):
+                # Queries without a place are rolled up under ''
+                item[dimension] = row[index] if dimension != "place_name" or row[index] else None
+            query_count, success_count, error_count, temp_sum, temp_count = row[len(keys):]
+            item.update({
+                "query_count": query_count,
+                "success_count": success_count,
+                "error_count": error_count,
+                "avg_temperature": round(temp_sum / temp_count, 1) if temp_count else None
+            })
+            results.append(item)
+        return results, truncated
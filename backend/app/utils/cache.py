@@ -1,10 +1,13 @@
 """
 Caching utility for API responses to improve performance and reduce API calls.
-Implements time-based caching with configurable TTL (Time To Live).
+Implements bounded LRU caching with configurable TTL (Time To Live).
 """
-from typing import Optional, Dict, Any
-from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, Callable, Awaitable
+from collections import OrderedDict
 from functools import wraps
+import sys
+import time
+import asyncio
 import hashlib
 import json
 from app.utils.logger import setup_logger
@@ -12,18 +15,90 @@ from app.utils.logger import setup_logger
 logger = setup_logger(__name__)
 
 
+def _estimate_size(value: Any) -> int:
+    """Approximate memory footprint of a cached value in bytes"""
+    if hasattr(value, "model_dump_json"):
+        return sys.getsizeof(value) + len(value.model_dump_json())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_estimate_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            _estimate_size(k) + _estimate_size(v) for k, v in value.items()
+        )
+    return sys.getsizeof(value)
+
+
+class _CacheEntry:
+    __slots__ = ("value", "stale_at", "expires_at", "size", "retry_at")
+    
+    def __init__(self, value: Any, stale_at: float, expires_at: float, size: int):
+        self.value = value
+        self.stale_at = stale_at
+        self.expires_at = expires_at
+        self.size = size
+        self.retry_at = 0.0
+
+
 class ResponseCache:
-    """Simple in-memory cache with TTL (Time To Live) support"""
+    """
+    Bounded in-memory LRU cache with TTL (Time To Live) support
     
-    def __init__(self, default_ttl_seconds: int = 3600):
+    Each entry has a soft TTL, after which it is stale, and a hard TTL
+    (soft TTL + stale TTL), after which it is dropped. get() only returns
+    fresh values; get_or_load() also serves stale values while it
+    refreshes them in the background, and keeps serving them if the
+    refresh fails.
+    """
+    
+    def __init__(
+        self,
+        default_ttl_seconds: int = 3600,
+        max_entries: int = 2048,
+        max_bytes: int = 32 * 1024 * 1024,
+        default_stale_ttl_seconds: int = 0,
+        refresh_backoff_seconds: float = 30
+    ):
         """
-        Initialize cache with default TTL
+        Initialize cache with default TTL and size limits
         
         Args:
             default_ttl_seconds: Default cache expiration time in seconds (default: 1 hour)
+            max_entries: Maximum number of entries before LRU eviction
+            max_bytes: Approximate memory budget in bytes before LRU eviction
+            default_stale_ttl_seconds: How long past its TTL an entry may be served stale
+            refresh_backoff_seconds: Delay before retrying a failed background refresh
         """
-        self.cache: Dict[str, Dict[str, Any]] = {}
+        self.cache: "OrderedDict[str, _CacheEntry]" = OrderedDict()
         self.default_ttl = default_ttl_seconds
+        self.default_stale_ttl = default_stale_ttl_seconds
+        self.refresh_backoff = refresh_backoff_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_hits = 0
+        self.refresh_failures = 0
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.coalesced = 0
+        self._sweeper: Optional[asyncio.Task] = None
+    
+    def configure(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        stale_ttl_seconds: Optional[int] = None
+    ) -> None:
+        """Update limits, evicting entries if the cache is now over budget"""
+        if max_entries is not None:
+            self.max_entries = max_entries
+        if max_bytes is not None:
+            self.max_bytes = max_bytes
+        if stale_ttl_seconds is not None:
+            self.default_stale_ttl = stale_ttl_seconds
+        self._evict()
     
     def _generate_key(self, prefix: str, *args, **kwargs) -> str:
         """Generate cache key from arguments"""
@@ -40,25 +115,37 @@ class ResponseCache:
         
         Args:
             key: Cache key
-            
+        
         Returns:
             Cached value if exists and not expired, None otherwise
         """
-        if key not in self.cache:
+        entry = self._lookup(key)
+        if entry is None or time.monotonic() >= entry.stale_at:
+            self.misses += 1
             return None
         
-        entry = self.cache[key]
-        expires_at = entry.get('expires_at')
-        
-        if expires_at and datetime.now() > expires_at:
-            del self.cache[key]
+        self.cache.move_to_end(key)
+        self.hits += 1
+        logger.debug(f"Cache hit for key: {key}")
+        return entry.value
+    
+    def _lookup(self, key: str) -> Optional[_CacheEntry]:
+        # Returns fresh or stale entries; drops entries past their hard TTL
+        entry = self.cache.get(key)
+        if entry is not None and time.monotonic() >= entry.expires_at:
+            self._remove(key)
+            self.expirations += 1
             logger.debug(f"Cache expired for key: {key}")
             return None
-        
-        logger.debug(f"Cache hit for key: {key}")
-        return entry.get('value')
+        return entry
     
-    def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None) -> None:
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl_seconds: Optional[int] = None,
+        stale_ttl_seconds: Optional[int] = None
+    ) -> None:
         """
         Store value in cache with TTL
         
@@ -66,38 +153,277 @@ class ResponseCache:
             key: Cache key
             value: Value to cache
             ttl_seconds: Time to live in seconds (uses default if None)
+            stale_ttl_seconds: Extra time the value may be served stale (uses default if None)
         """
         ttl = ttl_seconds if ttl_seconds is not None else self.default_ttl
-        expires_at = datetime.now() + timedelta(seconds=ttl)
+        stale_ttl = stale_ttl_seconds if stale_ttl_seconds is not None else self.default_stale_ttl
+        size = _estimate_size(value)
         
-        self.cache[key] = {
-            'value': value,
-            'expires_at': expires_at,
-            'created_at': datetime.now()
-        }
+        if key in self.cache:
+            self._remove(key)
+        
+        if size > self.max_bytes:
+            logger.warning(f"Not caching key {key}: {size} bytes exceeds cache budget")
+            return
+        
+        now = time.monotonic()
+        self.cache[key] = _CacheEntry(value, now + ttl, now + ttl + stale_ttl, size)
+        self.total_bytes += size
+        self._evict()
         
         logger.debug(f"Cached value for key: {key} (TTL: {ttl}s)")
     
+    def _remove(self, key: str) -> None:
+        entry = self.cache.pop(key)
+        self.total_bytes -= entry.size
+    
+    def _evict(self) -> None:
+        # Least recently used entries sit at the front of the OrderedDict
+        while self.cache and (len(self.cache) > self.max_entries or self.total_bytes > self.max_bytes):
+            key, entry = self.cache.popitem(last=False)
+            self.total_bytes -= entry.size
+            self.evictions += 1
+            logger.debug(f"Evicted cache key: {key}")
+    
+    def purge_expired(self) -> int:
+        """Remove all expired entries, returning how many were removed"""
+        now = time.monotonic()
+        expired = [key for key, entry in self.cache.items() if now >= entry.expires_at]
+        for key in expired:
+            self._remove(key)
+        self.expirations += len(expired)
+        return len(expired)
+    
+    def start_sweeper(self, interval_seconds: float = 60) -> None:
+        """Start a background task that periodically removes expired entries"""
+        if self._sweeper is not None and not self._sweeper.done():
+            return
+        self._sweeper = asyncio.create_task(self._sweep(interval_seconds))
+    
+    async def stop_sweeper(self) -> None:
+        """Stop the background sweeper task"""
+        if self._sweeper is None:
+            return
+        self._sweeper.cancel()
+        try:
+            await self._sweeper
+        except asyncio.CancelledError:
+            pass
+        self._sweeper = None
+    
+    async def _sweep(self, interval_seconds: float) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                removed = self.purge_expired()
+                if removed:
+                    logger.debug(f"Swept {removed} expired cache entries")
+            except Exception as e:
+                logger.error(f"Cache sweep failed: {e}")
+    
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl_seconds: Optional[int] = None,
+        stale_ttl_seconds: Optional[int] = None
+    ) -> Optional[Any]:
+        """
+        Get value from cache, loading it at most once across concurrent callers
+        
+        The first miss for a key runs the loader in a task; concurrent misses
+        for the same key await that task instead of calling the upstream again.
+        A None result is returned to every waiter but not cached.
+        
+        A stale entry is returned immediately and refreshed in the background.
+        If the refresh fails (exception or None) the stale value is kept and
+        served until its hard TTL, with refreshes retried after a backoff.
+        
+        Args:
+            key: Cache key
+            loader: Coroutine function producing the value
+            ttl_seconds: Time to live in seconds (uses default if None)
+            stale_ttl_seconds: Extra time the value may be served stale (uses default if None)
+        
+        Returns:
+            Cached or freshly loaded value
+        """
+        entry = self._lookup(key)
+        if entry is not None:
+            self.cache.move_to_end(key)
+            now = time.monotonic()
+            if now < entry.stale_at:
+                self.hits += 1
+                return entry.value
+            
+            self.stale_hits += 1
+            if now >= entry.retry_at and key not in self._inflight:
+                logger.debug(f"Serving stale value and refreshing key: {key}")
+                self._start_load(key, loader, ttl_seconds, stale_ttl_seconds)
+            return entry.value
+        
+        self.misses += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._start_load(key, loader, ttl_seconds, stale_ttl_seconds)
+        else:
+            self.coalesced += 1
+            logger.debug(f"Joining in-flight load for key: {key}")
+        
+        # Shield so a cancelled caller does not abort the load for the others
+        return await asyncio.shield(task)
+    
+    def _start_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl_seconds: Optional[int],
+        stale_ttl_seconds: Optional[int]
+    ) -> asyncio.Task:
+        task = asyncio.ensure_future(self._load(key, loader, ttl_seconds, stale_ttl_seconds))
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._finish_load(key, done))
+        return task
+    
+    async def _load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl_seconds: Optional[int],
+        stale_ttl_seconds: Optional[int]
+    ) -> Optional[Any]:
+        try:
+            value = await loader()
+        except Exception:
+            self._defer_refresh(key)
+            raise
+        if value is None:
+            self._defer_refresh(key)
+            return None
+        self.set(key, value, ttl_seconds, stale_ttl_seconds)
+        return value
+    
+    def _defer_refresh(self, key: str) -> None:
+        # Keep serving the stale entry (if any) and back off before retrying
+        entry = self.cache.get(key)
+        if entry is not None:
+            entry.retry_at = time.monotonic() + self.refresh_backoff
+            self.refresh_failures += 1
+            logger.warning(f"Refresh failed for key {key}, serving stale value")
+    
+    def _finish_load(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Load failed for key {key}: {task.exception()}")
+    
     def clear(self) -> None:
         """Clear all cache entries"""
         self.cache.clear()
+        self.total_bytes = 0
         logger.info("Cache cleared")
     
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
-        now = datetime.now()
-        active_entries = sum(
-            1 for entry in self.cache.values()
-            if not entry.get('expires_at') or entry['expires_at'] > now
-        )
-        
+        lookups = self.hits + self.misses
         return {
             'total_entries': len(self.cache),
-            'active_entries': active_entries,
-            'expired_entries': len(self.cache) - active_entries
+            'max_entries': self.max_entries,
+            'approx_bytes': self.total_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'stale_hits': self.stale_hits,
+            'refresh_failures': self.refresh_failures,
+            'inflight_loads': len(self._inflight),
+            'coalesced_requests': self.coalesced
         }
 
 
+class GeocodingCache:
+    """
+    Two-tier cache for geocoding results.
+    
+    An in-memory LRU tier answers hot lookups; misses fall through to an
+    optional persistent store (e.g. GeocodingCacheRepository) that survives
+    restarts. The store holds plain dicts; serialize / deserialize convert
+    cached values to and from them.
+    """
+    
+    def __init__(
+        self,
+        store=None,
+        ttl_seconds: int = 30 * 24 * 3600,
+        max_entries: int = 1024,
+        serialize: Callable[[Any], Dict[str, Any]] = dict,
+        deserialize: Callable[[Dict[str, Any]], Any] = dict
+    ):
+        """
+        Initialize the geocoding cache
+        
+        Args:
+            store: Persistent tier with async get(key) / set(key, data, ttl_seconds)
+            ttl_seconds: Time to live for both tiers (default: 30 days)
+            max_entries: Maximum number of entries kept in memory
+            serialize: Turns a cached value into the dict written to the store
+            deserialize: Rebuilds a cached value from a dict read from the store
+        """
+        self.store = store
+        self.ttl = ttl_seconds
+        self.serialize = serialize
+        self.deserialize = deserialize
+        self.memory = ResponseCache(default_ttl_seconds=ttl_seconds, max_entries=max_entries)
+    
+    async def get(self, key: str) -> Optional[Any]:
+        """Get a location from memory, falling back to the persistent store"""
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        
+        if self.store is None:
+            return None
+        
+        try:
+            stored = await self.store.get(key)
+        except Exception as e:
+            logger.warning(f"Geocoding cache store read failed for {key}: {e}")
+            return None
+        if stored is None:
+            return None
+        
+        # The store keeps wall-clock expiry; carry the remaining lifetime over
+        data, expires_at = stored
+        value = self.deserialize(data)
+        self.memory.set(key, value, ttl_seconds=max(expires_at - time.time(), 0))
+        logger.debug(f"Geocoding cache hit (store) for key: {key}")
+        return value
+    
+    async def set(self, key: str, value: Any) -> None:
+        """Store a location in both tiers"""
+        self.memory.set(key, value)
+        if self.store is None:
+            return
+        try:
+            await self.store.set(key, self.serialize(value), self.ttl)
+        except Exception as e:
+            logger.warning(f"Geocoding cache store write failed for {key}: {e}")
+    
+    def start_sweeper(self, interval_seconds: float = 60) -> None:
+        """Start removing expired entries from the in-memory tier in the background"""
+        self.memory.start_sweeper(interval_seconds)
+    
+    async def stop_sweeper(self) -> None:
+        """Stop the in-memory tier's background sweeper"""
+        await self.memory.stop_sweeper()
+    
+    def clear(self) -> None:
+        """Clear the in-memory tier"""
+        self.memory.clear()
+
+
 weather_cache = ResponseCache(default_ttl_seconds=3600)  
 places_cache = ResponseCache(default_ttl_seconds=3600)  
 
@@ -109,7 +435,7 @@ def cached(prefix: str, ttl_seconds: int = 3600):
     Args:
         prefix: Cache key prefix
         ttl_seconds: Time to live in seconds
-        
+    
     Example:
         @cached("weather", ttl_seconds=3600)
         async def get_weather(lat, lon):
@@ -122,14 +448,11 @@ def cached(prefix: str, ttl_seconds: int = 3600):
             
             cache_key = cache._generate_key(prefix, *args, **kwargs)
             
-            cached_value = cache.get(cache_key)
-            if cached_value is not None:
-                return cached_value
-            
-            result = await func(*args, **kwargs)
-            cache.set(cache_key, result, ttl_seconds)
-            
-            return result
+            return await cache.get_or_load(
+                cache_key,
+                lambda: func(*args, **kwargs),
+                ttl_seconds
+            )
         
         return wrapper
     return decorator
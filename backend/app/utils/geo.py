@@ -0,0 +1,111 @@
+"""
+Geospatial helpers.
+Geohash encoding used to bucket nearby coordinates into shared cache keys,
+and great-circle distances.
+"""
+import math
+from typing import Optional
+import numpy as np
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(latitude: float, longitude: float, precision: int = 5) -> str:
+    """
+    Encode coordinates as a geohash
+    
+    Approximate cell sizes: precision 4 ~ 39 x 20 km, 5 ~ 4.9 x 4.9 km,
+    6 ~ 1.2 x 0.6 km.
+    
+    Args:
+        latitude: Latitude in degrees
+        longitude: Longitude in degrees
+        precision: Number of geohash characters
+        
+    Returns:
+        Geohash string of the given length
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    
+    while len(chars) < precision:
+        if even:
+            mid = (lon_range[0] + lon_range[1]) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lon_range[0] = mid
+            else:
+                bits <<= 1
+                lon_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits <<= 1
+                lat_range[1] = mid
+        even = not even
+        bit_count += 1
+        
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    
+    return "".join(chars)
+
+
+def spatial_key(latitude: float, longitude: float, precision: Optional[int]) -> str:
+    """
+    Build the location part of a cache key
+    
+    Args:
+        latitude: Latitude in degrees
+        longitude: Longitude in degrees
+        precision: Geohash precision; None or 0 keeps the raw coordinates
+        
+    Returns:
+        Geohash cell for the coordinates, or "lat:lon" when bucketing is disabled
+    """
+    if not precision:
+        return f"{latitude}:{longitude}"
+    return geohash_encode(latitude, longitude, precision)
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def haversine_km_array(latitude: float, longitude: float, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """
+    Great-circle distances from one point to many, in kilometres
+    
+    Args:
+        latitude: Latitude of the origin
+        longitude: Longitude of the origin
+        latitudes: Latitudes of the other points (NaN for unknown positions)
+        longitudes: Longitudes of the other points
+    
+    Returns:
+        Distances in kilometres; NaN where a position is unknown
+    """
+    phi1 = math.radians(latitude)
+    phi2 = np.radians(latitudes)
+    dphi = phi2 - phi1
+    dlambda = np.radians(longitudes - longitude)
+    a = np.sin(dphi / 2) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
@@ -0,0 +1,157 @@
+"""
+Incremental JSON decoding.
+
+Decodes the items of one array inside a top-level JSON object as the text
+arrives, so a large response can be processed (and abandoned) element by
+element instead of being loaded and decoded as a whole.
+"""
+import json
+from typing import Any, Dict, List
+
+_WHITESPACE = " \t\n\r"
+_NUMBER_CHARS = "0123456789.eE+-"
+
+
+class JSONArrayStream:
+    """
+    Streaming decoder for {"...": ..., "<field>": [item, item, ...], ...}
+    
+    feed() returns the items of the array completed so far; the other
+    top-level fields are collected in `fields` (those after the array only
+    once the whole document has been fed). Each item and field value is
+    decoded with the C-accelerated json scanner.
+    
+    Usage:
+        stream = JSONArrayStream("elements")
+        async for chunk in response.aiter_text():
+            for element in stream.feed(chunk):
+                ...
+        stream.close()
+    """
+    
+    def __init__(self, field: str):
+        self.field = field
+        self.fields: Dict[str, Any] = {}
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        # start -> key -> colon -> value -> after_value -> next_key ... ;
+        # first_item -> item -> next_item ... while inside the array. The
+        # next_* states follow a comma and require a key or value
+        self._state = "start"
+        self._key = None
+        self.done = False
+    
+    def feed(self, text: str) -> List[Any]:
+        """
+        Add the next piece of the document
+        
+        Args:
+            text: Decoded text, in order
+        
+        Returns:
+            Array items completed by this piece
+        """
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        items: List[Any] = []
+        while self._step(items):
+            pass
+        return items
+    
+    def close(self):
+        """Check that the whole document was fed; raises ValueError if it was cut short"""
+        if not self.done:
+            raise ValueError(f"Incomplete JSON document (stopped in state '{self._state}')")
+    
+    def _skip_whitespace(self) -> bool:
+        # True if a non-whitespace character is available
+        buffer, pos = self._buffer, self._pos
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        self._pos = pos
+        return pos < len(buffer)
+    
+    def _expect(self, char: str):
+        if self._buffer[self._pos] != char:
+            raise ValueError(f"Expected '{char}' at offset {self._pos}, got '{self._buffer[self._pos]}'")
+        self._pos += 1
+    
+    def _decode(self):
+        # A value that ends exactly at the end of the buffer may be cut short
+        # (e.g. the number 12 of 123), and so may a number followed by what
+        # can continue it (0 of 0.6), so wait for more text in those cases
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            return False, None
+        if end >= len(self._buffer):
+            return False, None
+        if isinstance(value, (int, float)) and self._buffer[end] in _NUMBER_CHARS:
+            return False, None
+        self._pos = end
+        return True, value
+    
+    def _step(self, items: List[Any]) -> bool:
+        # Advance the state machine by one token; False when more text is needed
+        if self.done or not self._skip_whitespace():
+            return False
+        
+        state = self._state
+        if state == "start":
+            self._expect("{")
+            self._state = "key"
+        elif state in ("key", "next_key"):
+            if state == "next_key" and self._buffer[self._pos] == "}":
+                raise ValueError(f"Trailing comma before '}}' at offset {self._pos}")
+            if self._buffer[self._pos] == "}":
+                self._pos += 1
+                self.done = True
+                return False
+            complete, key = self._decode()
+            if not complete:
+                return False
+            if not isinstance(key, str):
+                raise ValueError(f"Expected an object key at offset {self._pos}")
+            self._key = key
+            self._state = "colon"
+        elif state == "colon":
+            self._expect(":")
+            if self._key == self.field:
+                self._state = "array"
+            else:
+                self._state = "value"
+        elif state == "value":
+            complete, value = self._decode()
+            if not complete:
+                return False
+            self.fields[self._key] = value
+            self._state = "after_value"
+        elif state == "after_value":
+            if self._buffer[self._pos] == ",":
+                self._pos += 1
+                self._state = "next_key"
+            else:
+                self._expect("}")
+                self.done = True
+                return False
+        elif state == "array":
+            self._expect("[")
+            self._state = "first_item"
+        elif state in ("first_item", "item", "next_item"):
+            if state == "next_item" and self._buffer[self._pos] == "]":
+                raise ValueError(f"Trailing comma before ']' at offset {self._pos}")
+            if self._buffer[self._pos] == "]":
+                self._pos += 1
+                self._state = "after_value"
+                return True
+            if state == "item":
+                self._expect(",")
+                self._state = "next_item"
+                return True
+            complete, item = self._decode()
+            if not complete:
+                return False
+            items.append(item)
+            self._state = "item"
+        return True
@@ -0,0 +1,137 @@
+"""Microbenchmark: intent classifier vs. the previous keyword scans
+
+Checks that TourismAIAgent._parse_intent gives the same answers as the
+previous implementation (kept below as legacy_parse_intent) and compares
+their speed.
+
+Usage (from backend/):
+    python -m benchmarks.intent_classifier --queries 50000
+"""
+
+import argparse
+import random
+import time
+from typing import Tuple
+
+from app.agents.intent_classifier import INTENT_KEYWORDS, IntentClassifier, intent_classifier
+from app.agents.parent_agent import TourismAIAgent
+
+SAMPLE_QUERIES = [
+    "I'm going to go to Bangalore, let's plan my trip.",
+    "I'm going to go to Bangalore, what is the temperature there",
+    "I'm going to go to Bangalore, what is the temperature there? And what are the places I can visit?",
+    "What is the weather in Paris?",
+    "Give me tour plan for Hyderabad",
+    "show me museums and parks in Tokyo",
+    "will it rain in Mumbai tomorrow",
+    "Tell me about Rome",
+    "where can I eat in Delhi",
+    "Kyoto",
+]
+
+WORDS = [
+    "the", "and", "both", "also", "weather", "temp", "visiting", "trip", "what", "can", "show", "me",
+    "places", "to", "go", "in", "Paris", "museum", "raining", "sunny", "hotel", "food", "seeing",
+    "planning", "where", "should", "degrees", "windy", "landmarks", "vacation", "I", "am", "xyz"
+]
+
+
+def legacy_parse_intent(query: str) -> Tuple[bool, bool]:
+    query_lower = query.lower()
+    
+    weather_keywords = [
+        'temperature', 'temp', 'weather', 'rain', 'rainfall', 'precipitation',
+        'how hot', 'how cold', 'forecast', 'climate', 'sunny', 'cloudy',
+        'snow', 'wind', 'humidity', 'degrees', 'celsius', 'fahrenheit',
+        'chance of rain', 'will it rain', 'is it raining'
+    ]
+    wants_weather = any(keyword in query_lower for keyword in weather_keywords)
+    
+    places_keywords = [
+        'places', 'place', 'visit', 'visiting', 'visits', 'attractions',
+        'attraction', 'see', 'tourist', 'tourism', 'sightseeing',
+        'monuments', 'monument', 'museums', 'museum', 'landmarks',
+        'things to do', 'what to see', 'where to go', 'where to visit',
+        'sights', 'parks', 'temples', 'palaces', 'beaches', 'locations',
+        'recommendations', 'suggestions', 'must see', 'top places'
+    ]
+    wants_places = any(keyword in query_lower for keyword in places_keywords)
+    
+    if not wants_weather and not wants_places:
+        trip_keywords = ['plan', 'planning', 'trip', 'going', 'visit', 'travel', 'traveling', 'vacation']
+        if any(keyword in query_lower for keyword in trip_keywords):
+            wants_places = True
+        elif any(phrase in query_lower for phrase in ['what can', 'what should', 'what are', 'where can', 'show me']):
+            wants_places = True
+    
+    if 'and' in query_lower or 'both' in query_lower or 'also' in query_lower:
+        if wants_weather or wants_places:
+            if 'temperature' in query_lower or 'weather' in query_lower:
+                wants_weather = True
+            if 'places' in query_lower or 'visit' in query_lower or 'attractions' in query_lower:
+                wants_places = True
+    
+    return wants_weather, wants_places
+
+
+def build_corpus(size: int, seed: int = 7):
+    rng = random.Random(seed)
+    corpus = list(SAMPLE_QUERIES)
+    while len(corpus) < size:
+        corpus.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 14))))
+    return corpus
+
+
+def scan_categories(categories, query: str):
+    """Per-category substring scans, the way the legacy code matches"""
+    query_lower = query.lower()
+    return {name for name, keywords in categories.items() if any(keyword in query_lower for keyword in keywords)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark intent parsing")
+    parser.add_argument("--queries", type=int, default=50000, help="Number of queries (default: 50000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per implementation, best is kept")
+    args = parser.parse_args()
+    
+    corpus = build_corpus(args.queries)
+    agent = TourismAIAgent.__new__(TourismAIAgent)
+    agent.intent_classifier = intent_classifier
+    
+    mismatches = [q for q in corpus if legacy_parse_intent(q) != agent._parse_intent(q)]
+    print(f"{len(corpus)} queries, {len(mismatches)} mismatches")
+    for query in mismatches[:10]:
+        print(f"  {query!r}: legacy={legacy_parse_intent(query)} new={agent._parse_intent(query)}")
+    
+    # Queries without any keyword are the legacy worst case: every list is scanned
+    plain = ["Tell me about the city of Bangalore in Karnataka India please"] * len(corpus)
+    for title, queries in (("mixed queries", corpus), ("queries without keywords", plain)):
+        print(f"\n_parse_intent, {title}:")
+        for label, parse in (("legacy", legacy_parse_intent), ("classifier", agent._parse_intent)):
+            _report(label, parse, queries, args.repeat)
+    
+    # Cost of extra intent categories (e.g. food, hotels), 10 keywords each
+    for extra in (2, 10):
+        categories = {name: list(keywords) for name, keywords in INTENT_KEYWORDS.items()}
+        for index in range(extra):
+            categories[f"extra{index}"] = [f"kw{index}x{n}" for n in range(10)]
+        classifier = IntentClassifier(categories)
+        print(f"\nAll categories plus {extra} extra:")
+        _report("scans", lambda q: scan_categories(categories, q), corpus, args.repeat)
+        _report("classifier", classifier.classify, corpus, args.repeat)
+
+
+def _report(label: str, parse, queries, repeat: int):
+    best = min(_time(parse, queries) for _ in range(repeat))
+    print(f"{label:>12}: {best:.3f}s ({best / len(queries) * 1e6:.2f} us/query)")
+
+
+def _time(parse, corpus) -> float:
+    started = time.perf_counter()
+    for query in corpus:
+        parse(query)
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Benchmark: Overpass queries with mirror failover and hedging vs. a single endpoint
+
+Starts local stub Overpass servers with injected latency and errors and runs
+the same places searches through PlacesClient three ways: primary only (the
+previous behaviour), failover without hedging, and hedged. Reports latency
+percentiles, failed searches and how many upstream requests were sent.
+
+The default primary answers most queries quickly but has a slow tail and
+occasional 429s, like the public instance; the mirror is a little slower
+but steady. Injected times are scaled down (--scale) so a run takes
+seconds; mirror cooldowns after errors are not, so they weigh more here.
+
+Usage (from backend/):
+    python -m benchmarks.overpass_hedging --queries 200
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from app.clients.http_transport import UpstreamTransport
+from app.clients.overpass_mirrors import OverpassMirrors
+from app.clients.overpass_planner import plan_search
+from app.clients.places_client import PlacesClient
+
+LATITUDE, LONGITUDE = 12.97194, 77.59369
+
+
+class StubProfile:
+    """Injected behaviour of one stub server (seconds before scaling)"""
+    
+    def __init__(self, base: float, jitter: float, tail_rate: float, tail: Tuple[float, float], error_rate: float):
+        self.base = base
+        self.jitter = jitter
+        self.tail_rate = tail_rate
+        self.tail = tail
+        self.error_rate = error_rate
+    
+    def draw(self, rng: random.Random, scale: float) -> Tuple[float, Optional[int]]:
+        if rng.random() < self.error_rate:
+            return 0.05 * scale, 429
+        delay = self.base + rng.uniform(0, self.jitter)
+        if rng.random() < self.tail_rate:
+            delay = rng.uniform(*self.tail)
+        return delay * scale, None
+
+
+PROFILES = {
+    # Mostly fast, 8% of queries take 10-40 s, 4% are rejected with 429
+    "primary": StubProfile(base=1.0, jitter=1.0, tail_rate=0.08, tail=(10, 40), error_rate=0.04),
+    # Slower on average, rarely slow
+    "mirror": StubProfile(base=1.5, jitter=1.5, tail_rate=0.01, tail=(10, 20), error_rate=0.01),
+}
+
+
+def overpass_body(count: int = 12) -> bytes:
+    elements = [
+        {
+            "type": "node", "id": i, "lat": LATITUDE + 0.001 * i, "lon": LONGITUDE,
+            "tags": {"name": f"Place {i}", "tourism": "attraction"}
+        }
+        for i in range(count)
+    ]
+    return json.dumps({"version": 0.6, "generator": "stub", "elements": elements}).encode()
+
+
+def start_stub(profile: StubProfile, scale: float, seed: int) -> Tuple[ThreadingHTTPServer, Dict[str, int]]:
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    counts = {"requests": 0}
+    body = overpass_body()
+    
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        
+        def log_message(self, *args):
+            pass
+        
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            with lock:
+                counts["requests"] += 1
+                delay, status = profile.draw(rng, scale)
+            time.sleep(delay)
+            payload = b"rate limited" if status else body
+            try:
+                self.send_response(status or 200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+            except (BrokenPipeError, ConnectionResetError):
+                # The client cancelled this (hedged) query
+                pass
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, counts
+
+
+async def run_variant(urls: List[str], hedging: bool, queries: int, concurrency: int, scale: float) -> Tuple[List[float], int]:
+    upstream = UpstreamTransport()
+    mirrors = OverpassMirrors(
+        [(url, upstream.client_for(url, timeout=60 * scale)) for url in urls],
+        hedging=hedging,
+        initial_delay=4 * scale,
+        min_delay=1 * scale,
+        max_delay=15 * scale
+    )
+    client = PlacesClient(base_url=urls[0], mirrors=mirrors)
+    plan = plan_search(LATITUDE, LONGITUDE, "city")
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    failed = 0
+    
+    async def one():
+        nonlocal failed
+        async with semaphore:
+            started = time.perf_counter()
+            places = await client._fetch_places(LATITUDE, LONGITUDE, "bench", plan)
+            latencies.append(time.perf_counter() - started)
+            failed += places is None
+    
+    await asyncio.gather(*(one() for _ in range(queries)))
+    await upstream.close()
+    return latencies, failed
+
+
+def percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark hedged Overpass queries against local stub servers")
+    parser.add_argument("--queries", type=int, default=200, help="Searches per variant")
+    parser.add_argument("--concurrency", type=int, default=10, help="Searches in flight at once")
+    parser.add_argument("--scale", type=float, default=0.05, help="Multiplier for the injected latencies")
+    args = parser.parse_args()
+    
+    servers = {name: start_stub(profile, args.scale, seed=i) for i, (name, profile) in enumerate(PROFILES.items())}
+    urls = {name: f"http://127.0.0.1:{server.server_address[1]}/api/interpreter" for name, (server, _) in servers.items()}
+    # Quiet the per-query error logs of the stubs' injected failures
+    logging.getLogger("app.clients.places_client").setLevel(logging.CRITICAL)
+    
+    variants = [
+        ("primary only", [urls["primary"]], False),
+        ("failover", [urls["primary"], urls["mirror"]], False),
+        ("hedged", [urls["primary"], urls["mirror"]], True),
+    ]
+    print(f"{'variant':<14} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} {'max s':>7} {'failed':>6} {'upstream requests':>18}")
+    for label, variant_urls, hedging in variants:
+        before = sum(counts["requests"] for _, counts in servers.values())
+        latencies, failed = await run_variant(variant_urls, hedging, args.queries, args.concurrency, args.scale)
+        sent = sum(counts["requests"] for _, counts in servers.values()) - before
+        # Report in unscaled seconds
+        unscaled = [latency / args.scale for latency in latencies]
+        print(
+            f"{label:<14} {percentile(unscaled, 50):>7.1f} {percentile(unscaled, 95):>7.1f} "
+            f"{percentile(unscaled, 99):>7.1f} {max(unscaled):>7.1f} {failed:>6} {sent:>18}"
+        )
+    
+    for server, _ in servers.values():
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
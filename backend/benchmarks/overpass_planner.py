@@ -0,0 +1,118 @@
+"""Benchmark: planned Overpass searches vs. the previous single query
+
+For each recorded location, sends the previous query (12 node/way/relation
+clauses, 25 km around, "out center 30") and then the planned nwr searches
+the way PlacesClient runs them, and reports round-trip time, payload size,
+returned elements and named places. Overpass does not report its own
+processing time, so round-trip time is the measure of server time; run it
+close to the server, or compare the totals rather than single queries.
+
+Usage (from backend/, needs network access to Overpass):
+    python -m benchmarks.overpass_planner
+    python -m benchmarks.overpass_planner --dry-run   # print the queries only
+"""
+
+import argparse
+import asyncio
+import time
+from typing import List, Tuple
+
+import httpx
+
+from app.clients.overpass_planner import plan_search
+from app.clients.places_client import TOURIST_TAG_FILTERS, PlacesClient
+from app.clients.places_ranking import select_candidates
+
+# (name, latitude, longitude, place type, bounding box as south, west, north, east)
+RECORDED_LOCATIONS = [
+    ("Bangalore", 12.97194, 77.59369, "city", None),
+    ("Paris", 48.85341, 2.3488, "city", None),
+    ("Tokyo", 35.6895, 139.69171, "city", None),
+    ("Hyderabad", 17.38405, 78.45636, "city", None),
+    ("Mysore", 12.29791, 76.63925, "city", None),
+    ("Hampi", 15.335, 76.46, "village", [15.3151, 76.4400, 15.3551, 76.4800]),
+    ("Ooty", 11.41102, 76.69521, "town", [11.3700, 76.6500, 11.4500, 76.7400]),
+    ("Eiffel Tower", 48.85826, 2.29450, "landmark", [48.8574, 2.2931, 48.8590, 2.2959]),
+    ("Taj Mahal", 27.17500, 78.04210, "landmark", [27.1737, 78.0401, 27.1763, 78.0441]),
+    ("Goa", 15.3, 74.08333, "region", [14.8981, 73.6759, 15.8010, 74.3370]),
+]
+
+
+def legacy_query(latitude: float, longitude: float, radius: int = 25000, limit: int = 30) -> str:
+    clauses = []
+    for key, pattern in TOURIST_TAG_FILTERS:
+        tag_filter = f'["{key}"~"{pattern}"]' if pattern else f'["{key}"]'
+        for element_type in ("node", "way", "relation"):
+            clauses.append(f"  {element_type}{tag_filter}(around:{radius},{latitude},{longitude});")
+    return "[out:json][timeout:30];\n(\n" + "\n".join(clauses) + f"\n);\nout center {limit};"
+
+
+async def run_query(client: httpx.AsyncClient, url: str, query: str) -> Tuple[float, int, list]:
+    started = time.perf_counter()
+    response = await client.post(url, content=query, headers={"Content-Type": "text/plain"})
+    elapsed = time.perf_counter() - started
+    response.raise_for_status()
+    return elapsed, len(response.content), response.json().get("elements", [])
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark Overpass places queries")
+    parser.add_argument("--url", default="https://overpass-api.de/api/interpreter", help="Overpass interpreter URL")
+    parser.add_argument("--pause", type=float, default=2.0, help="Seconds between requests (Overpass rate limits)")
+    parser.add_argument("--dry-run", action="store_true", help="Print the queries without sending them")
+    args = parser.parse_args()
+    
+    places_client = PlacesClient(base_url=args.url)
+    totals = {"legacy": [0.0, 0, 0], "planned": [0.0, 0, 0]}
+    
+    if not args.dry_run:
+        print(f"{'location':<14} {'variant':<8} {'requests':>8} {'time s':>8} {'bytes':>10} {'elements':>8} {'places':>6}")
+    for name, latitude, longitude, place_type, bounding_box in RECORDED_LOCATIONS:
+        plan = plan_search(latitude, longitude, place_type, bounding_box)
+        if args.dry_run:
+            legacy = legacy_query(latitude, longitude)
+            print(f"\n{name} ({plan.profile}): legacy query {len(legacy)} chars, 12 clauses")
+            for step in plan.steps:
+                query = places_client._build_overpass_query(step.area, limit=places_client.fetch_limit)
+                print(f"  {step.label}: {len(query)} chars\n{query}")
+            continue
+        
+        # Previous behaviour: one query, every named place within 30 km kept
+        elapsed, size, elements = await run_query(places_client.client, args.url, legacy_query(latitude, longitude))
+        places: List = select_candidates(elements, latitude, longitude, 30, set())
+        _report(totals, name, "legacy", 1, elapsed, size, len(elements), len(places))
+        await asyncio.sleep(args.pause)
+        
+        # Planned: stop at the first step with enough places
+        places, seen, requests, elapsed, size, element_count = [], set(), 0, 0.0, 0, 0
+        for step in plan.steps:
+            step_elapsed, step_size, elements = await run_query(
+                places_client.client, args.url,
+                places_client._build_overpass_query(step.area, limit=places_client.fetch_limit)
+            )
+            requests += 1
+            elapsed += step_elapsed
+            size += step_size
+            element_count += len(elements)
+            places.extend(select_candidates(elements, latitude, longitude, plan.max_distance_km, seen))
+            await asyncio.sleep(args.pause)
+            if len(places) >= plan.min_results:
+                break
+        _report(totals, name, "planned", requests, elapsed, size, element_count, len(places))
+    
+    if not args.dry_run:
+        print()
+        for variant, (elapsed, size, places) in totals.items():
+            print(f"{variant:>8} total: {elapsed:.2f}s, {size / 1024:.0f} KiB, {places} places")
+    await places_client.close()
+
+
+def _report(totals, name: str, variant: str, requests: int, elapsed: float, size: int, elements: int, places: int):
+    totals[variant][0] += elapsed
+    totals[variant][1] += size
+    totals[variant][2] += places
+    print(f"{name:<14} {variant:<8} {requests:>8} {elapsed:>8.2f} {size:>10} {elements:>8} {places:>6}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
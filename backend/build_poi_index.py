@@ -0,0 +1,221 @@
+"""Build the offline POI index used by the offline places backend
+
+Reads an OSM extract (.osm.pbf, needs the optional `osmium` package) or an
+Overpass JSON dump (`[out:json]` with `out center`), keeps the elements that
+match the same tourism/historic/leisure/place_of_worship filters as the
+Overpass query, and writes a grid-bucketed SQLite index.
+
+Usage:
+    python build_poi_index.py karnataka-latest.osm.pbf --output poi_index.db
+    python build_poi_index.py overpass_dump.json --output poi_index.db
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+from app.clients.places_client import matches_tourist_filters, place_type_from_tags
+from app.clients.places_ranking import CANDIDATE_TAGS
+from app.clients.offline_places_client import POI_INDEX_SCHEMA, CELL_DEGREES, grid_cell
+
+# POIs inserted per executemany
+BATCH_SIZE = 5000
+
+
+def iter_overpass_json(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield elements from an Overpass JSON dump"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    
+    for element in data.get("elements", []):
+        if "lat" not in element and "center" not in element and "bounds" in element:
+            bounds = element["bounds"]
+            element["center"] = {
+                "lat": (bounds["minlat"] + bounds["maxlat"]) / 2,
+                "lon": (bounds["minlon"] + bounds["maxlon"]) / 2
+            }
+        yield element
+
+
+def read_osm_pbf(path: str, add: Callable[[Dict[str, Any]], None]):
+    """
+    Pass matching nodes and ways from an .osm.pbf extract to add() as they are read
+    
+    Ways are placed at the centroid of their nodes. Relations are skipped,
+    as their geometry needs a multi-pass read.
+    """
+    try:
+        import osmium
+    except ImportError:
+        raise SystemExit("Reading .osm.pbf files requires the 'osmium' package: pip install osmium")
+    
+    class Handler(osmium.SimpleHandler):
+        def node(self, n):
+            tags = dict(n.tags)
+            if "name" in tags and matches_tourist_filters(tags):
+                add({
+                    "type": "node",
+                    "id": n.id,
+                    "lat": n.location.lat,
+                    "lon": n.location.lon,
+                    "tags": tags
+                })
+        
+        def way(self, w):
+            tags = dict(w.tags)
+            if "name" not in tags or not matches_tourist_filters(tags):
+                return
+            points = [(node.location.lat, node.location.lon) for node in w.nodes if node.location.valid()]
+            if not points:
+                return
+            add({
+                "type": "way",
+                "id": w.id,
+                "center": {
+                    "lat": sum(p[0] for p in points) / len(points),
+                    "lon": sum(p[1] for p in points) / len(points)
+                },
+                "tags": tags
+            })
+    
+    Handler().apply_file(path, locations=True)
+
+
+class PoiIndexWriter:
+    """
+    Writes matching elements to a new POI index in batches
+    
+    The index is written to a temporary file and moved into place by
+    finish(), so a running server never sees a half-built index. Rows are
+    inserted every BATCH_SIZE POIs, so memory use does not grow with the
+    size of the extract.
+    
+    Usage:
+        writer = PoiIndexWriter("poi_index.db", source="extract.osm.pbf")
+        for element in elements:
+            writer.add(element)
+        count = writer.finish()
+    """
+    
+    def __init__(self, output_path: str, source: str):
+        self.output_path = output_path
+        self.source = source
+        self.tmp_path = f"{output_path}.tmp"
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+        
+        self.db = sqlite3.connect(self.tmp_path)
+        for statement in POI_INDEX_SCHEMA:
+            self.db.execute(statement)
+        self.rows: List[Tuple] = []
+        self.count = 0
+    
+    def add(self, element: Dict[str, Any]):
+        tags = element.get("tags", {})
+        name = tags.get("name")
+        if not name or not matches_tourist_filters(tags):
+            return
+        
+        # Nodes carry lat/lon, ways and relations a center; 0.0 is a valid coordinate
+        latitude, longitude = element.get("lat"), element.get("lon")
+        if latitude is None or longitude is None:
+            center = element.get("center") or {}
+            latitude, longitude = center.get("lat"), center.get("lon")
+        if latitude is None or longitude is None:
+            return
+        
+        cell_lat, cell_lon = grid_cell(latitude, longitude)
+        self.rows.append((
+            element.get("type"),
+            element.get("id"),
+            name,
+            place_type_from_tags(tags),
+            tags.get("description"),
+            latitude,
+            longitude,
+            cell_lat,
+            cell_lon,
+            json.dumps({key: tags[key] for key in CANDIDATE_TAGS if key in tags}, ensure_ascii=False)
+        ))
+        if len(self.rows) >= BATCH_SIZE:
+            self._flush()
+    
+    def _flush(self):
+        self.db.executemany(
+            """INSERT INTO pois
+               (osm_type, osm_id, name, type, description, latitude, longitude, cell_lat, cell_lon, tags)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            self.rows
+        )
+        self.count += len(self.rows)
+        self.rows = []
+    
+    def finish(self) -> int:
+        """Write the remaining rows and the metadata, and move the index into place"""
+        self._flush()
+        self.db.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [
+                ("source", self.source),
+                ("built_at", str(int(time.time()))),
+                ("cell_degrees", str(CELL_DEGREES)),
+                ("poi_count", str(self.count))
+            ]
+        )
+        self.db.commit()
+        self.db.execute("VACUUM")
+        self.db.close()
+        
+        os.replace(self.tmp_path, self.output_path)
+        return self.count
+    
+    def abort(self):
+        """Discard the partly written index"""
+        self.db.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+def build_poi_index(elements: Iterable[Dict[str, Any]], output_path: str, source: str) -> int:
+    """
+    Write matching elements to a new POI index
+    
+    Returns:
+        Number of POIs written
+    """
+    writer = PoiIndexWriter(output_path, source)
+    try:
+        for element in elements:
+            writer.add(element)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.finish()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the offline POI index from an OSM extract")
+    parser.add_argument("input", help="Path to an .osm.pbf extract or an Overpass JSON dump")
+    parser.add_argument("--output", default="poi_index.db", help="Index file to write (default: poi_index.db)")
+    args = parser.parse_args()
+    
+    started = time.perf_counter()
+    source = os.path.basename(args.input)
+    if args.input.endswith(".pbf"):
+        writer = PoiIndexWriter(args.output, source)
+        try:
+            read_osm_pbf(args.input, writer.add)
+        except BaseException:
+            writer.abort()
+            raise
+        count = writer.finish()
+    else:
+        count = build_poi_index(iter_overpass_json(args.input), args.output, source)
+    print(f"Wrote {count} POIs to {args.output} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
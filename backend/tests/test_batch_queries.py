@@ -0,0 +1,133 @@
+"""TourismAIAgent.process_batch: shared lookups per place, answers per query"""
+
+import asyncio
+from app.agents.parent_agent import TourismAIAgent
+from app.agents.places_agent import PlacesAgent
+from app.agents.weather_agent import WeatherAgent
+from app.models.schemas import LocationResponse, PlaceInfo, WeatherResponse
+
+
+class FakeGeocoding:
+    """Resolves every place except "Nowhere"; tracks how many lookups overlap"""
+    
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+    
+    async def get_coordinates(self, place_name):
+        self.calls.append(place_name)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        if place_name.lower() == "nowhere":
+            return None
+        return LocationResponse(
+            latitude=48.8566, longitude=2.3522, display_name=f"{place_name}, Somewhere", place_id=1
+        )
+
+
+class FakeWeather:
+    def __init__(self):
+        self.calls = 0
+    
+    async def get_weather(self, latitude, longitude, place_name):
+        self.calls += 1
+        return WeatherResponse(temperature=18.0, rain_probability=40.0, place_name=place_name)
+
+
+class FakePlaces:
+    def __init__(self):
+        self.calls = []
+    
+    async def get_tourist_places(self, latitude, longitude, place_name, limit=5, offset=0, **kwargs):
+        self.calls.append(offset)
+        return [PlaceInfo(name=f"Place {i}", type="Museum") for i in range(offset, offset + limit)]
+
+
+def make_agent(delay: float = 0.0):
+    geocoding, weather, places = FakeGeocoding(delay), FakeWeather(), FakePlaces()
+    agent = TourismAIAgent(WeatherAgent(geocoding, weather), PlacesAgent(geocoding, places), geocoding)
+    return agent, geocoding, weather, places
+
+
+def answers(responses):
+    return [response.model_dump(exclude={"timestamp"}) for response in responses]
+
+
+def test_queries_for_one_place_share_a_lookup():
+    queries = [
+        ("What's the weather in Paris?", None, 0),
+        ("Places to visit in paris", None, 0),
+        ("temperature and places in  PARIS", None, 0),
+    ]
+    
+    async def scenario():
+        agent, geocoding, weather, places = make_agent()
+        responses = await agent.process_batch(queries)
+        return responses, geocoding.calls, weather.calls, places.calls
+    
+    responses, geocoding_calls, weather_calls, places_calls = asyncio.run(scenario())
+    assert len(geocoding_calls) == 1
+    assert weather_calls == 1
+    assert places_calls == [0]
+    # Each answer keeps to its own query's intent and spelling of the place
+    assert [(r.place_name, r.weather is not None, bool(r.places)) for r in responses] == [
+        ("Paris", True, False),
+        ("paris", False, True),
+        ("PARIS", True, True),
+    ]
+    assert responses[0].weather.place_name == "Paris"
+
+
+def test_batch_answers_match_single_queries():
+    queries = [
+        ("What's the weather in Paris?", None, 0),
+        ("hello there", None, 0),
+        ("weather in Nowhere", None, 0),
+        ("Places to visit in Paris", None, 0),
+        ("anything", "Hyderabad", 0),
+        ("Places to visit in Paris", None, 5),
+    ]
+    
+    async def scenario():
+        batch_agent = make_agent()[0]
+        single_agent = make_agent()[0]
+        batch = await batch_agent.process_batch(queries)
+        single = [await single_agent.process_query(query, place, offset) for query, place, offset in queries]
+        return batch, single
+    
+    batch, single = asyncio.run(scenario())
+    assert answers(batch) == answers(single)
+    assert [response.error for response in batch] == [
+        None, "PLACE_NOT_FOUND", "PLACE_NOT_FOUND", None, None, None
+    ]
+
+
+def test_different_pages_of_one_place_are_fetched_separately():
+    queries = [("Places to visit in Paris", None, 0), ("Places to visit in Paris", None, 5)]
+    
+    async def scenario():
+        agent, _, _, places = make_agent()
+        responses = await agent.process_batch(queries)
+        return responses, places.calls
+    
+    responses, places_calls = asyncio.run(scenario())
+    assert sorted(places_calls) == [0, 5]
+    assert [response.places[0].name for response in responses] == ["Place 0", "Place 5"]
+
+
+def test_distinct_places_respect_max_concurrency():
+    queries = [(f"weather in City{i}", None, 0) for i in range(8)]
+    
+    async def scenario():
+        agent, geocoding, _, _ = make_agent(delay=0.02)
+        responses = await agent.process_batch(queries, max_concurrency=3)
+        return responses, geocoding
+    
+    responses, geocoding = asyncio.run(scenario())
+    assert all(response.success for response in responses)
+    assert len(geocoding.calls) == 8
+    assert geocoding.max_active == 3
@@ -0,0 +1,73 @@
+"""HistoryArchiver: archive, delete and keep the counters of expired history"""
+
+import asyncio
+import gzip
+import json
+from datetime import timedelta
+from app.config import Settings
+from app.database.connection import close_db, init_db
+from app.repositories.history_archiver import HistoryArchiver
+from app.repositories.history_repository import INSERT_HISTORY_SQL, HistoryRepository, get_ist_now, to_epoch_ms
+
+
+def history_row(query, created):
+    return (query, "Paris", None, 1, 0, 21.0, 10.0, 0, None, 1, created.isoformat(), to_epoch_ms(created))
+
+
+def archive_pass(tmp_path, old_count, recent_count, batch_size):
+    now = get_ist_now()
+    rows = [history_row(f"old{i}", now - timedelta(days=30, minutes=i)) for i in range(old_count)]
+    rows += [history_row(f"new{i}", now - timedelta(days=1, minutes=i)) for i in range(recent_count)]
+    
+    async def scenario():
+        database = await init_db(Settings(
+            database_url=f"sqlite:///{tmp_path / 'history.db'}", history_retention_days=7
+        ))
+        try:
+            async with database.writer() as db:
+                await db.executemany(INSERT_HISTORY_SQL, rows)
+                await db.commit()
+            archiver = HistoryArchiver(database, str(tmp_path / "archive"), retention_days=7, batch_size=batch_size)
+            archived = await archiver.run_once()
+            again = await archiver.run_once()
+            repository = HistoryRepository(database)
+            remaining, _ = await repository.get_recent(limit=100, fields=["query"])
+            stats = await repository.get_stats()
+            return archiver, archived, again, remaining, stats
+        finally:
+            await close_db()
+    
+    return asyncio.run(scenario())
+
+
+def read_archive(path):
+    with gzip.open(path, "rt", encoding="utf-8") as archive:
+        return [json.loads(line) for line in archive]
+
+
+def test_expired_rows_are_archived_then_deleted(tmp_path):
+    archiver, archived, again, remaining, stats = archive_pass(tmp_path, old_count=7, recent_count=3, batch_size=3)
+    
+    assert archived == 7
+    assert again == 0
+    assert sorted(row["query"] for row in remaining) == ["new0", "new1", "new2"]
+    # One gzip member per batch, read back as a single stream, oldest first
+    records = read_archive(archiver.last_archive)
+    assert [record["query"] for record in records] == [f"old{i}" for i in reversed(range(7))]
+    assert records[0]["has_weather"] == 1 and records[0]["place_name"] == "Paris"
+    assert archiver.get_stats()["archived"] == 7
+
+
+def test_archived_rows_stay_in_the_counters(tmp_path):
+    _, _, _, _, stats = archive_pass(tmp_path, old_count=4, recent_count=2, batch_size=10)
+    
+    assert stats == {"total_queries": 6, "successful_queries": 6, "unique_places": 1}
+
+
+def test_nothing_to_archive_writes_no_file(tmp_path):
+    archiver, archived, _, remaining, _ = archive_pass(tmp_path, old_count=0, recent_count=2, batch_size=10)
+    
+    assert archived == 0
+    assert archiver.last_archive is None
+    assert not (tmp_path / "archive").exists()
+    assert len(remaining) == 2
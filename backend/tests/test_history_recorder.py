@@ -0,0 +1,96 @@
+"""HistoryRecorder: batching, flush and overflow behaviour"""
+
+import asyncio
+import time
+from app.repositories.history_recorder import HistoryRecorder
+
+
+class FakeRepository:
+    """Collects written batches; optionally slow to write"""
+    
+    def __init__(self, delay: float = 0.0):
+        self.batches = []
+        self.delay = delay
+    
+    async def save_interactions(self, rows):
+        await asyncio.sleep(self.delay)
+        self.batches.append(list(rows))
+    
+    @property
+    def rows(self):
+        return [row for batch in self.batches for row in batch]
+
+
+def test_flush_writes_rows_queued_before_it():
+    async def scenario():
+        repository = FakeRepository()
+        recorder = HistoryRecorder(repository, batch_size=100, flush_interval_seconds=10)
+        recorder.start()
+        for i in range(5):
+            await recorder.record(query=f"q{i}")
+        await recorder.flush()
+        written = [row["query"] for row in repository.rows]
+        await recorder.stop()
+        return written
+    
+    assert asyncio.run(scenario()) == [f"q{i}" for i in range(5)]
+
+
+def test_flush_is_not_held_up_by_a_steady_stream_of_rows():
+    async def scenario():
+        repository = FakeRepository(delay=0.02)
+        recorder = HistoryRecorder(repository, batch_size=10, flush_interval_seconds=0.05)
+        recorder.start()
+        running = True
+        
+        async def producer():
+            i = 0
+            while running:
+                await recorder.record(query=f"q{i}")
+                i += 1
+                await asyncio.sleep(0.005)
+        
+        task = asyncio.create_task(producer())
+        await asyncio.sleep(0.1)
+        started = time.perf_counter()
+        await asyncio.wait_for(recorder.flush(), timeout=2)
+        elapsed = time.perf_counter() - started
+        running = False
+        await task
+        await recorder.stop()
+        return elapsed
+    
+    assert asyncio.run(scenario()) < 0.5
+
+
+def test_flush_is_skipped_when_the_queue_is_full():
+    async def scenario():
+        repository = FakeRepository(delay=0.5)
+        recorder = HistoryRecorder(repository, max_queue=2, batch_size=1, flush_interval_seconds=10, overflow_policy="block")
+        recorder.start()
+        for i in range(3):
+            await recorder.record(query=f"q{i}")
+        await asyncio.wait_for(recorder.flush(), timeout=0.2)
+        await recorder.stop()
+        return len(repository.rows)
+    
+    assert asyncio.run(scenario()) == 3
+
+
+def test_drop_newest_rejects_rows_when_full():
+    async def scenario():
+        recorder = HistoryRecorder(FakeRepository(), max_queue=2, overflow_policy="drop_newest")
+        # Writer not started: nothing leaves the queue
+        results = [await recorder.record(query=f"q{i}") for i in range(3)]
+        return results, recorder.dropped
+    
+    assert asyncio.run(scenario()) == ([True, True, False], 1)
+
+
+def test_flush_returns_when_the_writer_is_stopped():
+    async def scenario():
+        recorder = HistoryRecorder(FakeRepository())
+        await asyncio.wait_for(recorder.flush(), timeout=0.5)
+        return True
+    
+    assert asyncio.run(scenario())
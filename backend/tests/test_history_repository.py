@@ -0,0 +1,188 @@
+"""Schema migrations and keyset pagination of query history"""
+
+import asyncio
+import sqlite3
+from contextlib import asynccontextmanager
+from datetime import datetime
+import pytest
+from app.config import Settings
+from app.database.connection import MIGRATIONS, close_db, init_db
+from app.repositories.history_repository import IST, INSERT_HISTORY_SQL, HistoryRepository, encode_cursor
+
+# query_history as created before any migration
+LEGACY_SCHEMA = """
+CREATE TABLE query_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    query TEXT NOT NULL,
+    place_name TEXT,
+    user_ip TEXT,
+    has_weather INTEGER DEFAULT 0,
+    has_places INTEGER DEFAULT 0,
+    weather_temp REAL,
+    weather_rain_prob REAL,
+    places_count INTEGER DEFAULT 0,
+    error TEXT,
+    success INTEGER DEFAULT 1,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX idx_place_name ON query_history(place_name);
+CREATE INDEX idx_created_at ON query_history(created_at);
+"""
+LEGACY_ROWS = [
+    ("weather in Paris", "Paris", 1, 0, 20.0, None, 1, "2025-01-01T10:15:00+05:30"),
+    ("places in Paris", "Paris", 0, 1, None, None, 1, "2025-01-01T11:30:00+05:30"),
+    ("weather in Nowhere", "Nowhere", 1, 0, None, "PLACE_NOT_FOUND", 0, "2025-01-02T09:00:00+05:30"),
+]
+# 2025-01-01T00:00:00+05:30 in epoch milliseconds
+BASE_TS = 1735669800000
+
+
+@asynccontextmanager
+async def open_database(path):
+    database = await init_db(Settings(database_url=f"sqlite:///{path}", history_retention_days=0))
+    try:
+        yield database
+    finally:
+        await close_db()
+
+
+def history_row(query, place_name, created_ts, success=True):
+    return (query, place_name, None, 1, 0, 21.0, 10.0, 0, None, 1 if success else 0, "", created_ts)
+
+
+async def insert_rows(database, rows):
+    async with database.writer() as db:
+        await db.executemany(INSERT_HISTORY_SQL, rows)
+        await db.commit()
+
+
+def test_fresh_database_is_created_at_the_latest_version(tmp_path):
+    async def scenario():
+        async with open_database(tmp_path / "history.db") as database:
+            async with database.reader() as db:
+                version = (await db.execute_fetchall("PRAGMA user_version"))[0][0]
+                indexes = {row[0] for row in await db.execute_fetchall(
+                    "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'query_history'"
+                )}
+        return version, indexes
+    
+    version, indexes = asyncio.run(scenario())
+    assert version == len(MIGRATIONS)
+    assert indexes == {"idx_history_created_covering", "idx_history_place_covering"}
+
+
+def test_legacy_database_is_migrated_with_its_rows(tmp_path):
+    path = tmp_path / "history.db"
+    with sqlite3.connect(path) as db:
+        db.executescript(LEGACY_SCHEMA)
+        db.executemany(
+            """INSERT INTO query_history
+               (query, place_name, has_weather, has_places, weather_temp, error, success, created_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+            LEGACY_ROWS
+        )
+    
+    async def scenario():
+        async with open_database(path) as database:
+            repository = HistoryRepository(database)
+            stats = await repository.get_stats()
+            history, _ = await repository.get_recent(limit=10, fields=["query", "created_ts"])
+            buckets, _ = await repository.get_analytics(
+                granularity="day",
+                start=datetime(2025, 1, 1, tzinfo=IST),
+                end=datetime(2025, 1, 3, tzinfo=IST),
+                place_name="Paris",
+                group_by=[]
+            )
+        # Opening it again applies nothing new
+        async with open_database(path) as database:
+            async with database.reader() as db:
+                version = (await db.execute_fetchall("PRAGMA user_version"))[0][0]
+        return stats, history, buckets, version
+    
+    stats, history, buckets, version = asyncio.run(scenario())
+    assert stats == {"total_queries": 3, "successful_queries": 2, "unique_places": 2}
+    assert [(row["query"], row["created_ts"]) for row in history] == [
+        ("weather in Nowhere", BASE_TS + (24 + 9) * 3600000),
+        ("places in Paris", BASE_TS + 11 * 3600000 + 30 * 60000),
+        ("weather in Paris", BASE_TS + 10 * 3600000 + 15 * 60000),
+    ]
+    assert [(bucket["query_count"], bucket["success_count"]) for bucket in buckets] == [(2, 2)]
+    assert version == len(MIGRATIONS)
+
+
+def test_cursor_pages_cover_every_row_once(tmp_path):
+    # Runs of equal timestamps must not be split or repeated across pages
+    rows = [history_row(f"q{i}", "Paris" if i % 2 else "Rome", BASE_TS + (i // 4) * 1000) for i in range(30)]
+    
+    async def scenario():
+        async with open_database(tmp_path / "history.db") as database:
+            await insert_rows(database, rows)
+            repository = HistoryRepository(database)
+            pages, cursor = [], None
+            while True:
+                page, cursor = await repository.get_recent(limit=7, cursor=cursor, fields=["id", "created_ts"])
+                pages.append(page)
+                if cursor is None:
+                    break
+            return pages
+    
+    pages = asyncio.run(scenario())
+    keys = [(row["created_ts"], row["id"]) for page in pages for row in page]
+    assert [len(page) for page in pages] == [7, 7, 7, 7, 2]
+    assert keys == sorted(keys, reverse=True)
+    assert len(set(keys)) == 30
+
+
+def test_cursor_is_stable_when_rows_are_added(tmp_path):
+    async def scenario():
+        async with open_database(tmp_path / "history.db") as database:
+            await insert_rows(database, [history_row(f"q{i}", "Paris", BASE_TS + i) for i in range(10)])
+            repository = HistoryRepository(database)
+            first, cursor = await repository.get_by_place("Paris", limit=4, fields=["query"])
+            await insert_rows(database, [history_row("newer", "Paris", BASE_TS + 100)])
+            second, _ = await repository.get_by_place("Paris", limit=4, cursor=cursor, fields=["query"])
+            newest, _ = await repository.get_by_place("Paris", limit=1, fields=["query"])
+            return first, second, newest
+    
+    first, second, newest = asyncio.run(scenario())
+    assert [row["query"] for row in first] == ["q9", "q8", "q7", "q6"]
+    assert [row["query"] for row in second] == ["q5", "q4", "q3", "q2"]
+    assert newest == [{"query": "newer"}]
+
+
+def test_place_pages_only_hold_that_place(tmp_path):
+    rows = [history_row(f"q{i}", "Paris" if i % 3 == 0 else "Rome", BASE_TS + i) for i in range(12)]
+    
+    async def scenario():
+        async with open_database(tmp_path / "history.db") as database:
+            await insert_rows(database, rows)
+            repository = HistoryRepository(database)
+            first, cursor = await repository.get_by_place("Paris", limit=3, fields=["query", "place_name"])
+            second, last_cursor = await repository.get_by_place("Paris", limit=3, cursor=cursor, fields=["query"])
+            return first, second, last_cursor
+    
+    first, second, last_cursor = asyncio.run(scenario())
+    assert [row["query"] for row in first] == ["q9", "q6", "q3"]
+    assert {row["place_name"] for row in first} == {"Paris"}
+    assert [row["query"] for row in second] == ["q0"]
+    assert last_cursor is None
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor(1, 2)[:-2] + "!!"])
+def test_malformed_cursor_is_rejected(tmp_path, cursor):
+    async def scenario():
+        async with open_database(tmp_path / "history.db") as database:
+            await HistoryRepository(database).get_recent(cursor=cursor)
+    
+    with pytest.raises(ValueError):
+        asyncio.run(scenario())
+
+
+def test_unknown_field_is_rejected(tmp_path):
+    async def scenario():
+        async with open_database(tmp_path / "history.db") as database:
+            await HistoryRepository(database).get_recent(fields=["query", "password"])
+    
+    with pytest.raises(ValueError, match="password"):
+        asyncio.run(scenario())
@@ -0,0 +1,98 @@
+"""UpstreamTransport: per-host pools, prewarm and keep-warm"""
+
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from app.clients.http_transport import UpstreamTransport
+
+
+def start_stub():
+    requests = []
+    
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        
+        def log_message(self, *args):
+            pass
+        
+        def do_HEAD(self):
+            requests.append(self.path)
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        
+        def do_GET(self):
+            requests.append(self.path)
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"{}")
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, requests
+
+
+def test_hosts_share_one_client_and_reuse_connections():
+    server, requests = start_stub()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    
+    async def scenario():
+        upstream = UpstreamTransport()
+        client = upstream.client_for(f"{url}/v1/forecast")
+        assert upstream.client_for(f"{url}/other") is client
+        for _ in range(5):
+            await client.get(f"{url}/v1/forecast")
+        stats = upstream.get_stats()["hosts"][url]
+        await upstream.close()
+        return stats
+    
+    stats = asyncio.run(scenario())
+    server.shutdown()
+    assert stats["requests"] == 5 and stats["connections_opened"] == 1
+    assert stats["open"] == 1 and stats["idle"] == 1
+    assert stats["connection_reuse"] == 0.8
+
+
+def test_prewarm_skips_opted_out_hosts():
+    warm_server, warm_requests = start_stub()
+    cold_server, cold_requests = start_stub()
+    
+    async def scenario():
+        upstream = UpstreamTransport()
+        upstream.client_for(f"http://127.0.0.1:{warm_server.server_address[1]}/api")
+        upstream.client_for(f"http://127.0.0.1:{cold_server.server_address[1]}/search", keep_warm=False)
+        startup = await upstream.prewarm()
+        await upstream.close()
+        
+        upstream = UpstreamTransport()
+        upstream.client_for(f"http://127.0.0.1:{warm_server.server_address[1]}/api")
+        upstream.client_for(f"http://127.0.0.1:{cold_server.server_address[1]}/search", keep_warm=False)
+        rewarmed = await upstream.prewarm(idle_only=True)
+        await upstream.close()
+        return startup, rewarmed
+    
+    startup, rewarmed = asyncio.run(scenario())
+    warm_server.shutdown()
+    cold_server.shutdown()
+    warm_host = f"http://127.0.0.1:{warm_server.server_address[1]}"
+    assert startup == {warm_host: True}
+    assert list(rewarmed) == [warm_host]
+    assert (len(warm_requests), len(cold_requests)) == (2, 0)
+
+
+def test_pool_stats_survive_missing_pool_internals():
+    async def scenario():
+        upstream = UpstreamTransport()
+        upstream.client_for("http://127.0.0.1:9/api")
+        host = upstream._hosts["http://127.0.0.1:9"]
+        del host.transport._pool
+        stats = upstream.get_stats()["hosts"]["http://127.0.0.1:9"]
+        # A host whose pool cannot be inspected is not re-warmed
+        rewarmed = await upstream.prewarm(idle_only=True)
+        return stats, rewarmed
+    
+    stats, rewarmed = asyncio.run(scenario())
+    assert (stats["open"], stats["idle"], stats["active"]) == (None, None, None)
+    assert rewarmed == {}
@@ -0,0 +1,72 @@
+"""JSONArrayStream: incremental decoding of an array field"""
+
+import json
+import pytest
+from app.utils.json_stream import JSONArrayStream
+
+DOCUMENT = json.dumps({
+    "version": 0.6,
+    "osm3s": {"timestamp_osm_base": "2024-01-01T00:00:00Z"},
+    "elements": [
+        {"type": "node", "id": 1, "lat": 12.97, "lon": 77.59, "tags": {"name": "Lalbagh [\"Garden\"]"}},
+        {"type": "way", "id": 22, "center": {"lat": -0.5, "lon": 1e-3}, "tags": {}},
+        123,
+        0.6,
+        "text, with ] and }",
+        [1, [2, 3]],
+        None,
+    ],
+    "remark": "runtime remark: fine"
+}, indent=1)
+
+
+def decode(document: str, chunk_size: int):
+    stream = JSONArrayStream("elements")
+    items = []
+    for start in range(0, len(document), chunk_size):
+        items.extend(stream.feed(document[start:start + chunk_size]))
+    stream.close()
+    return items, stream.fields
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, len(DOCUMENT)])
+def test_chunked_input_decodes_like_json_loads(chunk_size):
+    expected = json.loads(DOCUMENT)
+    items, fields = decode(DOCUMENT, chunk_size)
+    assert items == expected["elements"]
+    assert fields == {key: value for key, value in expected.items() if key != "elements"}
+
+
+def test_items_are_returned_as_soon_as_they_are_complete():
+    stream = JSONArrayStream("elements")
+    assert stream.feed('{"elements": [{"id": 1}, {"id"') == [{"id": 1}]
+    assert stream.feed(': 2}, 12') == [{"id": 2}]
+    # 12 may continue as 123
+    assert stream.feed('3]') == [123]
+    assert stream.feed('}') == []
+    stream.close()
+
+
+@pytest.mark.parametrize("cut", [1, 20, len(DOCUMENT) // 2, len(DOCUMENT) - 1])
+def test_truncated_input_fails_on_close(cut):
+    with pytest.raises(ValueError):
+        decode(DOCUMENT[:cut], 5)
+
+
+@pytest.mark.parametrize("document", [
+    '{"elements": [1, 2,]}',
+    '{"elements": [,]}',
+    '{"elements": [1 2]}',
+    '{"version": 0.6,}',
+    '["elements"]',
+])
+def test_malformed_input_is_rejected(document):
+    with pytest.raises(ValueError):
+        decode(document, 4)
+
+
+def test_remark_after_the_array_is_collected():
+    document = '{"elements": [], "remark": "runtime error: Query timed out"}'
+    items, fields = decode(document, 3)
+    assert items == []
+    assert fields["remark"] == "runtime error: Query timed out"
@@ -0,0 +1,205 @@
+"""Overpass mirror failover, hedging and health ranking"""
+
+import asyncio
+import json
+import time
+import httpx
+import pytest
+from app.clients.overpass_mirrors import OverpassMirrors
+from app.clients.overpass_planner import plan_search
+from app.clients.places_client import PlacesClient
+
+LATITUDE, LONGITUDE = 12.97194, 77.59369
+PRIMARY = "http://primary.test/api/interpreter"
+MIRROR = "http://mirror.test/api/interpreter"
+
+
+def overpass_body(count: int = 12, remark: str = None) -> bytes:
+    elements = [
+        {
+            "type": "node", "id": i, "lat": LATITUDE + 0.001 * i, "lon": LONGITUDE,
+            "tags": {"name": f"Place {i}", "tourism": "attraction"}
+        }
+        for i in range(count)
+    ]
+    document = {"version": 0.6, "elements": elements}
+    if remark:
+        document["remark"] = remark
+    return json.dumps(document).encode()
+
+
+class StubServer:
+    """MockTransport handler answering after `delay` seconds; notes cancelled requests"""
+    
+    def __init__(self, status: int = 200, body: bytes = None, delay: float = 0.0, headers: dict = None):
+        self.status = status
+        self.body = overpass_body() if body is None else body
+        self.delay = delay
+        self.headers = headers or {}
+        self.requests = 0
+        self.cancelled = 0
+    
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return httpx.Response(self.status, content=self.body, headers=self.headers)
+
+
+def make_client(primary: StubServer, mirror: StubServer, hedging: bool = True) -> PlacesClient:
+    mirrors = OverpassMirrors(
+        [
+            (PRIMARY, httpx.AsyncClient(transport=httpx.MockTransport(primary))),
+            (MIRROR, httpx.AsyncClient(transport=httpx.MockTransport(mirror))),
+        ],
+        hedging=hedging,
+        initial_delay=0.05,
+        min_delay=0.01,
+        max_delay=1.0
+    )
+    return PlacesClient(base_url=PRIMARY, mirrors=mirrors)
+
+
+def search(client: PlacesClient):
+    plan = plan_search(LATITUDE, LONGITUDE, "city")
+    return client._fetch_places(LATITUDE, LONGITUDE, "Bangalore", plan)
+
+
+def mirror_stats(client: PlacesClient) -> dict:
+    return {mirror.url: mirror for mirror in client.mirrors.mirrors}
+
+
+def test_slow_primary_is_hedged_and_cancelled():
+    primary, mirror = StubServer(delay=5.0), StubServer(delay=0.01)
+    
+    async def scenario():
+        client = make_client(primary, mirror)
+        started = time.perf_counter()
+        places = await search(client)
+        return client, places, time.perf_counter() - started
+    
+    client, places, elapsed = asyncio.run(scenario())
+    stats = mirror_stats(client)
+    assert places and len(places) == 12
+    assert elapsed < 1.0
+    assert primary.cancelled == 1
+    assert stats[PRIMARY].cancelled == 1 and stats[PRIMARY].successes == 0
+    assert stats[MIRROR].hedges == 1 and stats[MIRROR].successes == 1
+
+
+def test_fast_primary_is_not_hedged():
+    primary, mirror = StubServer(delay=0.0), StubServer(delay=0.0)
+    
+    places = asyncio.run(search(make_client(primary, mirror)))
+    assert places and len(places) == 12
+    assert (primary.requests, mirror.requests) == (1, 0)
+
+
+@pytest.mark.parametrize("status", [429, 504])
+def test_overloaded_primary_fails_over_and_cools_down(status):
+    primary = StubServer(status=status, body=b"busy", headers={"Retry-After": "30"})
+    mirror = StubServer()
+    
+    async def scenario():
+        client = make_client(primary, mirror, hedging=False)
+        return client, await search(client)
+    
+    client, places = asyncio.run(scenario())
+    stats = mirror_stats(client)
+    assert places and len(places) == 12
+    assert (primary.requests, mirror.requests) == (1, 1)
+    assert stats[PRIMARY].failures == 1
+    assert stats[PRIMARY].cooldown_until - time.monotonic() > 25
+    assert [m.url for m in client.mirrors.ranked()] == [MIRROR, PRIMARY]
+
+
+def test_rejected_query_is_not_retried_on_other_mirrors():
+    primary, mirror = StubServer(status=400, body=b"syntax error"), StubServer()
+    
+    async def scenario():
+        client = make_client(primary, mirror, hedging=False)
+        return client, await search(client)
+    
+    client, places = asyncio.run(scenario())
+    assert places is None
+    assert (primary.requests, mirror.requests) == (1, 0)
+    # The query was at fault, not the mirror
+    assert mirror_stats(client)[PRIMARY].failures == 0
+
+
+@pytest.mark.parametrize("body", [
+    overpass_body(remark='runtime error: Query timed out in "query" at line 3 after 26 seconds.'),
+    overpass_body()[:-40],
+])
+def test_failed_or_truncated_answer_fails_over(body):
+    primary, mirror = StubServer(body=body), StubServer()
+    
+    async def scenario():
+        client = make_client(primary, mirror, hedging=False)
+        return client, await search(client)
+    
+    client, places = asyncio.run(scenario())
+    assert places and len(places) == 12
+    assert mirror_stats(client)[PRIMARY].failures == 1
+
+
+def test_every_mirror_failing_returns_none():
+    primary, mirror = StubServer(status=504, body=b"timeout"), StubServer(status=429, body=b"busy")
+    
+    places = asyncio.run(search(make_client(primary, mirror)))
+    assert places is None
+    assert (primary.requests, mirror.requests) == (1, 1)
+
+
+def test_ranking_prefers_healthy_and_fast_mirrors():
+    client = httpx.AsyncClient()
+    mirrors = OverpassMirrors([("http://a.test", client), ("http://b.test", client), ("http://c.test", client)])
+    a, b, c = mirrors.mirrors
+    # Untried mirrors keep the configured order
+    assert mirrors.ranked() == [a, b, c]
+    
+    for _ in range(3):
+        mirrors.record_success(a, 2.0)
+        mirrors.record_success(b, 0.5)
+        mirrors.record_success(c, 1.0)
+    assert mirrors.ranked() == [b, c, a]
+    
+    # A failure puts the mirror last while it cools down, however fast it is
+    mirrors.record_failure(b)
+    assert mirrors.ranked() == [c, a, b]
+    assert b.cooldown_until > time.monotonic()
+    
+    # Consecutive failures double the cooldown
+    first_cooldown = b.cooldown_until
+    mirrors.record_failure(b)
+    assert b.cooldown_until > first_cooldown
+    
+    # A success ends the cooldown; the failures still weigh on the score
+    mirrors.record_success(b, 0.5)
+    assert b.cooldown_until == 0.0 and b.consecutive_failures == 0
+    assert 0 < b.failure_rate() < 1
+    asyncio.run(client.aclose())
+
+
+def test_hedge_delay_follows_the_latency_percentile():
+    client = httpx.AsyncClient()
+    mirrors = OverpassMirrors(
+        [("http://a.test", client), ("http://b.test", client)],
+        hedge_percentile=90, initial_delay=4.0, min_delay=0.5, max_delay=10.0
+    )
+    a = mirrors.mirrors[0]
+    assert mirrors.hedge_delay(a) == 4.0
+    
+    for seconds in [1.0] * 9 + [3.0]:
+        mirrors.record_success(a, seconds)
+    assert mirrors.hedge_delay(a) == 1.0
+    
+    for seconds in [30.0] * 10:
+        mirrors.record_success(a, seconds)
+    assert mirrors.hedge_delay(a) == 10.0
+    
+    assert OverpassMirrors([("http://a.test", client)]).hedge_delay(a) is None
+    asyncio.run(client.aclose())
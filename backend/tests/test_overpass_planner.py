@@ -0,0 +1,72 @@
+"""Place type classification and search plans for place lookups"""
+
+import pytest
+from app.clients.overpass_planner import DEFAULT_PROFILE, SEARCH_PROFILES, classify_place_type, plan_search
+
+LATITUDE, LONGITUDE = 12.97194, 77.59369
+
+
+@pytest.mark.parametrize("address_type, osm_class, osm_type, expected", [
+    ("city", "place", "city", "city"),
+    ("suburb", "place", "suburb", "town"),
+    ("hamlet", "place", "hamlet", "village"),
+    ("state", "boundary", "administrative", "region"),
+    # addresstype wins over the class of the feature
+    ("city", "boundary", "administrative", "city"),
+    # Single features are landmarks
+    ("tourism", "tourism", "museum", "landmark"),
+    (None, "historic", "monument", "landmark"),
+    # Falls back to "type" when addresstype says nothing useful
+    ("road", "highway", "town", "town"),
+    (None, "highway", "residential", None),
+    (None, None, None, None),
+])
+def test_classify_place_type(address_type, osm_class, osm_type, expected):
+    assert classify_place_type(address_type, osm_class, osm_type) == expected
+
+
+@pytest.mark.parametrize("place_type", sorted(SEARCH_PROFILES))
+def test_plans_follow_the_profile_radii(place_type):
+    profile = SEARCH_PROFILES[place_type]
+    plan = plan_search(LATITUDE, LONGITUDE, place_type)
+    
+    assert plan.profile == place_type
+    assert [step.radius_m for step in plan.steps] == list(profile.radii)
+    assert plan.steps[0].area == f"(around:{profile.radii[0]},{LATITUDE},{LONGITUDE})"
+    assert plan.min_results == profile.min_results
+    assert plan.max_distance_km == pytest.approx(profile.radii[-1] / 1000 * 1.2)
+    assert plan.cache_precision == profile.cache_precision
+
+
+@pytest.mark.parametrize("place_type", [None, "unknown"])
+def test_unknown_place_type_uses_the_default_profile(place_type):
+    plan = plan_search(LATITUDE, LONGITUDE, place_type)
+    
+    assert plan.profile == DEFAULT_PROFILE
+    assert [step.radius_m for step in plan.steps] == list(SEARCH_PROFILES[DEFAULT_PROFILE].radii)
+
+
+def test_mid_sized_bounding_box_replaces_the_circles_it_covers():
+    # About 7.7 km from the centre to a corner: wider than the first city circle (5 km)
+    bounding_box = (12.92, 77.54, 13.02, 77.64)
+    plan = plan_search(LATITUDE, LONGITUDE, "city", bounding_box)
+    
+    assert plan.steps[0].label == "bbox"
+    assert plan.steps[0].area == "(12.92,77.54,13.02,77.64)"
+    assert plan.steps[0].bounding_box == bounding_box
+    assert plan.steps[0].radius_m is None
+    assert [step.radius_m for step in plan.steps[1:]] == [12000, 25000]
+
+
+@pytest.mark.parametrize("bounding_box", [
+    # Smaller than the first circle: the circle already covers it
+    (12.97, 77.59, 12.975, 77.595),
+    # Larger than the widest circle: searching it would be too expensive
+    (12.0, 77.0, 14.0, 79.0),
+    # Malformed
+    (12.97, 77.59),
+])
+def test_other_bounding_boxes_are_ignored(bounding_box):
+    plan = plan_search(LATITUDE, LONGITUDE, "city", bounding_box)
+    
+    assert [step.label for step in plan.steps] == ["5 km", "12 km", "25 km"]
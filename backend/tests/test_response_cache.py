@@ -0,0 +1,102 @@
+"""ResponseCache.get_or_load: single-flight loads and stale-while-revalidate"""
+
+import asyncio
+import pytest
+from app.utils.cache import ResponseCache
+
+
+class CountingLoader:
+    """Returns the next value on each call, after an optional delay"""
+    
+    def __init__(self, values, delay: float = 0.0):
+        self.values = list(values)
+        self.delay = delay
+        self.calls = 0
+    
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        value = self.values.pop(0)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+
+def test_concurrent_misses_share_one_load():
+    async def scenario():
+        cache = ResponseCache()
+        loader = CountingLoader(["fresh"], delay=0.05)
+        results = await asyncio.gather(*(cache.get_or_load("key", loader) for _ in range(10)))
+        return results, loader.calls, cache.get_stats()
+    
+    results, calls, stats = asyncio.run(scenario())
+    assert results == ["fresh"] * 10
+    assert calls == 1
+    assert stats["coalesced_requests"] == 9
+    assert stats["inflight_loads"] == 0
+
+
+def test_cancelled_caller_does_not_abort_the_shared_load():
+    async def scenario():
+        cache = ResponseCache()
+        loader = CountingLoader(["fresh"], delay=0.05)
+        first = asyncio.create_task(cache.get_or_load("key", loader))
+        second = asyncio.create_task(cache.get_or_load("key", loader))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second, loader.calls, cache.get("key")
+    
+    assert asyncio.run(scenario()) == ("fresh", 1, "fresh")
+
+
+def test_none_is_returned_but_not_cached():
+    async def scenario():
+        cache = ResponseCache()
+        loader = CountingLoader([None, "fresh"])
+        first = await cache.get_or_load("key", loader)
+        second = await cache.get_or_load("key", loader)
+        return first, second, loader.calls
+    
+    assert asyncio.run(scenario()) == (None, "fresh", 2)
+
+
+def test_stale_value_is_served_while_it_refreshes():
+    async def scenario():
+        cache = ResponseCache(default_ttl_seconds=0.05, default_stale_ttl_seconds=10)
+        loader = CountingLoader(["old", "new"], delay=0.02)
+        await cache.get_or_load("key", loader)
+        await asyncio.sleep(0.1)
+        stale = await cache.get_or_load("key", loader)
+        await asyncio.sleep(0.05)
+        refreshed = await cache.get_or_load("key", loader)
+        return stale, refreshed, loader.calls, cache.get_stats()["stale_hits"]
+    
+    assert asyncio.run(scenario()) == ("old", "new", 2, 1)
+
+
+@pytest.mark.parametrize("failure", [None, RuntimeError("upstream down")])
+def test_failed_refresh_keeps_the_stale_value_and_backs_off(failure):
+    async def scenario():
+        cache = ResponseCache(default_ttl_seconds=0.05, default_stale_ttl_seconds=10, refresh_backoff_seconds=60)
+        loader = CountingLoader(["old", failure, "new"])
+        await cache.get_or_load("key", loader)
+        await asyncio.sleep(0.1)
+        served = [await cache.get_or_load("key", loader)]
+        await asyncio.sleep(0.01)
+        # Within the backoff no further refresh is started
+        served.append(await cache.get_or_load("key", loader))
+        await asyncio.sleep(0.01)
+        return served, loader.calls, cache.get_stats()["refresh_failures"]
+    
+    assert asyncio.run(scenario()) == (["old", "old"], 2, 1)
+
+
+def test_entry_past_its_hard_ttl_is_loaded_again():
+    async def scenario():
+        cache = ResponseCache(default_ttl_seconds=0.02, default_stale_ttl_seconds=0.02)
+        loader = CountingLoader(["old", "new"])
+        await cache.get_or_load("key", loader)
+        await asyncio.sleep(0.1)
+        return await cache.get_or_load("key", loader), loader.calls
+    
+    assert asyncio.run(scenario()) == ("new", 2)
@@ -18,7 +18,23 @@ function App() {
     setResponse(null);
 
     try {
-      const result = await tourismAPI.query(request);
+      // Show weather as soon as it arrives instead of waiting for places
+      const result = await tourismAPI.queryStream(request, (event) => {
+        if (event.event === 'place') {
+          setResponse({
+            place_name: event.place_name,
+            weather: null,
+            places: null,
+            message: '',
+            error: null,
+            success: true,
+          });
+        } else if (event.event === 'weather') {
+          setResponse(prev => prev && { ...prev, weather: event.weather });
+        } else if (event.event === 'places') {
+          setResponse(prev => prev && { ...prev, places: event.places });
+        }
+      });
       setResponse(result);
       // Refresh history after successful query
       setHistoryRefreshKey(prev => prev + 1);
@@ -27,7 +43,7 @@ function App() {
       let errorMessage = 'Failed to process query';
       if (err.code === 'ECONNABORTED' || err.message?.includes('timeout')) {
         errorMessage = 'Request timed out. The backend might be waking up (free tier takes ~30-60 seconds). Please try again in a moment.';
-      } else if (err.code === 'ERR_NETWORK' || err.message === 'Network Error') {
+      } else if (err.code === 'ERR_NETWORK' || err.message === 'Network Error' || err.message === 'Failed to fetch') {
         errorMessage = 'Cannot connect to backend. Please check if the backend is running and the URL is correct.';
       } else if (err.response?.data?.detail) {
         errorMessage = err.response.data.detail;
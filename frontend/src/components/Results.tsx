@@ -6,7 +6,7 @@ interface ResultsProps {
 }
 
 export default function Results({ response, isLoading }: ResultsProps) {
-  if (isLoading) {
+  if (isLoading && !response) {
     return (
       <div className="results loading">
         <div className="spinner"></div>
@@ -64,10 +64,17 @@ export default function Results({ response, isLoading }: ResultsProps) {
           </div>
         )}
 
-        <div className="message-section">
-          <h3>Response</h3>
-          <p className="message-text">{response.message}</p>
-        </div>
+        {isLoading ? (
+          <div className="message-section">
+            <div className="spinner"></div>
+            <p>Still looking things up for {response.place_name}...</p>
+          </div>
+        ) : (
+          <div className="message-section">
+            <h3>Response</h3>
+            <p className="message-text">{response.message}</p>
+          </div>
+        )}
       </div>
     </div>
   );
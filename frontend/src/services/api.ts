@@ -1,5 +1,5 @@
 import axios from 'axios';
-import type { TourismRequest, TourismResponse, QueryHistory, QueryStats } from '../types';
+import type { TourismRequest, TourismResponse, TourismStreamEvent, QueryHistory, QueryStats } from '../types';
 
 const API_BASE_URL =
   import.meta.env.VITE_API_BASE_URL ||
@@ -26,6 +26,54 @@ export const tourismAPI = {
     return response.data;
   },
 
+  /**
+   * Query tourism information as a stream of events: place, weather and
+   * places arrive as soon as each is ready, then the final summary.
+   * Resolves with the summary response.
+   */
+  async queryStream(
+    request: TourismRequest,
+    onEvent: (event: TourismStreamEvent) => void
+  ): Promise<TourismResponse> {
+    const response = await fetch(`${API_BASE_URL}/query/stream`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(request),
+    });
+    if (!response.ok || !response.body) {
+      const body = await response.json().catch(() => null);
+      throw new Error(body?.detail || `Request failed with status ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    // Assigned from handleLine; the cast keeps TS from narrowing it to null
+    let summary = null as TourismResponse | null;
+
+    const handleLine = (line: string) => {
+      if (!line.trim()) return;
+      const event = JSON.parse(line) as TourismStreamEvent;
+      if (event.event === 'summary') summary = event.response;
+      onEvent(event);
+    };
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      const lines = buffer.split('\n');
+      buffer = lines.pop() ?? '';
+      lines.forEach(handleLine);
+    }
+    handleLine(buffer + decoder.decode());
+
+    if (!summary) {
+      throw new Error('Stream ended before the final response');
+    }
+    return summary;
+  },
+
   /**
    * Get query history
    */
@@ -22,8 +22,31 @@ export interface TourismResponse {
   message: string;
   error: string | null;
   success: boolean;
+  unavailable?: string[] | null;
 }
 
+export interface LocationInfo {
+  latitude: number;
+  longitude: number;
+  display_name: string;
+  place_id: number;
+  place_type?: string | null;
+  bounding_box?: number[] | null;
+}
+
+/** One line of the /query/stream NDJSON response */
+export type TourismStreamEvent =
+  | {
+      event: 'place';
+      place_name: string;
+      location: LocationInfo;
+      wants_weather: boolean;
+      wants_places: boolean;
+    }
+  | { event: 'weather'; weather: WeatherResponse | null; unavailable: boolean }
+  | { event: 'places'; places: PlaceInfo[]; unavailable: boolean }
+  | { event: 'summary'; response: TourismResponse };
+
 export interface QueryHistory {
   id: number;
   query: string;
@@ -37,6 +60,7 @@ export interface QueryHistory {
   error: string | null;
   success: boolean;
   created_at: string;
+  created_ts: number;
 }
 
 export interface QueryStats {